@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Сквозной бенчмарк MCP сервера на локальных фикстурах
+
+Поднимает HTTP-сервер фикстур, запускает server.py (или использует уже
+запущенный, --server-url), гоняет сценарий через настоящий MCP-клиент
+с заданной конкурентностью и пишет p50/p95/p99 и пропускную способность
+по каждому инструменту в JSON.
+
+    python -m benchmarks.e2e --iterations 10 -o bench/current.json
+    python -m benchmarks.e2e --compare bench/baseline.json -o bench/current.json
+
+Инструменты сервера работают с одной активной вкладкой, поэтому несколько
+клиентов мешали бы друг другу: пока сессии не изолированы, конкурентность
+больше 1 отклоняется, а прогон с ошибками вызовов считается неудачным.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from benchmarks.fixtures import FixtureServer, build_fixtures
+
+ROOT = Path(__file__).resolve().parent.parent
+OPERATIONS = ("navigate", "fill", "click", "read_page", "get_timeline")
+
+def percentile(values: List[float], p: float) -> float:
+    """Перцентиль с линейной интерполяцией (p от 0 до 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def summarize(samples: Dict[str, List[float]], errors: Dict[str, int],
+              duration: float) -> Dict:
+    """Сводка латентностей (мс) и пропускной способности по операциям"""
+    operations = {}
+    for name, values in samples.items():
+        operations[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "throughput_ops": round(len(values) / duration, 2) if duration else 0.0,
+        }
+    total = sum(len(v) for v in samples.values())
+    return {
+        "operations": operations,
+        "total": {
+            "calls": total,
+            "errors": sum(errors.values()),
+            "duration_s": round(duration, 3),
+            "throughput_ops": round(total / duration, 2) if duration else 0.0,
+        },
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Операции, у которых p95 вырос больше чем на ``threshold`` (доля)"""
+    regressions = []
+    print(f"\n{'operation':<14}{'base p95':>12}{'curr p95':>12}{'delta':>10}")
+    for name, stats in current["operations"].items():
+        base = baseline.get("operations", {}).get(name)
+        if not base or not base["p95_ms"]:
+            continue
+        delta = (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+        mark = " ❌" if delta > threshold else ""
+        print(f"{name:<14}{base['p95_ms']:>12.2f}{stats['p95_ms']:>12.2f}{delta:>+10.1%}{mark}")
+        if delta > threshold:
+            regressions.append(name)
+    return regressions
+
+class Recorder:
+    """Сбор латентностей вызовов инструментов"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+        self.errors: Dict[str, int] = {}
+        self.enabled = True
+
+    async def call(self, session: ClientSession, tool: str, arguments: Dict) -> str:
+        started = time.perf_counter()
+        result = await session.call_tool(tool, arguments)
+        elapsed = time.perf_counter() - started
+
+        text = result.content[0].text if result.content else ""
+        if self.enabled:
+            self.samples.setdefault(tool, []).append(elapsed)
+            if result.isError or text.startswith("Error:"):
+                self.errors[tool] = self.errors.get(tool, 0) + 1
+        return text
+
+async def run_scenario(session: ClientSession, recorder: Recorder, base_url: str):
+    """Одна итерация: форма, большая таблица, тяжёлая SPA, timeline"""
+    await recorder.call(session, "navigate", {"url": f"{base_url}/form.html"})
+    await recorder.call(session, "fill", {"selector": "#email", "text": "user@example.com"})
+    await recorder.call(session, "fill", {"selector": "#password", "text": "secret"})
+    await recorder.call(session, "click", {"selector": "#submit"})
+    await recorder.call(session, "read_page", {})
+
+    await recorder.call(session, "navigate", {"url": f"{base_url}/table.html"})
+    await recorder.call(session, "read_page", {})
+
+    await recorder.call(session, "navigate", {"url": f"{base_url}/spa.html"})
+    await recorder.call(session, "click", {"selector": "[data-testid=\"load-more\"]"})
+    await recorder.call(session, "read_page", {})
+
+    await recorder.call(session, "get_timeline", {})
+
+async def worker(server_url: str, recorder: Recorder, base_url: str,
+                 iterations: int, start: asyncio.Event):
+    async with sse_client(server_url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await start.wait()
+            for _ in range(iterations):
+                await run_scenario(session, recorder, base_url)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@asynccontextmanager
+async def launched_server(startup_timeout: float = 30.0):
+    """Запуск server.py в отдельном процессе (headless, без slow_mo)"""
+    port = _free_port()
+    env = {**os.environ, "SERVER_HOST": "127.0.0.1", "SERVER_PORT": str(port),
+           "HEADLESS": "true", "SLOW_MO": "0", "LOG_LEVEL": "WARNING"}
+    process = subprocess.Popen([sys.executable, "server.py"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        async with httpx.AsyncClient() as client:
+            while True:
+                try:
+                    if (await client.get(f"{base}/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("server.py не запустился")
+                await asyncio.sleep(0.2)
+        yield f"{base}/sse"
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+@asynccontextmanager
+async def existing_server(server_url: str):
+    """Уже запущенный сервер"""
+    yield server_url
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run_benchmark(args) -> Dict:
+    pages = build_fixtures(table_rows=args.table_rows, spa_items=args.spa_items)
+    with FixtureServer(pages) as base_url:
+        server = existing_server(args.server_url) if args.server_url else launched_server()
+        async with server as server_url:
+            # Прогрев: запуск браузера и первая загрузка страниц не учитываются
+            recorder = Recorder()
+            recorder.enabled = False
+            async with sse_client(server_url) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    await session.call_tool("start_recording", {})
+                    for _ in range(args.warmup):
+                        await run_scenario(session, recorder, base_url)
+
+            recorder.enabled = True
+            start = asyncio.Event()
+            tasks = [asyncio.create_task(worker(server_url, recorder, base_url,
+                                                args.iterations, start))
+                     for _ in range(args.concurrency)]
+            await asyncio.sleep(0.5)  # все клиенты подключились
+            started = time.perf_counter()
+            start.set()
+            await asyncio.gather(*tasks)
+            duration = time.perf_counter() - started
+
+    result = summarize(recorder.samples, recorder.errors, duration)
+    result["meta"] = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    result["config"] = {
+        "concurrency": args.concurrency,
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "table_rows": args.table_rows,
+        "spa_items": args.spa_items,
+        "server_url": args.server_url,
+    }
+    return result
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Сквозной бенчмарк MCP сервера")
+    parser.add_argument("--concurrency", type=int, default=1, help="число параллельных клиентов")
+    parser.add_argument("--iterations", type=int, default=10, help="итераций сценария на клиента")
+    parser.add_argument("--warmup", type=int, default=1, help="итераций прогрева")
+    parser.add_argument("--table-rows", type=int, default=2000)
+    parser.add_argument("--spa-items", type=int, default=3000)
+    parser.add_argument("--server-url", help="уже запущенный сервер (…/sse) вместо server.py")
+    parser.add_argument("-o", "--output", type=Path, default=Path("bench/e2e.json"))
+    parser.add_argument("--compare", type=Path, help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="допустимый рост p95 при сравнении (доля)")
+    args = parser.parse_args(argv)
+    if args.concurrency != 1:
+        # Клиенты делят активную вкладку сервера — замерялась бы их гонка, а не латентность
+        parser.error("--concurrency > 1 is not supported until server sessions are isolated")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = asyncio.run(run_benchmark(args))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    total = result["total"]
+    print(f"📊 {total['calls']} вызовов за {total['duration_s']}s "
+          f"({total['throughput_ops']} ops/s, ошибок: {total['errors']})")
+    for name, stats in result["operations"].items():
+        print(f"   {name:<14} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms")
+    print(f"📝 Результаты: {args.output}")
+
+    if total["errors"]:
+        print(f"❌ Ошибки вызовов: {total['errors']}, латентности недостоверны")
+        sys.exit(1)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"❌ Регрессия p95: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Локальные HTML-фикстуры и HTTP-сервер для бенчмарков
+
+Страницы генерируются в памяти и раздаются встроенным ``http.server`` из
+фонового потока, поэтому бенчмарк не требует сети.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+FORM_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Login</title></head>
+<body>
+<form id="login" onsubmit="event.preventDefault(); document.getElementById('status').textContent = 'ok';">
+  <input id="email" name="email" type="email" data-testid="email" placeholder="Email">
+  <input id="password" name="password" type="password" data-testid="password">
+  <button id="submit" type="submit" data-testid="submit">Войти</button>
+</form>
+<div id="status"></div>
+</body></html>
+"""
+
+SPA_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>SPA</title></head>
+<body>
+<div id="app">Loading...</div>
+<script>
+  // Имитация тяжёлого SPA: рендер нескольких тысяч узлов из JS
+  function render(count) {
+    const root = document.getElementById('app');
+    const parts = ['<button data-testid="load-more" onclick="more()">Ещё</button><ul>'];
+    for (let i = 0; i < count; i++) {
+      parts.push('<li class="card"><span class="title">Item ' + i + '</span>' +
+                 '<input data-testid="qty-' + i + '" value="' + (i % 10) + '"></li>');
+    }
+    parts.push('</ul>');
+    root.innerHTML = parts.join('');
+  }
+  let size = __ITEMS__;
+  function more() { size += 500; render(size); }
+  setTimeout(() => render(size), 50);
+</script>
+</body></html>
+"""
+
+def _table_page(rows: int) -> str:
+    body = "".join(
+        f"<tr><td>{i}</td><td>user{i}@example.com</td><td>Пользователь {i}</td>"
+        f"<td><a href='#row-{i}'>Открыть</a></td></tr>"
+        for i in range(rows)
+    )
+    return ("<!doctype html><html><head><meta charset='utf-8'><title>Table</title></head>"
+            f"<body><table id='data'><tbody>{body}</tbody></table></body></html>")
+
+def build_fixtures(table_rows: int = 2000, spa_items: int = 3000) -> Dict[str, str]:
+    """Набор страниц: путь -> HTML"""
+    return {
+        "/form.html": FORM_PAGE,
+        "/table.html": _table_page(table_rows),
+        "/spa.html": SPA_PAGE.replace("__ITEMS__", str(spa_items)),
+    }
+
+class FixtureServer:
+    """HTTP-сервер фикстур в фоновом потоке (``with FixtureServer() as base_url``)"""
+
+    def __init__(self, pages: Dict[str, str], host: str = "127.0.0.1", port: int = 0):
+        encoded = {path: html.encode("utf-8") for path, html in pages.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = encoded.get(self.path.split("?", 1)[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> str:
+        self._thread.start()
+        return self.base_url
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Накладные расходы MCP-транспортов на один вызов
+
+Для каждого транспорта (SSE, streamable HTTP, stdio, in-process) меряет
+время подключения, ``ping`` (чистый круг по протоколу) и вызов
+инструмента без браузера (полный путь через допуск, метрики и логи).
+HTTP-транспорты обслуживает один запущенный server.py.
+
+    python -m benchmarks.transports --calls 500 -o bench/transports.json
+    python -m benchmarks.transports --transports http inprocess
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.e2e import existing_server, launched_server, summarize
+from src.core.transports import TRANSPORTS, open_session
+
+# Инструмент, который не запускает браузер и не пишет на диск
+TOOL = "stop_recording"
+
+async def measure(target: str, calls: int, warmup: int) -> Dict:
+    """Латентности ping и вызова инструмента через одну сессию"""
+    started = time.perf_counter()
+    async with open_session(target) as session:
+        connect = time.perf_counter() - started
+        for _ in range(warmup):
+            await session.send_ping()
+            await session.call_tool(TOOL, {})
+
+        samples: Dict[str, List[float]] = {"ping": [], "call_tool": []}
+        errors: Dict[str, int] = {}
+        started = time.perf_counter()
+        for _ in range(calls):
+            t0 = time.perf_counter()
+            await session.send_ping()
+            t1 = time.perf_counter()
+            result = await session.call_tool(TOOL, {})
+            t2 = time.perf_counter()
+            samples["ping"].append(t1 - t0)
+            samples["call_tool"].append(t2 - t1)
+            if result.isError:
+                errors["call_tool"] = errors.get("call_tool", 0) + 1
+        duration = time.perf_counter() - started
+
+    result = summarize(samples, errors, duration)
+    result["connect_ms"] = round(connect * 1000, 2)
+    return result
+
+@asynccontextmanager
+async def http_server(server_url: Optional[str]):
+    """Базовый URL сервера (без /sse) — запущенного или нового"""
+    server = existing_server(server_url) if server_url else launched_server()
+    async with server as sse_url:
+        yield sse_url.rstrip("/").removesuffix("/sse")
+
+async def run_benchmark(args) -> Dict:
+    # Сервер в процессе и в stdio пишет логи так же, как запущенный server.py
+    os.environ["LOG_LEVEL"] = "WARNING"
+    results = {}
+    needs_http = {"sse", "http"} & set(args.transports)
+    async with http_server(args.server_url) if needs_http else _no_server() as base:
+        for transport in args.transports:
+            target = {"sse": f"{base}/sse", "http": f"{base}/mcp"}.get(transport, transport)
+            results[transport] = await measure(target, args.calls, args.warmup)
+
+    return {
+        "transports": results,
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "calls": args.calls,
+            "warmup": args.warmup,
+            "tool": TOOL,
+        },
+    }
+
+@asynccontextmanager
+async def _no_server():
+    yield None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Накладные расходы MCP-транспортов")
+    parser.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=list(TRANSPORTS))
+    parser.add_argument("--calls", type=int, default=200, help="вызовов на транспорт")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--server-url", help="уже запущенный сервер (…/sse) вместо server.py")
+    parser.add_argument("-o", "--output", type=Path, default=Path("bench/transports.json"))
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = asyncio.run(run_benchmark(args))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    print(f"{'transport':<12}{'connect':>10}{'ping p50':>10}{'ping p95':>10}"
+          f"{'call p50':>10}{'call p95':>10}  ms")
+    for name, stats in result["transports"].items():
+        ping, call = stats["operations"]["ping"], stats["operations"]["call_tool"]
+        print(f"{name:<12}{stats['connect_ms']:>10.1f}{ping['p50_ms']:>10.2f}{ping['p95_ms']:>10.2f}"
+              f"{call['p50_ms']:>10.2f}{call['p95_ms']:>10.2f}")
+    print(f"📝 Результаты: {args.output}")
+
+if __name__ == "__main__":
+    main()
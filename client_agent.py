@@ -3,20 +3,32 @@ import json
 from mcp import ClientSession
 from mcp.client.sse import sse_client
 from utils import get_llm_client, MODEL_NAME, SYSTEM_PROMPT_AGENT, SERVER_URL
+from src.utils.llm_scheduler import INTERACTIVE, get_llm_scheduler
+from src.utils.tracing import get_tracer
+
+tracer = get_tracer("client-agent")
 
 async def run_agent(session, task):
+    with tracer.trace("agent_task", task=task):
+        await _run_agent_steps(session, task)
+
+async def _run_agent_steps(session, task):
     client_ai = get_llm_client()
     messages = [{"role": "system", "content": SYSTEM_PROMPT_AGENT}, {"role": "user", "content": task}]
     
     print(f"🤖 Task: {task}")
     
+    step = 0
     while True:
+        step += 1
         tools = await session.list_tools()
         openai_tools = [{"type": "function", "function": {"name": t.name, "description": t.description, "parameters": t.inputSchema}} for t in tools.tools]
 
-        resp = await client_ai.chat.completions.create(
-            model=MODEL_NAME, messages=messages, tools=openai_tools, tool_choice="auto", temperature=0.0
-        )
+        with tracer.span("llm_call", step=step, model=MODEL_NAME):
+            resp = await get_llm_scheduler().chat(
+                client_ai, priority=INTERACTIVE, coalesce=False,
+                model=MODEL_NAME, messages=messages, tools=openai_tools, tool_choice="auto", temperature=0.0
+            )
         msg = resp.choices[0].message
         messages.append(msg)
 
@@ -25,7 +37,8 @@ async def run_agent(session, task):
                 name, args = tc.function.name, json.loads(tc.function.arguments)
                 print(f"🔧 {name}({args})")
                 try:
-                    res = await session.call_tool(name, args)
+                    with tracer.span(f"tool_call:{name}", step=step):
+                        res = await session.call_tool(name, args, meta=tracer.inject())
                     out = res.content[0].text
                 except Exception as e: out = str(e)
                 
@@ -9,82 +9,107 @@ import sys
 import os
 from pathlib import Path
 from datetime import datetime
-from mcp import ClientSession
-from mcp.client.sse import sse_client
-from utils import get_llm_client, MODEL_NAME, PROMPT_GENERATE_TEST, SERVER_URL
+from utils import (get_llm_client, MODEL_NAME, PROMPT_GENERATE_SEGMENT, PROMPT_GENERATE_TEST,
+                   SERVER_URL)
+from src.tools.test_segments import (assemble_module, clean_steps, segment_class_name,
+                                     selector_constants, split_timeline, strip_code_fences)
+from src.core.transports import open_session
+from src.tools.errors import tool_error
+from src.utils.llm_scheduler import BATCH, get_llm_scheduler
+from src.utils.retry import RetryableError, retry_call
+from src.utils.log_pipeline import configure_logging
+from src.utils.loop_monitor import LoopMonitor
+from src.utils.tracing import get_tracer
 import logging
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/recorder.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
+tracer = get_tracer("client-recorder")
+
+# Запись длиннее этого (символов JSON) генерируется по сегментам
+MAX_SIZE = 20000
 
 async def generate_test(timeline_data, max_retries=3):
     """Генерация теста с повторными попытками"""
-    client_ai = get_llm_client()
-
     if not timeline_data:
         logger.error("Empty timeline data")
         return None
 
     # Упрощение данных
-    clean_data = []
-    for step in timeline_data:
-        item = {
-            "action": step.get("action"),
-            "selector": step.get("selector"),
-            "text": step.get("text"),
-            "url": step.get("url") or step.get("page_url"),
-            "timestamp": step.get("timestamp")
-        }
-        clean_data.append(item)
-
+    clean_data = clean_steps(timeline_data)
     json_str = json.dumps(clean_data, ensure_ascii=False, indent=2)
 
-    # Умное обрезание
-    MAX_SIZE = 20000
+    # Длинная запись — по сегментам, без обрезания
     if len(json_str) > MAX_SIZE:
-        logger.warning(f"Timeline too large ({len(json_str)} chars), truncating...")
-        json_str = json_str[:8000] + "\n... [truncated] ...\n" + json_str[-12000:]
+        logger.info(f"Timeline too large ({len(json_str)} chars), generating by segments...")
+        return await generate_test_segmented(timeline_data, max_retries=max_retries)
 
     logger.info(f"⏳ Generating test (Input: {len(json_str)} chars, {len(timeline_data)} steps)...")
+    return await _generate_code(PROMPT_GENERATE_TEST.format(json_str=json_str), max_retries)
+
+async def generate_test_segmented(timeline_data, max_tokens=3000, max_parallel=4, max_retries=3):
+    """Генерация длинного теста по сегментам с ограниченной параллельностью"""
+    segments = split_timeline(clean_steps(timeline_data), max_tokens=max_tokens)
+    selectors = selector_constants(segments)
+    semaphore = asyncio.Semaphore(max_parallel)
+    logger.info(f"⏳ Generating test in {len(segments)} segments "
+                f"(parallel: {max_parallel}, selectors: {len(selectors)})...")
+
+    async def generate_segment(index, segment):
+        used = {step["selector"] for step in segment if step.get("selector")}
+        prompt = PROMPT_GENERATE_SEGMENT.format(
+            index=index + 1,
+            total=len(segments),
+            class_name=segment_class_name(index),
+            json_str=json.dumps(segment, ensure_ascii=False, indent=2),
+            selectors="\n".join(f"{selectors[s]} = {json.dumps(s, ensure_ascii=False)}"
+                                for s in sorted(used)) or "(нет)",
+        )
+        async with semaphore:
+            with tracer.span("generate_segment", segment=index + 1, steps=len(segment)):
+                return await _generate_code(prompt, max_retries)
+
+    codes = await asyncio.gather(*(generate_segment(i, seg) for i, seg in enumerate(segments)))
+    failed = [i + 1 for i, code in enumerate(codes) if not code]
+    if failed:
+        logger.error(f"Segments failed: {failed}")
+        return None
+    return assemble_module(codes, selectors)
+
+async def _generate_code(prompt, max_retries=3):
+    """Запрос кода у LLM; повтор — только если код невалиден
+
+    Сетевые ошибки и 429 повторяет планировщик LLM-вызовов.
+    """
+    client_ai = get_llm_client()
 
-    # Попытки генерации
     for attempt in range(max_retries):
         try:
-            resp = await client_ai.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[{
-                    "role": "user", 
-                    "content": PROMPT_GENERATE_TEST.format(json_str=json_str)
-                }],
-                temperature=0.0,
-                max_tokens=8000,
-                timeout=60.0
-            )
-
-            code = resp.choices[0].message.content
-            code = code.replace("```python", "").replace("```", "").strip()
+            with tracer.span("llm_call", attempt=attempt + 1, model=MODEL_NAME):
+                # Генерация — пакетная работа: уступает интерактивным запросам агента
+                resp = await get_llm_scheduler().chat(
+                    client_ai,
+                    priority=BATCH,
+                    model=MODEL_NAME,
+                    messages=[{
+                        "role": "user", 
+                        "content": prompt
+                    }],
+                    temperature=0.0,
+                    max_tokens=8000,
+                    timeout=60.0
+                )
+        except Exception as e:
+            logger.error(f"LLM Error: {e}")
+            return None
 
-            # Валидация
-            if "import" in code or "async def" in code or "def " in code:
-                logger.info("✅ Test generated successfully")
-                return code
+        code = strip_code_fences(resp.choices[0].message.content)
 
-            logger.warning("Generated code looks invalid, retrying...")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2 ** attempt)
+        # Валидация
+        if "import" in code or "async def" in code or "def " in code:
+            logger.info("✅ Test generated successfully")
+            return code
 
-        except Exception as e:
-            logger.error(f"LLM Error (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2 ** attempt)
+        logger.warning(f"Generated code looks invalid (attempt {attempt + 1}/{max_retries})")
 
     return None
 
@@ -133,29 +158,49 @@ async def save_test(code, base_name="recorded_test"):
         logger.error(f"Save failed: {e}")
         return None
 
-async def safe_call_tool(session, tool_name, arguments, max_retries=3):
-    """Безопасный вызов tool"""
-    for attempt in range(max_retries):
-        try:
+async def safe_call_tool(session, tool_name, arguments, max_retries=3, deadline=60.0):
+    """Безопасный вызов tool
+
+    Повторяются таймауты и ошибки, которые сервер пометил как временные;
+    остальные ошибки возвращаются сразу результатом вызова.
+    """
+    attempt = 0
+
+    async def call():
+        nonlocal attempt
+        attempt += 1
+        with tracer.span(f"tool_call:{tool_name}", attempt=attempt):
             result = await asyncio.wait_for(
-                session.call_tool(tool_name, arguments),
+                session.call_tool(tool_name, arguments, meta=tracer.inject()),
                 timeout=30.0
             )
-            return result
-
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout: {tool_name} (attempt {attempt + 1})")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(1)
-        except Exception as e:
-            logger.error(f"Error {tool_name}: {e}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(1)
+        error = tool_error(result)
+        if error and error.get("retryable"):
+            raise RetryableError(result.content[0].text if result.content else tool_name)
+        return result
 
-    raise Exception(f"Failed: {tool_name} after {max_retries} attempts")
+    try:
+        return await retry_call(call, attempts=max_retries, delay=1.0, deadline=deadline,
+                                key=tool_name, retry_on=(RetryableError, asyncio.TimeoutError))
+    except Exception as e:
+        logger.error(f"Error {tool_name}: {e}")
+        raise Exception(f"Failed: {tool_name} after {attempt} attempts") from e
 
 async def main():
     """Главная функция"""
+    monitor = LoopMonitor.from_env()
+    if monitor:
+        monitor.start()
+    try:
+        with tracer.trace("record_session"):
+            await record_session()
+    finally:
+        if monitor:
+            monitor.stop()
+            print(monitor.report())
+
+async def record_session():
+    """Запись сессии и генерация теста"""
     logger.info("="*60)
     logger.info("MCP Recorder Started")
     logger.info("="*60)
@@ -163,52 +208,53 @@ async def main():
     try:
         print(f"🔌 Connecting to {SERVER_URL}...")
 
-        async with sse_client(SERVER_URL) as (r, w):
-            async with ClientSession(r, w) as session:
-                await asyncio.wait_for(session.initialize(), timeout=10.0)
-                logger.info("✅ Connected")
+        async with open_session(SERVER_URL) as session:
+            logger.info("✅ Connected")
 
-                # Навигация
-                print("🌐 Opening https://ya.ru...")
-                await safe_call_tool(session, "navigate", {"url": "https://ya.ru"})
-                await asyncio.sleep(2)
+            # Навигация
+            print("🌐 Opening https://ya.ru...")
+            await safe_call_tool(session, "navigate", {
+                "url": "https://ya.ru",
+                "wait_until": {"load_state": "load", "timeout_ms": 15000}
+            })
 
-                # Запись
-                print("🎬 Recording started...")
-                await safe_call_tool(session, "start_recording", {})
+            # Запись
+            print("🎬 Recording started...")
+            await safe_call_tool(session, "start_recording", {})
 
-                # Ожидание
-                await wait_enter()
+            # Ожидание
+            await wait_enter()
 
-                # Timeline
-                print("\n📊 Fetching timeline...")
-                res = await safe_call_tool(session, "get_timeline", {})
+            # Timeline
+            print("\n📊 Fetching timeline...")
+            res = await safe_call_tool(session, "get_timeline", {})
 
-                if not res.content:
-                    print("❌ No data")
-                    return
+            if not res.content:
+                print("❌ No data")
+                return
 
-                timeline = json.loads(res.content[0].text)
-                print(f"📊 Steps recorded: {len(timeline)}")
+            timeline = json.loads(res.content[0].text)
+            print(f"📊 Steps recorded: {len(timeline)}")
 
-                if not timeline:
-                    print("⚠️  No actions")
-                    return
+            if not timeline:
+                print("⚠️  No actions")
+                return
 
-                # Генерация
+            # Генерация
+            with tracer.span("generate_test", steps=len(timeline)):
                 code = await generate_test(timeline)
 
-                if code:
-                    saved = await save_test(code)
+            if code:
+                saved = await save_test(code)
 
-                    if saved:
-                        # Сохраняем JSON
-                        json_path = saved.with_suffix(".json")
-                        with open(json_path, "w", encoding="utf-8") as f:
-                            json.dump(timeline, f, ensure_ascii=False, indent=2)
-                        print(f"📝 Timeline: {json_path}")
-                else:
-                    print("❌ Generation failed")
+                if saved:
+                    # Сохраняем JSON
+                    json_path = saved.with_suffix(".json")
+                    with open(json_path, "w", encoding="utf-8") as f:
+                        json.dump(timeline, f, ensure_ascii=False, indent=2)
+                    print(f"📝 Timeline: {json_path}")
+            else:
+                print("❌ Generation failed")
 
     except KeyboardInterrupt:
         print("\n⚠️  Cancelled")
@@ -222,6 +268,12 @@ if __name__ == "__main__":
     Path("logs").mkdir(exist_ok=True)
     Path("recorded_tests").mkdir(exist_ok=True)
 
+    # Настройка логирования (только при запуске, не при импорте)
+    configure_logging(
+        log_file=Path("logs/recorder.log"),
+        console_format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
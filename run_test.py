@@ -1,20 +1,245 @@
 #!/usr/bin/env python3
-"""Запуск последнего записанного теста"""
+"""
+Параллельный запуск записанных тестов
+
+Находит все тесты в recorded_tests/, раскладывает их по пулу процессов
+(самые долгие по истории прошлых прогонов — первыми) и пишет отчёты
+JUnit XML и JSON с временем каждого теста.
+
+    python run_test.py                      # все тесты, воркеров = CPU
+    python run_test.py -j 8 --shard 1/4     # четверть набора на CI-машине
+    python run_test.py --rerun-failed       # только упавшие в прошлый раз
+    python run_test.py --latest             # последний записанный тест
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
 import sys
-import subprocess
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional
+
+TESTS_DIR = Path("recorded_tests")
+HISTORY_FILE = ".durations.json"
+OUTPUT_TAIL = 4000
+
+@dataclass
+class TestResult:
+    """Результат одного теста"""
+    __test__ = False  # не класс тестов для pytest
+
+    name: str
+    path: str
+    status: str  # passed | failed | timeout
+    duration: float
+    returncode: Optional[int] = None
+    output: str = ""
+
+def discover(tests_dir: Path, pattern: str = "*.py") -> List[Path]:
+    """Все записанные тесты каталога"""
+    return sorted(p for p in tests_dir.glob(pattern) if not p.name.startswith("_"))
+
+def load_history(path: Path) -> Dict[str, float]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def update_history(history: Dict[str, float], results: List[TestResult],
+                   alpha: float = 0.5) -> Dict[str, float]:
+    """Скользящее среднее длительностей (таймауты не учитываются)"""
+    updated = dict(history)
+    for result in results:
+        if result.status == "timeout":
+            continue
+        previous = updated.get(result.name)
+        updated[result.name] = round(result.duration if previous is None
+                                     else alpha * result.duration + (1 - alpha) * previous, 3)
+    return updated
+
+def order_by_duration(tests: List[Path], history: Dict[str, float]) -> List[Path]:
+    """Долгие тесты первыми; для новых — средняя длительность"""
+    known = [history[t.name] for t in tests if t.name in history]
+    default = sum(known) / len(known) if known else 0.0
+    return sorted(tests, key=lambda t: history.get(t.name, default), reverse=True)
+
+def shard(tests: List[Path], history: Dict[str, float], index: int, total: int) -> List[Path]:
+    """Тесты шарда ``index`` из ``total`` (1-based)
+
+    Жадная раскладка по суммарной длительности: шарды выходят примерно
+    равными по времени, а не по числу тестов. Раскладка детерминирована,
+    поэтому все машины CI получают непересекающиеся части.
+    """
+    ordered = order_by_duration(sorted(tests), history)
+    known = [history[t.name] for t in tests if t.name in history]
+    default = sum(known) / len(known) if known else 1.0
+    loads = [0.0] * total
+    buckets: List[List[Path]] = [[] for _ in range(total)]
+    for test in ordered:
+        target = loads.index(min(loads))
+        buckets[target].append(test)
+        loads[target] += history.get(test.name, default) or default
+    return buckets[index - 1]
+
+async def run_one(test: Path, timeout: float, env: Dict[str, str]) -> TestResult:
+    """Запустить тест отдельным процессом"""
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, str(test),
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, env=env,
+        start_new_session=True,  # при таймауте убиваем и запущенный тестом браузер
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+        status = "passed" if process.returncode == 0 else "failed"
+    except asyncio.TimeoutError:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        stdout, _ = await process.communicate()
+        status = "timeout"
+    output = stdout.decode("utf-8", errors="replace")
+    return TestResult(
+        name=test.name,
+        path=str(test),
+        status=status,
+        duration=round(time.perf_counter() - started, 3),
+        returncode=process.returncode,
+        output=output[-OUTPUT_TAIL:],
+    )
+
+async def run_tests(tests: List[Path], workers: int, timeout: float,
+                    env: Optional[Dict[str, str]] = None, on_result=None) -> List[TestResult]:
+    """Прогнать тесты пулом из ``workers`` процессов"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for test in tests:
+        queue.put_nowait(test)
+    env = {**os.environ, **(env or {})}
+    results: List[TestResult] = []
+
+    async def worker():
+        while not queue.empty():
+            test = queue.get_nowait()
+            result = await run_one(test, timeout, env)
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(tests))))))
+    # Порядок отчёта не зависит от порядка завершения
+    return sorted(results, key=lambda r: r.name)
+
+def write_junit(results: List[TestResult], path: Path, suite: str = "recorded_tests"):
+    failures = sum(r.status == "failed" for r in results)
+    errors = sum(r.status == "timeout" for r in results)
+    testsuite = ET.Element("testsuite", {
+        "name": suite,
+        "tests": str(len(results)),
+        "failures": str(failures),
+        "errors": str(errors),
+        "time": f"{sum(r.duration for r in results):.3f}",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    })
+    for result in results:
+        case = ET.SubElement(testsuite, "testcase", {
+            "classname": suite,
+            "name": result.name,
+            "file": result.path,
+            "time": f"{result.duration:.3f}",
+        })
+        if result.status == "failed":
+            node = ET.SubElement(case, "failure", {"message": f"exit code {result.returncode}"})
+            node.text = result.output
+        elif result.status == "timeout":
+            node = ET.SubElement(case, "error", {"message": "timeout"})
+            node.text = result.output
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(testsuite).write(path, encoding="utf-8", xml_declaration=True)
+
+def write_json(results: List[TestResult], path: Path, duration: float):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "duration_s": round(duration, 3),
+        "summary": {status: sum(r.status == status for r in results)
+                    for status in ("passed", "failed", "timeout")},
+        "tests": [asdict(r) for r in results],
+    }
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def failed_tests(report_path: Path, tests_dir: Path) -> List[Path]:
+    """Тесты, упавшие в прошлом прогоне (по JSON-отчёту)"""
+    try:
+        report = json.loads(report_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    return [tests_dir / t["name"] for t in report.get("tests", [])
+            if t["status"] != "passed" and (tests_dir / t["name"]).exists()]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Запуск записанных тестов")
+    parser.add_argument("tests", nargs="*", type=Path, help="конкретные тесты (по умолчанию все)")
+    parser.add_argument("--dir", type=Path, default=TESTS_DIR)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--shard", help="часть набора, например 2/4")
+    parser.add_argument("--timeout", type=float, default=300, help="таймаут теста, с")
+    parser.add_argument("--rerun-failed", action="store_true",
+                        help="только тесты, упавшие в прошлом прогоне")
+    parser.add_argument("--latest", action="store_true", help="только последний записанный тест")
+    parser.add_argument("--junit", type=Path, default=Path("reports/junit.xml"))
+    parser.add_argument("--json", type=Path, default=Path("reports/results.json"))
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    history_path = args.dir / HISTORY_FILE
+    history = load_history(history_path)
+
+    if args.tests:
+        tests = args.tests
+    elif args.rerun_failed:
+        tests = failed_tests(args.json, args.dir)
+    else:
+        tests = discover(args.dir)
+    if args.latest and tests:
+        tests = [max(tests, key=lambda p: p.stat().st_mtime)]
+    if args.shard:
+        index, total = (int(part) for part in args.shard.split("/"))
+        tests = shard(tests, history, index, total)
+
+    if not tests:
+        print(f"❌ No tests found in {args.dir}/")
+        sys.exit(1)
+
+    tests = order_by_duration(tests, history)
+    print(f"▶️  Running {len(tests)} tests with {args.workers} workers")
+    print("-" * 60)
+
+    def report(result: TestResult):
+        mark = {"passed": "✅", "failed": "❌", "timeout": "⏱️"}[result.status]
+        print(f"{mark} {result.name} ({result.duration:.1f}s)")
 
-tests_dir = Path("recorded_tests")
-tests = sorted(tests_dir.glob("*.py"), key=lambda x: x.stat().st_mtime, reverse=True)
+    started = time.perf_counter()
+    results = asyncio.run(run_tests(tests, args.workers, args.timeout, on_result=report))
+    duration = time.perf_counter() - started
 
-if not tests:
-    print("❌ No tests found in recorded_tests/")
-    sys.exit(1)
+    write_junit(results, args.junit)
+    write_json(results, args.json, duration)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    history_path.write_text(json.dumps(update_history(history, results), indent=2),
+                            encoding="utf-8")
 
-latest = tests[0]
-print(f"▶️  Running: {latest.name}")
-print(f"📅 Created: {latest.stat().st_mtime}")
-print("-" * 60)
+    failed = [r for r in results if r.status != "passed"]
+    print("-" * 60)
+    print(f"📊 {len(results) - len(failed)}/{len(results)} passed in {duration:.1f}s")
+    print(f"📝 Reports: {args.junit}, {args.json}")
+    sys.exit(1 if failed else 0)
 
-result = subprocess.run([sys.executable, str(latest)])
-sys.exit(result.returncode)
+if __name__ == "__main__":
+    main()
@@ -3,157 +3,425 @@
 MCP Server для записи действий браузера
 Исправленная версия без ошибки NoneType
 """
+import argparse
 import asyncio
 import logging
+import os
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, Dict, List, Optional
 from pathlib import Path
 
+from src.utils.startup_profile import StartupProfile
+
+# Профиль запуска (--profile-startup) включается до остальных импортов
+startup_profile = StartupProfile.from_argv()
+
 from starlette.applications import Starlette
-from starlette.routing import Route
-from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 from starlette.requests import Request
-from sse_starlette.sse import EventSourceResponse
 
 from mcp.server import Server
 from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from mcp import types
 
-import uvicorn
-from playwright.async_api import async_playwright, Browser, Page, BrowserContext
+from src.utils import metrics
+from src.utils.admission import AdmissionController, Busy
+from src.utils.log_pipeline import configure_logging, log_context
+from src.utils.loop_monitor import LoopMonitor
+from src.utils.process_stats import browser_rss_bytes
+from src.utils.profiling import OnDemandProfiler
+from src.utils.reclaim import Reclaimer, ReclaimPolicy
+from src.utils.tracing import get_tracer
+from src.tools.auth_state import AuthStateStore
+from src.tools.errors import classify_error
+from src.tools.network import ResourcePolicy
+from src.tools.snapshot_archive import SnapshotArchive
+from src.tools.tabs import navigate_many
+from src.tools.waiting import CONDITION_SCHEMA, wait_for_condition
+
+# Playwright и uvicorn загружаются при первом использовании
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+startup_profile.mark("imports")
+
+# Настройка логирования: через очередь, JSON в файл с ротацией
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    log_file=Path(os.getenv("LOGS_DIR", "logs")) / "server.log",
+    hot_rate=float(os.getenv("LOG_HOT_RATE", 20)),
+    hot_sample=float(os.getenv("LOG_HOT_SAMPLE", 1.0)),
 )
 logger = logging.getLogger(__name__)
+tracer = get_tracer("mcp-server")
 
 # Глобальное состояние
 class AppState:
     def __init__(self):
-        self.browser: Optional[Browser] = None
-        self.context: Optional[BrowserContext] = None
-        self.page: Optional[Page] = None
+        self.browser: Optional["Browser"] = None
+        self.context: Optional["BrowserContext"] = None
+        self.page: Optional["Page"] = None  # активная вкладка
+        self.tabs: Dict[str, "Page"] = {}
+        self.active_tab: Optional[str] = None
+        self.tab_seq = 0
+        # Состояние сессии, сохранённое при закрытии браузера; восстанавливается при запуске
+        self.preserved: Optional[Dict] = None
+        self.reclaim_task: Optional[asyncio.Task] = None
+        self.http_sessions: Optional[AsyncExitStack] = None
         self.playwright = None
         self.recording = False
         self.timeline: List[Dict] = []
         self.sessions: Dict[str, Dict] = {}
+        # Прогон для индекса архива снимков; новый на каждый start_recording
+        self.run_id = f"live_{datetime.now():%Y%m%d_%H%M%S}"
 
 app_state = AppState()
 
+# Фильтрация запросов и кэш статики (настраивается через окружение)
+network_policy = ResourcePolicy.from_env()
+
+# Допуск вызовов: общий лимит, ограниченная очередь, честность между сессиями
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("MAX_CONCURRENT_CALLS", 4)),
+    max_queue=int(os.getenv("MAX_QUEUED_CALLS", 32)),
+)
+
+# Архив снимков страниц (включается SNAPSHOT_ARCHIVE_DIR)
+snapshot_archive = (
+    SnapshotArchive(Path(os.environ["SNAPSHOT_ARCHIVE_DIR"]),
+                    codec=os.getenv("SNAPSHOT_CODEC", "zlib"))
+    if os.getenv("SNAPSHOT_ARCHIVE_DIR") else None
+)
+
+# Профилирование по запросу (/debug/profile), включается PROFILING_ENABLED=true
+profiler = OnDemandProfiler(Path(os.getenv("LOGS_DIR", "logs")) / "profiles")
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+# Монитор задержек event loop (LOOP_MONITOR=true)
+loop_monitor = LoopMonitor.from_env()
+
+# Снимки авторизованных сессий (cookies + localStorage)
+auth_states = AuthStateStore(
+    Path(os.getenv("AUTH_STATE_DIR", ".cache/auth_states")),
+    default_ttl=int(os.getenv("AUTH_STATE_TTL", 8 * 3600)),
+)
+
+# Параллельность navigate_many по умолчанию
+TAB_PARALLELISM = int(os.getenv("TAB_PARALLELISM", 4))
+
+# Закрытие простаивающих вкладок и браузера, перезапуск по RSS
+reclaimer = Reclaimer(ReclaimPolicy.from_env())
+
+# Один запуск браузера, даже если первые вызовы пришли одновременно
+_browser_lock = asyncio.Lock()
+
 # MCP Server
 mcp_server = Server("browser-recorder")
 
+# Доступные инструменты
+TOOLS = [
+    types.Tool(
+        name="navigate",
+        description="Переход на URL",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {"type": "string", "description": "URL для навигации"},
+                "wait_until": CONDITION_SCHEMA,
+                "timeout_ms": {"type": "integer", "description": "Таймаут загрузки"}
+            },
+            "required": ["url"]
+        }
+    ),
+    types.Tool(
+        name="click",
+        description="Клик по элементу",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "selector": {"type": "string", "description": "CSS селектор"},
+                "wait_until": CONDITION_SCHEMA,
+                "timeout_ms": {"type": "integer", "description": "Таймаут клика (5000)"}
+            },
+            "required": ["selector"]
+        }
+    ),
+    types.Tool(
+        name="fill",
+        description="Заполнить поле",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "selector": {"type": "string"},
+                "text": {"type": "string"}
+            },
+            "required": ["selector", "text"]
+        }
+    ),
+    types.Tool(
+        name="wait_for",
+        description="Дождаться условия на странице (элемент, URL, сеть, JS-предикат)",
+        inputSchema=CONDITION_SCHEMA
+    ),
+    types.Tool(
+        name="save_auth_state",
+        description="Сохранить cookies и localStorage текущего контекста под именем",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Имя снимка"},
+                "ttl_seconds": {"type": "integer", "description": "Срок годности снимка"},
+                "check_url": {"type": "string",
+                              "description": "Страница для проверки входа при загрузке"},
+                "logged_in": {**CONDITION_SCHEMA,
+                              "description": "Условие на check_url, означающее, что вход выполнен"}
+            },
+            "required": ["name"]
+        }
+    ),
+    types.Tool(
+        name="load_auth_state",
+        description="Открыть новый контекст из снимка (вместо повторного логина)",
+        inputSchema={
+            "type": "object",
+            "properties": {"name": {"type": "string", "description": "Имя снимка"}},
+            "required": ["name"]
+        }
+    ),
+    types.Tool(
+        name="list_auth_states",
+        description="Список действующих снимков сессий",
+        inputSchema={"type": "object", "properties": {}}
+    ),
+    types.Tool(
+        name="invalidate_auth_state",
+        description="Удалить снимок (сессия разлогинена)",
+        inputSchema={
+            "type": "object",
+            "properties": {"name": {"type": "string"}},
+            "required": ["name"]
+        }
+    ),
+    types.Tool(
+        name="open_tab",
+        description="Открыть новую вкладку (и сделать её активной)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "url": {"type": "string", "description": "URL для новой вкладки"},
+                "activate": {"type": "boolean", "description": "Сделать активной (true)"}
+            }
+        }
+    ),
+    types.Tool(
+        name="list_tabs",
+        description="Список вкладок сессии",
+        inputSchema={"type": "object", "properties": {}}
+    ),
+    types.Tool(
+        name="switch_tab",
+        description="Сделать вкладку активной",
+        inputSchema={
+            "type": "object",
+            "properties": {"tab_id": {"type": "string"}},
+            "required": ["tab_id"]
+        }
+    ),
+    types.Tool(
+        name="close_tab",
+        description="Закрыть вкладку",
+        inputSchema={
+            "type": "object",
+            "properties": {"tab_id": {"type": "string"}},
+            "required": ["tab_id"]
+        }
+    ),
+    types.Tool(
+        name="navigate_many",
+        description="Открыть несколько URL параллельно во вкладках и вернуть краткие дайджесты страниц",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "urls": {"type": "array", "items": {"type": "string"}},
+                "parallelism": {"type": "integer",
+                                "description": "Сколько вкладок грузится одновременно"},
+                "load_state": {"type": "string",
+                               "enum": ["load", "domcontentloaded", "networkidle", "commit"]},
+                "timeout_ms": {"type": "integer", "description": "Таймаут загрузки одного URL"},
+                "keep_tabs": {"type": "boolean",
+                              "description": "Оставить вкладки открытыми для switch_tab"}
+            },
+            "required": ["urls"]
+        }
+    ),
+    types.Tool(
+        name="start_recording",
+        description="Начать запись действий",
+        inputSchema={"type": "object", "properties": {}}
+    ),
+    types.Tool(
+        name="stop_recording",
+        description="Остановить запись",
+        inputSchema={"type": "object", "properties": {}}
+    ),
+    types.Tool(
+        name="get_timeline",
+        description="Получить записанные действия",
+        inputSchema={"type": "object", "properties": {}}
+    ),
+    types.Tool(
+        name="read_page",
+        description="Прочитать содержимое страницы",
+        inputSchema={"type": "object", "properties": {}}
+    )
+]
+TOOL_NAMES = {tool.name for tool in TOOLS}
+# Инструменты, которым не нужен запущенный браузер
+BROWSERLESS_TOOLS = {"stop_recording", "list_auth_states", "invalidate_auth_state"}
+# Инструменты, не трогающие страницу: выполняются без её блокировки
+PAGELESS_TOOLS = BROWSERLESS_TOOLS | {"start_recording", "get_timeline"}
+# Работают со своими вкладками и не ждут действий на активной
+OWN_TAB_TOOLS = {"list_tabs", "navigate_many"}
+
 @mcp_server.list_tools()
 async def list_tools() -> list[types.Tool]:
     """Список доступных инструментов"""
-    return [
-        types.Tool(
-            name="navigate",
-            description="Переход на URL",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "url": {"type": "string", "description": "URL для навигации"}
-                },
-                "required": ["url"]
-            }
-        ),
-        types.Tool(
-            name="click",
-            description="Клик по элементу",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "selector": {"type": "string", "description": "CSS селектор"}
-                },
-                "required": ["selector"]
-            }
-        ),
-        types.Tool(
-            name="fill",
-            description="Заполнить поле",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "selector": {"type": "string"},
-                    "text": {"type": "string"}
-                },
-                "required": ["selector", "text"]
-            }
-        ),
-        types.Tool(
-            name="start_recording",
-            description="Начать запись действий",
-            inputSchema={"type": "object", "properties": {}}
-        ),
-        types.Tool(
-            name="stop_recording",
-            description="Остановить запись",
-            inputSchema={"type": "object", "properties": {}}
-        ),
-        types.Tool(
-            name="get_timeline",
-            description="Получить записанные действия",
-            inputSchema={"type": "object", "properties": {}}
-        ),
-        types.Tool(
-            name="read_page",
-            description="Прочитать содержимое страницы",
-            inputSchema={"type": "object", "properties": {}}
-        )
-    ]
+    return TOOLS
+
+def _current_session_id() -> str:
+    """Идентификатор MCP-сессии текущего запроса"""
+    try:
+        return f"{id(mcp_server.request_context.session):x}"
+    except LookupError:
+        return "-"
+
+def _request_meta(key: str) -> Optional[str]:
+    """Поле из метаданных (_meta) текущего MCP-запроса"""
+    try:
+        meta = mcp_server.request_context.meta
+    except LookupError:
+        return None
+    return getattr(meta, key, None) if meta else None
 
 @mcp_server.call_tool()
-async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
+async def call_tool(name: str, arguments: dict) -> types.CallToolResult:
     """Обработка вызовов инструментов"""
+    tool_label = name if name in TOOL_NAMES else "unknown"
+    metrics.TOOL_CALLS.labels(tool=tool_label).inc()
+    started = time.perf_counter()
+    session = _current_session_id()
+    # Действия над страницей выполняются строго по одному
+    page_key = None if name in PAGELESS_TOOLS | OWN_TAB_TOOLS else "page"
     try:
-        logger.info(f"Tool called: {name} with args: {arguments}")
+        with log_context(session=session, tool=name), \
+                tracer.remote_parent(_request_meta("traceparent")), \
+                tracer.span(f"call_tool:{name}", tool=name):
+            async with admission.admit(session, page_key) as ticket:
+                metrics.QUEUE_WAIT.observe(ticket.wait_ms / 1000)
+                metrics.IN_FLIGHT.inc()
+                try:
+                    result = await _dispatch_tool(name, arguments)
+                finally:
+                    metrics.IN_FLIGHT.dec()
+    except Busy as e:
+        logger.warning(f"Rejected {name}: {e}")
+        metrics.CALLS_REJECTED.inc()
+        return _error_result(e, queue_wait_ms=0, rejected=True)
+    finally:
+        metrics.TOOL_LATENCY.labels(tool=tool_label).observe(time.perf_counter() - started)
+        if profiler.armed:
+            profiler.call_finished()
+
+    if isinstance(result, list):
+        result = types.CallToolResult(content=result)
+    result.meta = {**(result.meta or {}), "queue_wait_ms": round(ticket.wait_ms, 1)}
+    return result
 
-        # Инициализация браузера если нужно
-        if not app_state.page and name != "stop_recording":
-            await init_browser()
+def _error_result(error: BaseException, **meta) -> types.CallToolResult:
+    """Результат-ошибка: текст для людей, классификация в _meta для клиентов"""
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=f"Error: {error}")],
+        isError=True,
+        _meta={"error": classify_error(error), **meta}
+    )
+
+async def _dispatch_tool(name: str, arguments: dict) -> list[types.TextContent] | types.CallToolResult:
+    """Выполнение инструмента"""
+    try:
+        logger.info(f"Tool called: {name}", extra={"hot": True})
+        logger.debug("Tool args: %s", arguments)
+
+        # Инициализация браузера если нужно (или ожидание его перезапуска)
+        if name not in BROWSERLESS_TOOLS:
+            if not app_state.page or _browser_lock.locked():
+                with tracer.span("init_browser"):
+                    await init_browser()
+            reclaimer.touch(app_state.active_tab)
 
         # Обработка команд
         if name == "navigate":
             url = arguments["url"]
-            await app_state.page.goto(url, wait_until="domcontentloaded")
+            condition = dict(arguments.get("wait_until") or {})
+            # Состояние загрузки goto умеет ждать сам, остальное — после
+            load_state = condition.pop("load_state", None) or "domcontentloaded"
+            # timeout_ms условия — общий дедлайн на загрузку и последующее ожидание
+            timeout_ms = condition.get("timeout_ms") or arguments.get("timeout_ms", 30000)
+            dom = await _archive_page("pre_action") if app_state.recording else None
+            started = time.perf_counter()
+            with tracer.span("playwright.goto", url=url):
+                await app_state.page.goto(url, wait_until=load_state, timeout=timeout_ms)
+            if condition.get("timeout_ms"):
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                condition["timeout_ms"] = max(1, int(timeout_ms - elapsed_ms))
+            waited = await _wait_after_action(condition)
 
             if app_state.recording:
                 app_state.timeline.append({
                     "action": "navigate",
                     "url": url,
+                    "wait_until": arguments.get("wait_until"),
                     "timestamp": datetime.now().isoformat(),
-                    "page_url": app_state.page.url
+                    "page_url": app_state.page.url,
+                    "dom_snapshot": dom
                 })
 
             return [types.TextContent(
                 type="text",
-                text=f"Navigated to {url}"
+                text=f"Navigated to {url}{waited}"
             )]
 
         elif name == "click":
             selector = arguments["selector"]
-            await app_state.page.click(selector, timeout=5000)
+            dom = await _archive_page("pre_action") if app_state.recording else None
+            with tracer.span("playwright.click", selector=selector):
+                await app_state.page.click(selector, timeout=arguments.get("timeout_ms", 5000))
+            waited = await _wait_after_action(arguments.get("wait_until"))
 
             if app_state.recording:
                 app_state.timeline.append({
                     "action": "click",
                     "selector": selector,
+                    "wait_until": arguments.get("wait_until"),
                     "timestamp": datetime.now().isoformat(),
-                    "page_url": app_state.page.url
+                    "page_url": app_state.page.url,
+                    "dom_snapshot": dom
                 })
 
             return [types.TextContent(
                 type="text",
-                text=f"Clicked on {selector}"
+                text=f"Clicked on {selector}{waited}"
             )]
 
         elif name == "fill":
             selector = arguments["selector"]
             text = arguments["text"]
-            await app_state.page.fill(selector, text, timeout=5000)
+            dom = await _archive_page("pre_action") if app_state.recording else None
+            with tracer.span("playwright.fill", selector=selector):
+                await app_state.page.fill(selector, text, timeout=5000)
 
             if app_state.recording:
                 app_state.timeline.append({
@@ -161,7 +429,8 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
                     "selector": selector,
                     "text": text,
                     "timestamp": datetime.now().isoformat(),
-                    "page_url": app_state.page.url
+                    "page_url": app_state.page.url,
+                    "dom_snapshot": dom
                 })
 
             return [types.TextContent(
@@ -169,14 +438,129 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
                 text=f"Filled {selector} with text"
             )]
 
+        elif name == "wait_for":
+            with tracer.span("playwright.wait_for"):
+                report = await wait_for_condition(app_state.page, arguments)
+
+            return [types.TextContent(
+                type="text",
+                text=f"Condition met in {report['waited_ms']} ms: {', '.join(report['checked'])}"
+            )]
+
+        elif name == "save_auth_state":
+            state = await app_state.context.storage_state()
+            check = None
+            if arguments.get("check_url"):
+                check = {"url": arguments["check_url"], "logged_in": arguments.get("logged_in")}
+            meta = await asyncio.to_thread(auth_states.save, arguments["name"], state,
+                                           arguments.get("ttl_seconds"), check)
+
+            return [types.TextContent(
+                type="text",
+                text=f"Auth state '{meta['name']}' saved: {meta['cookies']} cookies, "
+                     f"{len(meta['origins'])} origins"
+            )]
+
+        elif name == "load_auth_state":
+            return [types.TextContent(
+                type="text",
+                text=await _load_auth_state(arguments["name"])
+            )]
+
+        elif name == "list_auth_states":
+            import json
+            states = await asyncio.to_thread(auth_states.list)
+
+            return [types.TextContent(
+                type="text",
+                text=json.dumps(states, ensure_ascii=False)
+            )]
+
+        elif name == "invalidate_auth_state":
+            removed = await asyncio.to_thread(auth_states.invalidate, arguments["name"])
+
+            return [types.TextContent(
+                type="text",
+                text=f"Auth state '{arguments['name']}' " + ("removed" if removed else "not found")
+            )]
+
+        elif name == "open_tab":
+            with tracer.span("playwright.new_page"):
+                page = await app_state.context.new_page()
+            tab_id = _register_tab(page)
+            if arguments.get("activate", True):
+                _activate_tab(tab_id)
+            if arguments.get("url"):
+                with tracer.span("playwright.goto", url=arguments["url"]):
+                    await page.goto(arguments["url"], wait_until="domcontentloaded")
+
+            return [types.TextContent(
+                type="text",
+                text=f"Opened tab {tab_id}" + (f" at {page.url}" if arguments.get("url") else "")
+            )]
+
+        elif name == "list_tabs":
+            import json
+            tabs = [{"tab_id": tab_id, "url": page.url, "title": await page.title(),
+                     "active": tab_id == app_state.active_tab}
+                    for tab_id, page in list(app_state.tabs.items())]
+
+            return [types.TextContent(
+                type="text",
+                text=json.dumps(tabs, ensure_ascii=False)
+            )]
+
+        elif name == "switch_tab":
+            page = _activate_tab(arguments["tab_id"])
+            await page.bring_to_front()
+
+            return [types.TextContent(
+                type="text",
+                text=f"Switched to {arguments['tab_id']} ({page.url})"
+            )]
+
+        elif name == "close_tab":
+            tab_id = arguments["tab_id"]
+            if tab_id not in app_state.tabs:
+                raise ValueError(f"Unknown tab: {tab_id}")
+            page = app_state.tabs[tab_id]
+            _forget_tab(page)
+            await page.close()
+
+            return [types.TextContent(
+                type="text",
+                text=f"Closed {tab_id}; active tab: {app_state.active_tab or 'none'}"
+            )]
+
+        elif name == "navigate_many":
+            import json
+            urls = arguments["urls"]
+            keep = arguments.get("keep_tabs", False)
+            with tracer.span("navigate_many", urls=len(urls)):
+                digests, pages = await navigate_many(
+                    app_state.context, urls,
+                    parallelism=arguments.get("parallelism") or TAB_PARALLELISM,
+                    load_state=arguments.get("load_state", "domcontentloaded"),
+                    timeout_ms=arguments.get("timeout_ms", 30000),
+                    keep_open=keep)
+            for digest, page in zip(digests, pages):
+                if page is not None:
+                    digest["tab_id"] = _register_tab(page)
+
+            return [types.TextContent(
+                type="text",
+                text=json.dumps(digests, ensure_ascii=False)
+            )]
+
         elif name == "start_recording":
             app_state.recording = True
             app_state.timeline = []
+            app_state.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
             logger.info("Recording started")
 
             return [types.TextContent(
                 type="text",
-                text="Recording started"
+                text=f"Recording started (run {app_state.run_id})"
             )]
 
         elif name == "stop_recording":
@@ -198,7 +582,10 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
             )]
 
         elif name == "read_page":
-            content = await app_state.page.content()
+            with tracer.span("playwright.content"):
+                content = await app_state.page.content()
+            # В архив — полный документ, клиенту — обрезанный
+            await _archive_page("read_page", content)
             # Ограничиваем размер
             if len(content) > 50000:
                 content = content[:50000] + "\n... [truncated]"
@@ -213,47 +600,247 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
 
     except Exception as e:
         logger.error(f"Error in tool {name}: {e}", exc_info=True)
-        return [types.TextContent(
-            type="text",
-            text=f"Error: {str(e)}"
-        )]
+        metrics.TOOL_ERRORS.labels(tool=name if name in TOOL_NAMES else "unknown").inc()
+        return _error_result(e)
+
+async def _archive_page(kind: str, content: Optional[str] = None) -> Optional[str]:
+    """Сохранить снимок текущей страницы в архив; digest или None, если архив выключен"""
+    if snapshot_archive is None:
+        return None
+    if content is None:
+        with tracer.span("playwright.content", snapshot=kind):
+            content = await app_state.page.content()
+    step = len(app_state.timeline) if app_state.recording else None
+    return await asyncio.to_thread(snapshot_archive.put, content, app_state.run_id,
+                                   step, app_state.page.url, kind)
+
+async def _wait_after_action(condition: Optional[Dict]) -> str:
+    """Дождаться условия после действия; суффикс для текста результата"""
+    if not condition or not any(v for k, v in condition.items() if k != "timeout_ms"):
+        return ""
+    with tracer.span("playwright.wait_for"):
+        report = await wait_for_condition(app_state.page, condition)
+    return f" (ready in {report['waited_ms']} ms)"
+
+async def _load_auth_state(name: str) -> str:
+    """Заменить текущий контекст контекстом из снимка
+
+    Если при сохранении указана проверка входа и она не прошла, снимок
+    считается устаревшим и удаляется.
+    """
+    snapshot = await asyncio.to_thread(auth_states.load, name)
+    if snapshot is None:
+        raise ValueError(f"Auth state '{name}' not found or expired")
+
+    with tracer.span("playwright.new_context", auth_state=name):
+        context = await _new_context(storage_state=snapshot["state"])
+        page = await context.new_page()
+
+    # Проверка до замены: при выходе из аккаунта прежний контекст остаётся рабочим
+    check = snapshot["meta"].get("check")
+    if check:
+        # Без явного условия признак выхода — редирект со страницы проверки (на логин)
+        condition = check.get("logged_in") or {"url": check["url"]}
+        try:
+            await page.goto(check["url"], wait_until="domcontentloaded")
+        except Exception:
+            await context.close()
+            raise
+        try:
+            await wait_for_condition(page, condition, default_timeout_ms=5000)
+        except Exception as e:
+            await context.close()
+            await asyncio.to_thread(auth_states.invalidate, name)
+            raise ValueError(f"Auth state '{name}' is logged out and was invalidated: {e}")
+
+    old_context = app_state.context
+    for old_page in list(app_state.tabs.values()):
+        _forget_tab(old_page)
+    app_state.context = context
+    _activate_tab(_register_tab(page))
+    if old_context:
+        await old_context.close()
+
+    if not check:
+        return f"Auth state '{name}' loaded"
+    return f"Auth state '{name}' loaded and verified at {page.url}"
+
+async def _new_context(storage_state: Optional[Dict] = None) -> "BrowserContext":
+    """Новый контекст браузера с сетевой политикой"""
+    context = await app_state.browser.new_context(
+        viewport={"width": 1920, "height": 1080},
+        storage_state=storage_state
+    )
+    await network_policy.install(context)
+    return context
+
+def _register_tab(page: "Page", tab_id: Optional[str] = None) -> str:
+    """Идентификатор вкладки (новый, если вкладка ещё не известна)
+
+    Явный ``tab_id`` (восстановление после перезапуска) заменяет тот, под
+    которым вкладка уже успела попасть в список.
+    """
+    for known_id, known in list(app_state.tabs.items()):
+        if known is page:
+            if tab_id is None or tab_id == known_id:
+                return known_id
+            del app_state.tabs[known_id]
+            reclaimer.forget(known_id)
+            app_state.tabs[tab_id] = page
+            reclaimer.touch(tab_id)
+            if app_state.page is page:
+                app_state.active_tab = tab_id
+            return tab_id
+    if tab_id is None:
+        app_state.tab_seq += 1
+        tab_id = f"tab{app_state.tab_seq}"
+    app_state.tabs[tab_id] = page
+    page.on("close", _forget_tab)
+    # Вкладки, открытые самой страницей (target=_blank, window.open). Событие
+    # контекста "page" не подходит: оно приходит и для вкладок, открытых сервером
+    page.on("popup", _register_tab)
+    reclaimer.touch(tab_id)
+    return tab_id
+
+def _activate_tab(tab_id: str) -> "Page":
+    """Сделать вкладку активной: на неё действуют navigate, click, fill..."""
+    if tab_id not in app_state.tabs:
+        raise ValueError(f"Unknown tab: {tab_id}")
+    app_state.active_tab = tab_id
+    app_state.page = app_state.tabs[tab_id]
+    return app_state.page
+
+def _forget_tab(page: "Page"):
+    """Убрать закрытую вкладку; активной становится последняя открытая"""
+    for tab_id, known in list(app_state.tabs.items()):
+        if known is page:
+            del app_state.tabs[tab_id]
+            reclaimer.forget(tab_id)
+    if app_state.page is page:
+        app_state.active_tab, app_state.page = None, None
+        if app_state.tabs:
+            _activate_tab(next(reversed(app_state.tabs)))
 
 async def init_browser():
-    """Инициализация браузера"""
-    if app_state.browser:
+    """Инициализация браузера и активной вкладки"""
+    async with _browser_lock:
+        await _start_browser()
+
+async def _start_browser():
+    """Запустить браузер, восстановив сохранённую сессию (вызывать под _browser_lock)"""
+    if not app_state.browser:
+        from playwright.async_api import async_playwright
+
+        logger.info("Initializing browser...")
+        if not app_state.playwright:
+            app_state.playwright = await async_playwright().start()
+        app_state.browser = await app_state.playwright.chromium.launch(
+            headless=os.getenv("HEADLESS", "false").lower() == "true",
+            slow_mo=int(os.getenv("SLOW_MO", 50))
+        )
+        preserved, app_state.preserved = app_state.preserved, None
+        if preserved:
+            app_state.context = await _new_context(storage_state=preserved["state"])
+            await _restore_tabs(preserved["tabs"], preserved["active"])
+        else:
+            app_state.context = await _new_context()
+        logger.info("Browser initialized")
+    if not app_state.page:
+        _activate_tab(_register_tab(await app_state.context.new_page()))
+
+async def _restore_tabs(tabs: Dict[str, str], active: Optional[str]):
+    """Открыть вкладки с прежними идентификаторами и адресами"""
+    for tab_id, url in tabs.items():
+        page = await app_state.context.new_page()
+        _register_tab(page, tab_id)
+        if url and url != "about:blank":
+            try:
+                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            except Exception as e:
+                logger.warning(f"Tab {tab_id} not restored at {url}: {e}")
+    if active in app_state.tabs:
+        _activate_tab(active)
+
+async def _stop_browser():
+    """Закрыть браузер, сохранив cookies, localStorage и вкладки (вызывать под _browser_lock)"""
+    try:
+        state = await app_state.context.storage_state() if app_state.context else None
+    except Exception as e:
+        logger.warning(f"Storage state not saved: {e}")
+        state = None
+    if state is not None:
+        app_state.preserved = {
+            "state": state,
+            "tabs": {tab_id: page.url for tab_id, page in app_state.tabs.items()},
+            "active": app_state.active_tab,
+        }
+    app_state.tabs, app_state.active_tab, app_state.page = {}, None, None
+    browser, app_state.browser, app_state.context = app_state.browser, None, None
+    if browser:
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.warning(f"Browser close failed: {e}")
+
+async def _reclaim_once():
+    """Одна проверка: перезапуск по RSS, закрытие простаивающего браузера или вкладок"""
+    if not app_state.browser or admission.running:
         return
+    rss = await asyncio.to_thread(browser_rss_bytes)
+    async with _browser_lock:
+        # Пока держим блокировку, новые вызовы ждут в init_browser
+        if not app_state.browser or admission.running:
+            return
+        if reclaimer.over_limit(rss):
+            logger.warning(f"Browser RSS {rss} bytes over limit, recycling")
+            await _stop_browser()
+            await _start_browser()
+            reclaimer.record("recycled", reason="rss", rss_bytes=rss)
+            metrics.BROWSER_RECYCLES.labels(reason="rss").inc()
+        elif reclaimer.browser_idle() and not app_state.recording:
+            logger.info("Browser idle, closing")
+            await _stop_browser()
+            reclaimer.record("browser_closed", reason="idle", rss_bytes=rss)
+            metrics.BROWSER_RECYCLES.labels(reason="idle").inc()
+        else:
+            for tab_id in reclaimer.idle_tabs(list(app_state.tabs), app_state.active_tab):
+                page = app_state.tabs[tab_id]
+                _forget_tab(page)
+                await page.close()
+                reclaimer.record("tabs_closed", tab_id=tab_id)
 
-    logger.info("Initializing browser...")
-    app_state.playwright = await async_playwright().start()
-    app_state.browser = await app_state.playwright.chromium.launch(
-        headless=False,
-        slow_mo=50
-    )
-    app_state.context = await app_state.browser.new_context(
-        viewport={"width": 1920, "height": 1080}
-    )
-    app_state.page = await app_state.context.new_page()
-    logger.info("Browser initialized")
+async def _reclaim_loop():
+    while True:
+        await asyncio.sleep(reclaimer.policy.interval_s)
+        try:
+            await _reclaim_once()
+        except Exception as e:
+            logger.warning(f"Reclaim check failed: {e}")
 
 # Starlette приложение
 # Создаем транспорт один раз
-sse = SseServerTransport("/messages")
+sse = SseServerTransport("/messages/")
+
+class SSEApp:
+    """ASGI-приложение /sse: send передаётся транспорту напрямую, без Request._send"""
+
+    async def __call__(self, scope, receive, send):
+        metrics.ACTIVE_SESSIONS.inc()
+        try:
+            async with sse.connect_sse(scope, receive, send) as streams:
+                read_stream, write_stream = streams
+
+                await mcp_server.run(
+                    read_stream,
+                    write_stream,
+                    mcp_server.create_initialization_options()
+                )
+        except Exception as e:
+            logger.error(f"SSE error: {e}", exc_info=True)
+            raise
+        finally:
+            metrics.ACTIVE_SESSIONS.dec()
 
-async def handle_sse(scope, receive, send):
-    """SSE эндпоинт - ИСПРАВЛЕНО"""
-    try:
-        # ✅ Используем connect_sse() который является async context manager
-        async with sse.connect_sse(scope, receive, send) as streams:
-            read_stream, write_stream = streams
-            
-            await mcp_server.run(
-                read_stream,
-                write_stream,
-                mcp_server.create_initialization_options()
-            )
-    except Exception as e:
-        logger.error(f"SSE error: {e}", exc_info=True)
-        raise
 async def handle_messages(scope, receive, send):
     """POST сообщения - ИСПРАВЛЕНО"""
     try:
@@ -264,6 +851,17 @@ async def handle_messages(scope, receive, send):
         response = JSONResponse({"error": str(e)}, status_code=500)
         await response(scope, receive, send)
 
+# Streamable HTTP: запрос и ответ в одном POST на /mcp
+streamable_http = StreamableHTTPSessionManager(
+    app=mcp_server,
+    json_response=os.getenv("MCP_JSON_RESPONSE", "false").lower() == "true"
+)
+
+class StreamableHTTPApp:
+    """ASGI-приложение /mcp (Route без редиректа на /mcp/, как было бы у Mount)"""
+
+    async def __call__(self, scope, receive, send):
+        await streamable_http.handle_request(scope, receive, send)
 
 async def health_check(request: Request) -> Response:
     """Health check эндпоинт"""
@@ -271,15 +869,59 @@ async def health_check(request: Request) -> Response:
         "status": "healthy",
         "browser_ready": app_state.browser is not None,
         "recording": app_state.recording,
-        "timeline_steps": len(app_state.timeline)
+        "timeline_steps": len(app_state.timeline),
+        "tabs": len(app_state.tabs),
+        "reclaim": reclaimer.stats(),
+        "loop": loop_monitor.stats() if loop_monitor else None,
+        "network": network_policy.stats.as_dict(),
+        "admission": admission.stats()
     })
 
+async def metrics_endpoint(request: Request) -> Response:
+    """Метрики в формате Prometheus"""
+    if not metrics.metrics_available():
+        return PlainTextResponse("prometheus-client is not installed", status_code=503)
+
+    # Значения состояния снимаются в момент опроса
+    contexts = app_state.browser.contexts if app_state.browser else []
+    metrics.OPEN_CONTEXTS.set(len(contexts))
+    metrics.OPEN_PAGES.set(sum(len(context.pages) for context in contexts))
+    metrics.TIMELINE_STEPS.set(len(app_state.timeline))
+    # Обход /proc — синхронный, выносим из event loop
+    rss = await asyncio.to_thread(browser_rss_bytes) if app_state.browser else 0
+    metrics.BROWSER_RSS.set(rss)
+
+    body, content_type = metrics.render_metrics()
+    return Response(body, media_type=content_type)
+
+async def profile_endpoint(request: Request) -> Response:
+    """Профиль сервера: ?seconds=N или ?calls=N (&top=25&sort=cumulative)"""
+    if not PROFILING_ENABLED:
+        return JSONResponse({"error": "profiling is disabled"}, status_code=404)
+    params = request.query_params
+    try:
+        report = await profiler.run(
+            seconds=float(params["seconds"]) if "seconds" in params else None,
+            calls=int(params["calls"]) if "calls" in params else None,
+            timeout=float(params.get("timeout", 300)),
+            top=int(params.get("top", 25)),
+            sort=params.get("sort", "cumulative"),
+        )
+    except RuntimeError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    logger.info(f"Profile written: {report['file']}")
+    return JSONResponse(report)
+
 # Маршруты
 routes = [
-    Route("/sse", handle_sse, methods=["GET"]),
-    Route("/messages", handle_messages, methods=["POST"]),
-    Route("/messages/", handle_messages, methods=["POST"]),  # С trailing slash
+    Route("/sse", SSEApp(), methods=["GET"]),  # ASGI-приложение, как /messages/ и /mcp
+    Mount("/messages/", app=handle_messages),  # ASGI-приложение, не request-handler
+    Route("/mcp", StreamableHTTPApp(), methods=["GET", "POST", "DELETE"]),
     Route("/health", health_check, methods=["GET"]),
+    Route("/metrics", metrics_endpoint, methods=["GET"]),
+    Route("/debug/profile", profile_endpoint, methods=["GET"]),
 ]
 
 # Создание Starlette app
@@ -288,6 +930,8 @@ starlette_app = Starlette(
     routes=routes
 )
 
+startup_profile.mark("app setup")
+
 # Lifecycle события
 @starlette_app.on_event("startup")
 async def startup():
@@ -295,12 +939,36 @@ async def startup():
     logger.info("MCP Server starting...")
     Path("logs").mkdir(exist_ok=True)
     Path("recorded_tests").mkdir(exist_ok=True)
+    app_state.reclaim_task = asyncio.create_task(_reclaim_loop())
+    if loop_monitor:
+        loop_monitor.start()
+
+@starlette_app.on_event("startup")
+async def start_streamable_http():
+    """Менеджер сессий streamable HTTP живёт, пока работает приложение"""
+    app_state.http_sessions = AsyncExitStack()
+    await app_state.http_sessions.enter_async_context(streamable_http.run())
+
+@starlette_app.on_event("shutdown")
+async def stop_streamable_http():
+    if app_state.http_sessions:
+        await app_state.http_sessions.aclose()
 
 @starlette_app.on_event("shutdown")
 async def shutdown():
     """Остановка сервера"""
     logger.info("MCP Server shutting down...")
+    if app_state.reclaim_task:
+        app_state.reclaim_task.cancel()
+    if loop_monitor:
+        loop_monitor.stop()
+
+    await close_browser()
+    if snapshot_archive:
+        snapshot_archive.close()
 
+async def close_browser():
+    """Закрыть браузер и Playwright"""
     if app_state.page:
         await app_state.page.close()
     if app_state.context:
@@ -309,10 +977,38 @@ async def shutdown():
         await app_state.browser.close()
     if app_state.playwright:
         await app_state.playwright.stop()
+    app_state.page = app_state.context = app_state.browser = app_state.playwright = None
+    app_state.tabs, app_state.active_tab = {}, None
+
+async def run_stdio():
+    """Обслуживать одного клиента через stdin/stdout (логи — в stderr и файл)"""
+    from mcp.server.stdio import stdio_server
+
+    await startup()
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await mcp_server.run(read_stream, write_stream,
+                                 mcp_server.create_initialization_options())
+    finally:
+        await shutdown()
 
 def main():
     """Запуск сервера"""
-    import os
+    if startup_profile.enabled:
+        startup_profile.finish()
+        return
+
+    parser = argparse.ArgumentParser(description="MCP сервер записи действий браузера")
+    parser.add_argument("--transport", choices=("http", "stdio"),
+                        default=os.getenv("MCP_TRANSPORT", "http"),
+                        help="http — SSE (/sse) и streamable HTTP (/mcp); stdio — stdin/stdout")
+    args, _ = parser.parse_known_args()
+    if args.transport == "stdio":
+        asyncio.run(run_stdio())
+        return
+
+    import uvicorn
+
     host = os.getenv("SERVER_HOST", "0.0.0.0")
     port = int(os.getenv("SERVER_PORT", 8000))
 
@@ -1,8 +1,11 @@
 """Адаптивный агент с обучением на ошибках"""
 from typing import Dict, List, Optional
+from src.agents.selector_analyzer import AdaptiveSelectorAnalyzer
 from src.utils.logger import logger
 from src.utils.cache import CacheManager
-from src.utils.retry import async_retry
+from src.tools.errors import tool_error
+from src.utils.retry import CircuitBreaker, Deadline, RetryableError, retry_call
+from src.utils.url_scope import url_scope
 
 class AdaptiveAgent:
     """Агент, который учится на своих ошибках"""
@@ -13,6 +16,10 @@ class AdaptiveAgent:
         self.page_history: List[Dict] = []
         self.cache = CacheManager()
         self.max_history = 100
+        # Бюджет времени на одно действие (все селекторы и повторы)
+        self.action_budget = 30.0
+        # Селекторы, которые раз за разом падают, на время пропускаются
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60.0)
 
     async def initialize(self):
         """Инициализация агента"""
@@ -24,18 +31,28 @@ class AdaptiveAgent:
         action_type = action.get('type', 'unknown')
         target = action.get('target', '')
         value = action.get('value', '')
-
-        # Проверяем кэш
-        memory_key = f"{action_type}:{target}"
-        if memory_key in self.selector_memory:
-            selector = self.selector_memory[memory_key]
+        deadline = Deadline(self.action_budget)
+
+        # Проверяем кэш (в рамках origin и маршрута текущей страницы)
+        page_url = action.get('page_url') or page_analysis.get('page_url', '')
+        memory_key = self.memory_key(action_type, target, page_url)
+        scope = url_scope(page_url)
+        fingerprint = (page_analysis.get('fingerprint')
+                       or AdaptiveSelectorAnalyzer.page_fingerprint(page_analysis))
+
+        entry = await self.cache.fetch_entry(memory_key)
+        if entry and self._is_cached_selector_valid(entry, fingerprint, page_analysis):
+            selector = entry['value']
             logger.info(f"🎯 Использую селектор из памяти: {selector}")
-            result = await self._try_selector(session, action_type, selector, value)
+            result = await self._try_selector(session, action_type, selector, value, deadline,
+                                              scope)
             if result['success']:
                 return result
+            self.cache.delete(memory_key)
+        elif entry:
+            logger.info(f"⏭️ Селектор из памяти не подходит к странице: {entry['value']}")
 
         # Ищем новые селекторы
-        from src.agents.selector_analyzer import AdaptiveSelectorAnalyzer
         selectors = AdaptiveSelectorAnalyzer.find_best_selector_for_action(
             action_type, target, page_analysis
         )
@@ -50,13 +67,16 @@ class AdaptiveAgent:
         # Пробуем селекторы
         for i, selector in enumerate(selectors[:5]):
             logger.info(f"🔄 Попытка {i+1}: {selector}")
-            result = await self._try_selector(session, action_type, selector, value)
+            result = await self._try_selector(session, action_type, selector, value, deadline,
+                                              scope)
 
             if result['success']:
                 self.selector_memory[memory_key] = selector
-                await self.cache.set(memory_key, selector)
-                await self.cache.save()
+                # Запись на диск — в фоне, не задерживает действие
+                self.cache.set(memory_key, selector, fingerprint=fingerprint)
                 return result
+            if deadline.expired:
+                break
 
         return {
             'success': False,
@@ -64,37 +84,74 @@ class AdaptiveAgent:
             'tried_selectors': selectors[:5]
         }
 
-    @async_retry(max_attempts=2, delay=0.5)
-    async def _try_selector(self, session, action_type: str, 
-                           selector: str, value: str = '') -> Dict:
-        """Пробует выполнить действие"""
+    @staticmethod
+    def memory_key(action_type: str, target: str, page_url: str = '') -> str:
+        """Ключ кэша: действие и цель в рамках origin и шаблона маршрута"""
+        scope = url_scope(page_url)
+        key = f"{action_type}:{target}"
+        return f"{scope}|{key}" if scope else key
+
+    @staticmethod
+    def _is_cached_selector_valid(entry: Dict, fingerprint: str,
+                                  page_analysis: Dict) -> bool:
+        """Дешёвая проверка селектора из кэша без обращения к браузеру"""
+        if entry.get('fingerprint') == fingerprint:
+            return True
+        # Структура страницы изменилась: селектор должен найтись в анализе
+        if not page_analysis.get('input_fields') and not page_analysis.get('buttons'):
+            return True  # анализа нет — проверить нечем
+        return AdaptiveSelectorAnalyzer.selector_present(entry['value'], page_analysis)
+
+    async def _try_selector(self, session, action_type: str, selector: str,
+                            value: str = '', deadline: Optional[Deadline] = None,
+                            scope: str = '') -> Dict:
+        """Пробует выполнить действие
+
+        Временные ошибки сервера повторяются с джиттером в пределах
+        дедлайна действия, остальные возвращаются сразу. Размыкатель цепи
+        считает сбои селектора в рамках области страницы (как ключи кэша).
+        """
         try:
-            if action_type == 'fill':
-                result = await session.call_tool("fill", {
-                    "selector": selector,
-                    "text": value
-                })
-            elif action_type == 'click':
-                result = await session.call_tool("click", {
-                    "selector": selector
-                })
-            elif action_type == 'navigate':
-                result = await session.call_tool("navigate", {
-                    "url": value
-                })
-            else:
-                return {'success': False, 'error': f'Неизвестный тип: {action_type}'}
-
-            output = result.content[0].text if result.content else ''
-
-            if "not found" in output.lower() or "error" in output.lower():
-                return {'success': False, 'error': output, 'selector': selector}
-
-            return {'success': True, 'output': output, 'selector': selector}
-
+            return await retry_call(
+                lambda: self._call_selector(session, action_type, selector, value),
+                attempts=2, delay=0.5, deadline=deadline,
+                breaker=self.breaker, key=f"{scope}|{selector}" if scope else selector,
+                retry_on=(RetryableError,)
+            )
         except Exception as e:
+            # RetryableError после всех попыток, CircuitOpen, DeadlineExceeded и сбои транспорта
             return {'success': False, 'error': str(e), 'selector': selector}
 
+    async def _call_selector(self, session, action_type: str,
+                             selector: str, value: str = '') -> Dict:
+        """Один вызов инструмента; RetryableError — если сервер советует повторить"""
+        if action_type == 'fill':
+            result = await session.call_tool("fill", {
+                "selector": selector,
+                "text": value
+            })
+        elif action_type == 'click':
+            result = await session.call_tool("click", {
+                "selector": selector
+            })
+        elif action_type == 'navigate':
+            result = await session.call_tool("navigate", {
+                "url": value
+            })
+        else:
+            return {'success': False, 'error': f'Неизвестный тип: {action_type}'}
+
+        output = result.content[0].text if result.content else ''
+
+        error = tool_error(result)
+        if error and error.get('retryable'):
+            raise RetryableError(output)
+        if error or "not found" in output.lower():
+            return {'success': False, 'error': output, 'selector': selector,
+                    'retryable': False}
+
+        return {'success': True, 'output': output, 'selector': selector}
+
     def learn_from_error(self, error: str, selector: str, page_analysis: Dict):
         """Учится на ошибках"""
         error_pattern = {
@@ -117,5 +174,5 @@ class AdaptiveAgent:
 
     async def cleanup(self):
         """Очистка ресурсов"""
-        await self.cache.save()
+        await self.cache.close()
         logger.info("Агент завершил работу")
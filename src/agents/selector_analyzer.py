@@ -1,16 +1,17 @@
 """Анализатор селекторов страницы"""
+import hashlib
 import re
 from typing import Dict, List
-from bs4 import BeautifulSoup
 from src.utils.logger import logger
 
 class AdaptiveSelectorAnalyzer:
     """Анализирует HTML и находит оптимальные селекторы"""
 
     @staticmethod
-    async def analyze_page_structure(page_text: str) -> Dict:
+    async def analyze_page_structure(page_text: str, page_url: str = '') -> Dict:
         """Анализ структуры страницы"""
         analysis = {
+            'page_url': page_url,
             'input_fields': [],
             'buttons': [],
             'links': [],
@@ -18,6 +19,8 @@ class AdaptiveSelectorAnalyzer:
             'page_stats': {}
         }
 
+        from bs4 import BeautifulSoup  # тяжёлый импорт — только при анализе
+
         try:
             soup = BeautifulSoup(page_text, 'lxml')
         except:
@@ -62,10 +65,36 @@ class AdaptiveSelectorAnalyzer:
             'total_buttons': len(analysis['buttons']),
             'frameworks': list(set(analysis['detected_frameworks']))
         }
+        analysis['fingerprint'] = AdaptiveSelectorAnalyzer.page_fingerprint(analysis)
 
         logger.info(f"Анализ завершен: {analysis['page_stats']}")
         return analysis
 
+    @staticmethod
+    def page_fingerprint(page_analysis: Dict) -> str:
+        """Лёгкий отпечаток структуры страницы
+
+        Строится по набору селекторов полей ввода и кнопок. Ссылки не
+        учитываются, поэтому списки и лента на странице отпечаток не меняют.
+        """
+        parts = set()
+        for field in page_analysis.get('input_fields', []):
+            parts.update(field.get('selector_suggestions', [])[:1])
+        for button in page_analysis.get('buttons', []):
+            if button.get('tag') == 'button':
+                parts.add(button.get('selector', ''))
+        digest = hashlib.sha1('\n'.join(sorted(parts)).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def selector_present(selector: str, page_analysis: Dict) -> bool:
+        """Есть ли селектор среди найденных на странице (без обращения к браузеру)"""
+        for field in page_analysis.get('input_fields', []):
+            if selector in field.get('selector_suggestions', []):
+                return True
+        return any(b.get('selector') == selector
+                   for b in page_analysis.get('buttons', []))
+
     @staticmethod
     def _generate_selectors_from_attrs(attrs: Dict) -> List[str]:
         """Генерирует селекторы из атрибутов"""
@@ -21,10 +21,17 @@ class Settings(BaseSettings):
     redis_port: int = 6379
     redis_db: int = 0
     redis_enabled: bool = False
+    redis_namespace: str = "mcp:selectors"
 
     # Logging
     log_level: str = "INFO"
     log_file: str = "logs/agent.log"
+    log_json: bool = True
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+    log_queue_size: int = 10000
+    log_hot_rate: float = 20.0  # сообщений/с с одного места вызова
+    log_hot_sample: float = 1.0
 
     # Browser Settings
     headless: bool = True
@@ -40,6 +47,15 @@ class Settings(BaseSettings):
     logs_dir: str = "logs"
     cache_dir: str = ".cache"
 
+    # Selector Cache
+    cache_backend: str = "append_log"  # append_log | json | redis
+    cache_flush_interval: float = 2.0
+    cache_flush_batch: int = 100
+    cache_ttl: int = 30 * 24 * 3600  # 0 — без ограничения
+    cache_max_entries: int = 50000
+    cache_compact_ratio: float = 2.0
+    cache_l1_max_entries: int = 5000  # размер L1 перед общим хранилищем
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,21 +1,28 @@
 """MCP клиент для взаимодействия с серверами"""
 import asyncio
-import httpx
-from mcp import ClientSession
-from mcp.client.sse import sse_client
+from typing import TYPE_CHECKING
 from src.config import get_settings
 from src.utils.logger import logger
 
+if TYPE_CHECKING:
+    import httpx
+    from mcp import ClientSession
+
 class MCPClient:
     """Клиент для работы с MCP серверами"""
 
     def __init__(self):
         self.settings = get_settings()
-        self.session: ClientSession = None
-        self.http_client: httpx.AsyncClient = None
+        self.session: "ClientSession" = None
+        self.http_client: "httpx.AsyncClient" = None
 
     async def connect(self, server_url: str):
         """Подключение к MCP серверу"""
+        # MCP и httpx импортируются при первом подключении, а не при запуске
+        import httpx
+        from mcp import ClientSession
+        from mcp.client.sse import sse_client
+
         try:
             self.http_client = httpx.AsyncClient(timeout=30.0)
 
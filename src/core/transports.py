@@ -0,0 +1,76 @@
+"""Подключение к MCP серверу по выбранному транспорту
+
+Цель подключения задаётся одной строкой::
+
+    http://localhost:8000/sse   SSE: GET-поток и отдельный POST на каждое сообщение
+    http://localhost:8000/mcp   streamable HTTP: запрос и ответ в одном POST
+    stdio                       server.py дочерним процессом через stdin/stdout
+    inprocess                   сервер в том же процессе, без сети
+"""
+import asyncio
+import os
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    from mcp import ClientSession
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+TRANSPORTS = ("sse", "http", "stdio", "inprocess")
+
+def transport_of(target: str) -> str:
+    """Транспорт по цели подключения"""
+    if target in ("stdio", "inprocess"):
+        return target
+    if urlparse(target).scheme not in ("http", "https"):
+        raise ValueError(f"Unknown MCP target: {target}")
+    return "sse" if urlparse(target).path.rstrip("/").endswith("/sse") else "http"
+
+@asynccontextmanager
+async def open_session(target: str, timeout: float = 10.0) -> AsyncIterator["ClientSession"]:
+    """Инициализированная MCP-сессия с сервером"""
+    from mcp import ClientSession
+
+    transport = transport_of(target)
+    if transport == "inprocess":
+        async with _in_process_session() as session:
+            yield session
+        return
+
+    async with AsyncExitStack() as stack:
+        if transport == "sse":
+            from mcp.client.sse import sse_client
+            read, write = await stack.enter_async_context(sse_client(target))
+        elif transport == "http":
+            from mcp.client.streamable_http import streamablehttp_client
+            read, write, _ = await stack.enter_async_context(streamablehttp_client(target))
+        else:
+            from mcp.client.stdio import StdioServerParameters, stdio_client
+            params = StdioServerParameters(
+                command=sys.executable,
+                args=[str(ROOT / "server.py"), "--transport", "stdio"],
+                env=dict(os.environ),
+                cwd=ROOT,
+            )
+            read, write = await stack.enter_async_context(stdio_client(params))
+        session = await stack.enter_async_context(ClientSession(read, write))
+        await asyncio.wait_for(session.initialize(), timeout=timeout)
+        yield session
+
+@asynccontextmanager
+async def _in_process_session() -> AsyncIterator["ClientSession"]:
+    """Сессия с сервером из server.py в текущем процессе"""
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    import server
+
+    try:
+        async with create_connected_server_and_client_session(server.mcp_server) as session:
+            yield session
+    finally:
+        await server.close_browser()
@@ -1,22 +1,42 @@
 """Главная точка входа приложения"""
 import asyncio
-from src.agents.adaptive_agent import AdaptiveAgent
-from src.agents.selector_analyzer import AdaptiveSelectorAnalyzer
-from src.core.mcp_client import MCPClient
-from src.config import get_settings
-from src.utils.logger import logger
+
+from src.utils.startup_profile import StartupProfile
+
+# Профиль включается до тяжёлых импортов, чтобы учесть и их
+startup_profile = StartupProfile.from_argv()
 
 async def main():
     """Главная функция"""
+    # Тяжёлые модули загружаются при запуске агента, а не при импорте
+    from src.agents.adaptive_agent import AdaptiveAgent
+    from src.core.mcp_client import MCPClient
+    from src.config import get_settings
+    from src.utils.logger import logger
+    from src.utils.loop_monitor import LoopMonitor
+    startup_profile.mark("imports")
+
     settings = get_settings()
+    startup_profile.mark("settings")
     logger.info("🚀 Запуск MCP Agent...")
+    startup_profile.mark("logging")
 
     # Инициализация
     agent = AdaptiveAgent()
     await agent.initialize()
+    startup_profile.mark("agent.initialize")
 
     mcp_client = MCPClient()
 
+    if startup_profile.enabled:
+        startup_profile.finish()
+        await agent.cleanup()
+        return
+
+    monitor = LoopMonitor.from_env()
+    if monitor:
+        monitor.start()
+
     try:
         # Ваша логика здесь
         logger.info("Агент готов к работе")
@@ -32,6 +52,9 @@ async def main():
     finally:
         await agent.cleanup()
         await mcp_client.disconnect()
+        if monitor:
+            monitor.stop()
+            logger.info(monitor.report())
         logger.info("Завершение работы")
 
 if __name__ == "__main__":
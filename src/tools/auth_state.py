@@ -0,0 +1,77 @@
+"""Именованные снимки авторизованного состояния браузера
+
+Снимок — результат ``context.storage_state()`` (cookies и localStorage)
+плюс метаданные: время сохранения, срок годности и необязательная проверка
+входа (условие для ``wait_for_condition``), по которой устаревший снимок
+распознаётся и удаляется. Методы синхронные — вызывать через
+``asyncio.to_thread``.
+"""
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_NAME_RE = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+class AuthStateStore:
+    """Хранилище снимков в каталоге ``<directory>/<name>.json``"""
+
+    def __init__(self, directory: Path, default_ttl: int = 8 * 3600):
+        self.directory = Path(directory)
+        self.default_ttl = default_ttl
+
+    def _path(self, name: str) -> Path:
+        if not _NAME_RE.match(name):
+            raise ValueError(f"Invalid snapshot name: {name!r}")
+        return self.directory / f"{name}.json"
+
+    def save(self, name: str, storage_state: Dict, ttl: Optional[int] = None,
+             check: Optional[Dict] = None) -> Dict:
+        """Сохранить снимок; возвращает метаданные"""
+        path = self._path(name)
+        saved_at = time.time()
+        meta = {
+            "name": name,
+            "saved_at": saved_at,
+            "expires_at": saved_at + (ttl or self.default_ttl),
+            "check": check,
+            "cookies": len(storage_state.get("cookies", [])),
+            "origins": [o.get("origin") for o in storage_state.get("origins", [])],
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"meta": meta, "state": storage_state}, ensure_ascii=False),
+                       encoding="utf-8")
+        os.replace(tmp, path)
+        return meta
+
+    def load(self, name: str) -> Optional[Dict]:
+        """Снимок ``{"meta", "state"}`` или None, если его нет или он истёк"""
+        path = self._path(name)
+        try:
+            snapshot = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() > snapshot["meta"]["expires_at"]:
+            self.invalidate(name)
+            return None
+        return snapshot
+
+    def invalidate(self, name: str) -> bool:
+        """Удалить снимок (например, сессия оказалась разлогинена)"""
+        try:
+            self._path(name).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list(self) -> List[Dict]:
+        """Метаданные действующих снимков"""
+        result = []
+        for path in sorted(self.directory.glob("*.json")):
+            snapshot = self.load(path.stem)
+            if snapshot:
+                result.append(snapshot["meta"])
+        return result
@@ -0,0 +1,57 @@
+"""Структурированные ошибки инструментов
+
+Сервер возвращает ошибку как ``CallToolResult`` с ``isError=True`` и
+описанием в ``_meta["error"]``: тип исключения и признак ``retryable``.
+Клиенты по нему решают, повторять вызов или сразу сдаваться.
+"""
+from typing import Dict, Optional
+
+from src.utils.admission import Busy
+from src.tools.waiting import WaitTimeout
+
+# Сбои окружения, которые обычно проходят при повторе
+RETRYABLE_MARKERS = (
+    "Target closed", "has been closed", "Execution context was destroyed",
+    "net::ERR_CONNECTION", "net::ERR_NETWORK_CHANGED", "net::ERR_TIMED_OUT",
+    "Navigation failed because page crashed",
+)
+# Таймаут ожидания элемента: селектор не тот, повтор его не найдёт
+ELEMENT_WAIT_MARKERS = (
+    "waiting for locator", "waiting for selector", "waiting for get_by",
+    "waiting for element", "while waiting for selector=", "while waiting for predicate",
+)
+# Ошибки в самом запросе: повтор их не исправит
+FATAL_MARKERS = (
+    "Executable doesn't exist", "is not a valid selector", "Unexpected token",
+    "net::ERR_NAME_NOT_RESOLVED", "net::ERR_INVALID_URL", "Cannot navigate to invalid URL",
+)
+
+def classify_error(error: BaseException) -> Dict:
+    """Тип ошибки и можно ли повторить вызов"""
+    message = str(error)
+    if isinstance(error, Busy):
+        retryable = True
+    elif isinstance(error, (WaitTimeout, TimeoutError)) or type(error).__name__ == "TimeoutError":
+        # Повторяем таймауты навигации и загрузки, но не поиска элемента
+        retryable = not any(marker in message for marker in ELEMENT_WAIT_MARKERS)
+    elif any(marker in message for marker in FATAL_MARKERS):
+        retryable = False
+    elif isinstance(error, (KeyError, ValueError, TypeError)):
+        retryable = False  # неверные аргументы или неизвестный инструмент
+    else:
+        retryable = any(marker in message for marker in RETRYABLE_MARKERS)
+    return {"type": type(error).__name__, "retryable": retryable}
+
+def tool_error(result) -> Optional[Dict]:
+    """Описание ошибки из результата вызова (None — вызов успешен)
+
+    Понимает и старый формат ответа — текст, начинающийся с ``Error:``.
+    """
+    meta = getattr(result, "meta", None) or {}
+    if getattr(result, "isError", False):
+        return meta.get("error") or {"type": "Error", "retryable": False}
+    content = getattr(result, "content", None) or []
+    text = getattr(content[0], "text", "") if content else ""
+    if text.startswith("Error:"):
+        return {"type": "Error", "retryable": False}
+    return None
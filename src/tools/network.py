@@ -0,0 +1,247 @@
+"""Фильтрация сетевых запросов и общий дисковый кэш статики
+
+Политика ставится на контекст браузера через ``context.route``: запросы
+ненужных типов (картинки, шрифты, медиа) и к трекерам/рекламе обрываются,
+а статика (скрипты, стили) отдаётся из кэша на диске, общего для всех
+контекстов и процессов. Настройка — переменными окружения (см. ``from_env``).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils import metrics
+from src.utils.logger import logger
+
+# Заголовки, которые нельзя отдавать с уже распакованным телом
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+DEFAULT_BLOCK_PATTERNS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "mc.yandex.ru", "an.yandex.ru", "connect.facebook.net", "hotjar.com",
+)
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+@dataclass
+class NetworkStats:
+    """Счётчики работы политики"""
+    blocked: int = 0
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cache_stores: int = 0
+    cache_bytes_served: int = 0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+class AssetCache:
+    """Кэш ответов на диске: ``<sha256(url)>.body`` + ``.json`` с метаданными
+
+    Файлы пишутся атомарно (временный файл + rename), поэтому кэш можно
+    использовать из нескольких процессов одновременно. Методы синхронные —
+    вызывать через ``asyncio.to_thread``. Истёкшие записи удаляются при
+    чтении и при чистке, которая раз в ``prune_every`` записей ещё и
+    ограничивает размер каталога ``max_bytes`` (0 — без ограничения).
+    """
+
+    def __init__(self, directory: Path, default_ttl: int = 86400, max_bytes: int = 0,
+                 prune_every: int = 200):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._puts = 0
+        self._prune_lock = threading.Lock()
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = self.directory / digest[:2] / digest
+        return base.with_suffix(".json"), base.with_suffix(".body")
+
+    def get(self, url: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta["url"] != url:
+                return None
+            if time.time() > meta["expires"]:
+                self._remove(meta_path, body_path)
+                return None
+            return meta["status"], meta["headers"], body_path.read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        cache_control = headers.get("cache-control", "").lower()
+        if status != 200 or "no-store" in cache_control or "private" in cache_control:
+            return False
+        match = _MAX_AGE_RE.search(cache_control)
+        ttl = int(match.group(1)) if match else self.default_ttl
+        if ttl <= 0:
+            return False
+
+        meta_path, body_path = self._paths(url)
+        meta_path.parent.mkdir(exist_ok=True)
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _HOP_HEADERS},
+            "expires": time.time() + ttl,
+        }
+        for path, data in ((body_path, body),
+                           (meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))):
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+        self._puts += 1
+        if self.prune_every and self._puts % self.prune_every == 0:
+            self.prune()
+        return True
+
+    def prune(self) -> int:
+        """Удалить истёкшие записи и самые старые сверх ``max_bytes``; сколько удалено"""
+        if not self._prune_lock.acquire(blocking=False):
+            return 0  # чистка уже идёт в другом потоке
+        try:
+            now, removed, entries, total = time.time(), 0, [], 0
+            for meta_path in self.directory.glob("*/*.json"):
+                body_path = meta_path.with_suffix(".body")
+                try:
+                    expires = json.loads(meta_path.read_text(encoding="utf-8"))["expires"]
+                    size = meta_path.stat().st_size + body_path.stat().st_size
+                    mtime = body_path.stat().st_mtime
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+                if now > expires:
+                    removed += self._remove(meta_path, body_path)
+                else:
+                    entries.append((mtime, size, meta_path, body_path))
+                    total += size
+            if self.max_bytes > 0 and total > self.max_bytes:
+                for _, size, meta_path, body_path in sorted(entries, key=lambda e: e[0]):
+                    removed += self._remove(meta_path, body_path)
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            return removed
+        finally:
+            self._prune_lock.release()
+
+    @staticmethod
+    def _remove(meta_path: Path, body_path: Path) -> int:
+        # Сначала метаданные: без них запись уже не читается
+        for path in (meta_path, body_path):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        return 1
+
+class ResourcePolicy:
+    """Блокировка запросов и кэширование статики для контекста браузера"""
+
+    def __init__(self, block_types: Iterable[str] = (), block_patterns: Iterable[str] = (),
+                 cache: Optional[AssetCache] = None,
+                 cache_types: Iterable[str] = ("script", "stylesheet", "font", "image")):
+        self.block_types = set(block_types)
+        self.block_patterns = [re.compile(p) for p in block_patterns]
+        self.cache = cache
+        self.cache_types = set(cache_types)
+        self.stats = NetworkStats()
+
+    @classmethod
+    def from_env(cls) -> "ResourcePolicy":
+        """Политика из окружения
+
+        BLOCK_RESOURCE_TYPES — типы запросов Playwright (image,font,media,...);
+        BLOCK_URL_PATTERNS — регулярные выражения по URL, ``default`` —
+        встроенный список трекеров; ASSET_CACHE_DIR — включает кэш статики;
+        ASSET_CACHE_TYPES, ASSET_CACHE_TTL — что и сколько кэшировать;
+        ASSET_CACHE_MAX_MB — предел размера каталога кэша (0 — без предела).
+        """
+        patterns = []
+        for item in _split(os.getenv("BLOCK_URL_PATTERNS")):
+            if item == "default":
+                patterns.extend(re.escape(p) for p in DEFAULT_BLOCK_PATTERNS)
+            else:
+                patterns.append(item)
+
+        cache = None
+        cache_dir = os.getenv("ASSET_CACHE_DIR")
+        if cache_dir:
+            cache = AssetCache(Path(cache_dir), int(os.getenv("ASSET_CACHE_TTL", 86400)),
+                               max_bytes=int(os.getenv("ASSET_CACHE_MAX_MB", 512)) * 1024 * 1024)
+        return cls(
+            block_types=_split(os.getenv("BLOCK_RESOURCE_TYPES")),
+            block_patterns=patterns,
+            cache=cache,
+            cache_types=_split(os.getenv("ASSET_CACHE_TYPES", "script,stylesheet,font,image")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.block_types or self.block_patterns or self.cache)
+
+    async def install(self, context):
+        """Подключить политику к контексту (без политики маршрутизация не ставится)"""
+        if self.enabled:
+            await context.route("**/*", self.handle)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        return (resource_type in self.block_types
+                or any(p.search(url) for p in self.block_patterns))
+
+    async def handle(self, route, request):
+        """Обработчик маршрута Playwright"""
+        resource_type, url = request.resource_type, request.url
+        if self.should_block(resource_type, url):
+            self.stats.blocked += 1
+            metrics.REQUESTS_BLOCKED.inc()
+            self.stats.blocked_by_type[resource_type] = \
+                self.stats.blocked_by_type.get(resource_type, 0) + 1
+            await route.abort("blockedbyclient")
+            return
+
+        if (self.cache is None or request.method != "GET"
+                or resource_type not in self.cache_types):
+            await route.continue_()
+            return
+
+        cached = await asyncio.to_thread(self.cache.get, url)
+        if cached:
+            status, headers, body = cached
+            self.stats.cache_hits += 1
+            metrics.ASSET_CACHE.labels(result="hit").inc()
+            self.stats.cache_bytes_served += len(body)
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+
+        self.stats.cache_misses += 1
+        metrics.ASSET_CACHE.labels(result="miss").inc()
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            # Сетевую ошибку пусть обработает сам браузер
+            await route.continue_()
+            return
+        try:
+            if await asyncio.to_thread(self.cache.put, url, response.status,
+                                       response.headers, body):
+                self.stats.cache_stores += 1
+        except Exception as e:
+            # Ошибка кэша не должна оставлять запрос браузера без ответа
+            logger.warning(f"Asset cache write failed for {url}: {e}")
+        await route.fulfill(response=response, body=body)
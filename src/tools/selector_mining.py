@@ -0,0 +1,179 @@
+"""Офлайн-сбор селекторов по сохранённым HTML-страницам
+
+Анализатор прогоняется по каталогу снимков в пуле процессов, селекторы
+агрегируются по области URL (origin + шаблон маршрута), действию и метке
+цели и записываются в кэш селекторов — агенты стартуют «тёплыми»::
+
+    python -m src.tools.selector_mining snapshots/ --workers 8 --min-support 2
+
+URL снимка берётся из файла ``<снимок>.json`` (поле ``url``), комментария
+``<!-- saved from url=... -->`` или ``<link rel="canonical">``.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.agents.selector_analyzer import AdaptiveSelectorAnalyzer
+from src.utils.url_scope import url_scope
+
+_SAVED_FROM_RE = re.compile(r'<!--\s*saved from url=\(\d+\)(\S+?)\s*-->', re.IGNORECASE)
+_CANONICAL_RE = re.compile(
+    r'<link[^>]+rel=["\']canonical["\'][^>]*href=["\']([^"\']+)["\']', re.IGNORECASE)
+# Атрибуты, по значениям которых агент обычно называет поле
+LABEL_ATTRS = ('name', 'id', 'placeholder', 'aria-label', 'formcontrolname', 'data-testid')
+MAX_LABEL_LENGTH = 40
+
+# (область, действие, метка, селектор)
+Candidate = Tuple[str, str, str, str]
+
+def snapshot_url(path: Path, html: str) -> Optional[str]:
+    """URL, с которого сохранена страница"""
+    sidecar = path.with_suffix('.json')
+    if sidecar.exists():
+        try:
+            url = json.loads(sidecar.read_text(encoding='utf-8')).get('url')
+            if url:
+                return url
+        except (OSError, ValueError, AttributeError):
+            pass
+    head = html[:20000]
+    match = _SAVED_FROM_RE.search(head) or _CANONICAL_RE.search(head)
+    return match.group(1) if match else None
+
+def candidates_from_analysis(analysis: Dict, scope: str) -> List[Candidate]:
+    """Пары «метка → селектор» из анализа одной страницы"""
+    found = set()
+    for field in analysis.get('input_fields', []):
+        suggestions = field.get('selector_suggestions') or []
+        if not suggestions:
+            continue
+        attrs = field.get('attributes', {})
+        for attr in LABEL_ATTRS:
+            label = attrs.get(attr)
+            if isinstance(label, str) and 0 < len(label.strip()) <= MAX_LABEL_LENGTH:
+                found.add((scope, 'fill', label.strip(), suggestions[0]))
+    for button in analysis.get('buttons', []):
+        label = button.get('text') or ''
+        if 0 < len(label.strip()) <= MAX_LABEL_LENGTH:
+            found.add((scope, 'click', label.strip(), button['selector']))
+    return sorted(found)
+
+def mine_file(path: str) -> Tuple[Optional[str], List[Candidate]]:
+    """Разобрать один снимок (выполняется в процессе пула)"""
+    file = Path(path)
+    try:
+        html = file.read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        return None, []
+    url = snapshot_url(file, html)
+    scope = url_scope(url or '')
+    if not scope:
+        return None, []
+    analysis = asyncio.run(AdaptiveSelectorAnalyzer.analyze_page_structure(html, url))
+    return scope, candidates_from_analysis(analysis, scope)
+
+def _quiet_worker():
+    # Лог анализатора на каждую страницу в пуле не нужен
+    logging.disable(logging.INFO)
+
+def aggregate(results: Iterable[Tuple[Optional[str], List[Candidate]]],
+              min_support: int = 2, min_ratio: float = 0.6) -> Dict[str, Dict]:
+    """Устойчивые селекторы: ключ кэша -> запись
+
+    Селектор принимается, если встретился для метки хотя бы на
+    ``min_support`` страницах области и составляет не меньше ``min_ratio``
+    всех селекторов этой метки.
+    """
+    pages: Counter = Counter()
+    votes: Dict[Tuple[str, str, str], Counter] = defaultdict(Counter)
+    for scope, candidates in results:
+        if scope is None:
+            continue
+        pages[scope] += 1
+        for scope_, action, label, selector in candidates:
+            votes[(scope_, action, label)][selector] += 1
+
+    now = time.time()
+    entries = {}
+    for (scope, action, label), counter in votes.items():
+        selector, support = counter.most_common(1)[0]
+        if support < min_support or support / sum(counter.values()) < min_ratio:
+            continue
+        key = f"{scope}|{action}:{label}"
+        entries[key] = {
+            "value": selector,
+            "ts": now,
+            "source": "mined",
+            "support": support,
+            "pages": pages[scope],
+        }
+    return entries
+
+def mine_directory(directory: Path, workers: Optional[int] = None, pattern: str = '*.htm*',
+                   min_support: int = 2, min_ratio: float = 0.6) -> Tuple[Dict[str, Dict], Dict]:
+    """Пройти каталог снимков пулом процессов"""
+    paths = sorted(str(p) for p in Path(directory).rglob(pattern) if p.is_file())
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_quiet_worker) as pool:
+        results = list(pool.map(mine_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    entries = aggregate(results, min_support=min_support, min_ratio=min_ratio)
+    stats = {
+        "files": len(paths),
+        "skipped": sum(1 for scope, _ in results if scope is None),
+        "scopes": len({scope for scope, _ in results if scope}),
+        "entries": len(entries),
+    }
+    return entries, stats
+
+def write_to_cache(entries: Dict[str, Dict], overwrite: bool = False) -> int:
+    """Записать селекторы в кэш; выученные агентом записи по умолчанию не трогаем"""
+    from src.config import get_settings
+    from src.utils.cache import create_backend
+
+    backend = create_backend(get_settings())
+    try:
+        if not overwrite:
+            existing = backend.load()
+            entries = {k: v for k, v in entries.items() if k not in existing}
+        if entries:
+            backend.write_batch(entries)
+        return len(entries)
+    finally:
+        backend.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сбор селекторов по снимкам страниц")
+    parser.add_argument('directory', type=Path)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--pattern', default='*.htm*')
+    parser.add_argument('--min-support', type=int, default=2,
+                        help="минимум страниц, на которых встретился селектор")
+    parser.add_argument('--min-ratio', type=float, default=0.6,
+                        help="минимальная доля селектора среди вариантов метки")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="перезаписывать селекторы, уже выученные агентом")
+    parser.add_argument('--dry-run', action='store_true', help="только показать результат")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    entries, stats = mine_directory(args.directory, args.workers, args.pattern,
+                                    args.min_support, args.min_ratio)
+    print(f"📄 {stats['files']} files ({stats['skipped']} without URL), "
+          f"{stats['scopes']} scopes, {stats['entries']} selectors "
+          f"in {time.perf_counter() - started:.1f}s")
+    if args.dry_run:
+        print(json.dumps(entries, ensure_ascii=False, indent=2))
+        return
+    written = write_to_cache(entries, overwrite=args.overwrite)
+    print(f"✅ Written to selector cache: {written}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Архив снимков страниц: content-addressed, сжатый, с дедупликацией
+
+Документ хранится один раз под своим sha256 (``objects/ab/<sha256>.<codec>``)
+и сжимается кодеком стандартной библиотеки. Индекс в SQLite связывает
+снимки с прогоном, шагом и URL, поэтому одинаковые страницы из разных
+прогонов занимают место один раз. Методы синхронные — вызывать через
+``asyncio.to_thread``::
+
+    python -m src.tools.snapshot_archive stats archive/
+    python -m src.tools.snapshot_archive find archive/ --run 20240101_120000
+    python -m src.tools.snapshot_archive cat archive/ <digest>
+"""
+import argparse
+import bz2
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "gzip": (lambda data: gzip.compress(data, 6), gzip.decompress),
+    "bz2": (bz2.compress, bz2.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    step INTEGER,
+    kind TEXT NOT NULL,
+    url TEXT,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_run ON snapshots (run_id, step);
+CREATE INDEX IF NOT EXISTS snapshots_url ON snapshots (url);
+CREATE INDEX IF NOT EXISTS snapshots_digest ON snapshots (digest);
+"""
+
+class SnapshotArchive:
+    """Хранилище снимков в каталоге ``root``"""
+
+    def __init__(self, root: Path, codec: str = "zlib"):
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {sorted(CODECS)}")
+        self.root = Path(root)
+        self.codec = codec
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.root / "index.sqlite", check_same_thread=False,
+                                   timeout=30)
+        self._db.executescript(_SCHEMA)
+
+    def _object_path(self, digest: str, codec: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.{codec}"
+
+    def _find_object(self, digest: str) -> Optional[Path]:
+        for codec in [self.codec, *CODECS]:
+            path = self._object_path(digest, codec)
+            if path.exists():
+                return path
+        return None
+
+    def put(self, content: str, run_id: str, step: Optional[int] = None,
+            url: Optional[str] = None, kind: str = "page") -> str:
+        """Сохранить снимок; возвращает его digest"""
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if self._find_object(digest) is None:
+            path = self._object_path(digest, self.codec)
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(CODECS[self.codec][0](data))
+            os.replace(tmp, path)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO snapshots (run_id, step, kind, url, digest, size, ts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, step, kind, url, digest, len(data), time.time()))
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """Содержимое снимка по digest"""
+        path = self._find_object(digest)
+        if path is None:
+            return None
+        codec = path.suffix[1:]
+        return CODECS[codec][1](path.read_bytes()).decode("utf-8")
+
+    def find(self, run_id: Optional[str] = None, url: Optional[str] = None,
+             step: Optional[int] = None, kind: Optional[str] = None) -> List[Dict]:
+        """Записи индекса по прогону, шагу, URL и виду снимка"""
+        clauses, params = [], []
+        for column, value in (("run_id", run_id), ("url", url), ("step", step), ("kind", kind)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT run_id, step, kind, url, digest, size, ts FROM snapshots {where} "
+                "ORDER BY run_id, step, id", params).fetchall()
+        columns = ("run_id", "step", "kind", "url", "digest", "size", "ts")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def stats(self) -> Dict:
+        """Сколько снимков и сколько места сэкономили сжатие и дедупликация"""
+        with self._lock:
+            snapshots, logical = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM snapshots").fetchone()
+            unique = self._db.execute(
+                "SELECT COUNT(DISTINCT digest) FROM snapshots").fetchone()[0]
+        stored = sum(p.stat().st_size for p in (self.root / "objects").rglob("*")
+                     if p.is_file() and not p.name.endswith(".tmp"))
+        return {
+            "snapshots": snapshots,
+            "unique_documents": unique,
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "ratio": round(logical / stored, 2) if stored else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Архив снимков страниц")
+    sub = parser.add_subparsers(dest="command", required=True)
+    stats = sub.add_parser("stats", help="размер архива и степень сжатия")
+    stats.add_argument("root", type=Path)
+    find = sub.add_parser("find", help="поиск по индексу")
+    find.add_argument("root", type=Path)
+    find.add_argument("--run")
+    find.add_argument("--url")
+    find.add_argument("--step", type=int)
+    find.add_argument("--kind")
+    cat = sub.add_parser("cat", help="вывести снимок")
+    cat.add_argument("root", type=Path)
+    cat.add_argument("digest")
+    args = parser.parse_args(argv)
+
+    archive = SnapshotArchive(args.root)
+    try:
+        if args.command == "stats":
+            print(json.dumps(archive.stats(), indent=2))
+        elif args.command == "find":
+            for row in archive.find(args.run, args.url, args.step, args.kind):
+                print(f"{row['run_id']}\t{row['step']}\t{row['kind']}\t{row['digest']}\t{row['url']}")
+        else:
+            content = archive.get(args.digest)
+            if content is None:
+                raise SystemExit(f"Snapshot {args.digest} not found")
+            print(content)
+    finally:
+        archive.close()
+
+if __name__ == "__main__":
+    main()
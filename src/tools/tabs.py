@@ -0,0 +1,58 @@
+"""Вкладки сессии и параллельная навигация
+
+``navigate_many`` открывает каждый URL в отдельной вкладке контекста (не
+больше ``parallelism`` одновременно) и возвращает компактный дайджест
+страницы вместо полного HTML — агенту, который обходит список ссылок, не
+нужно делать navigate + read_page по очереди.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Дайджест страницы одним evaluate: заголовки, начало текста, счётчики элементов
+PAGE_DIGEST_JS = """() => ({
+    title: document.title,
+    url: location.href,
+    headings: [...document.querySelectorAll('h1, h2')].slice(0, 5)
+        .map(h => h.innerText.trim().slice(0, 120)),
+    text: (document.body ? document.body.innerText : '').replace(/\\s+/g, ' ').trim().slice(0, 500),
+    links: document.links.length,
+    forms: document.forms.length,
+    inputs: document.querySelectorAll('input, textarea, select').length,
+    buttons: document.querySelectorAll('button, [role=button]').length
+})"""
+
+async def page_digest(page) -> Dict:
+    """Компактное описание открытой страницы"""
+    return await page.evaluate(PAGE_DIGEST_JS)
+
+async def navigate_many(context, urls: List[str], parallelism: int = 4,
+                        load_state: str = "domcontentloaded", timeout_ms: int = 30000,
+                        keep_open: bool = False) -> Tuple[List[Dict], List]:
+    """Открыть URL параллельно в отдельных вкладках
+
+    Возвращает дайджесты в порядке ``urls`` (ошибка загрузки одного URL не
+    прерывает остальные) и список оставленных открытыми вкладок
+    (``keep_open``; для неудачных загрузок — ``None``).
+    """
+    semaphore = asyncio.Semaphore(max(1, parallelism))
+
+    async def visit(url: str) -> Tuple[Dict, Optional[object]]:
+        async with semaphore:
+            started = time.perf_counter()
+            page = await context.new_page()
+            try:
+                response = await page.goto(url, wait_until=load_state, timeout=timeout_ms)
+                digest = await page_digest(page)
+                digest["status"] = response.status if response else None
+            except Exception as e:
+                await page.close()
+                return {"url": url, "error": str(e)}, None
+            digest["load_ms"] = round((time.perf_counter() - started) * 1000)
+            if not keep_open:
+                await page.close()
+                page = None
+            return digest, page
+
+    visited = await asyncio.gather(*(visit(url) for url in urls))
+    return [digest for digest, _ in visited], [page for _, page in visited]
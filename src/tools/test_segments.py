@@ -0,0 +1,107 @@
+"""Разбиение длинной записи на сегменты для генерации теста по частям
+
+Timeline режется по границам страниц (navigate или смена URL) и, если
+сегмент не влезает в бюджет токенов, дальше по шагам. Для каждого сегмента
+LLM генерирует page-object класс, а ``assemble_module`` собирает их в один
+модуль с общим словарём селекторов — одинаковые селекторы объявляются один
+раз.
+"""
+import json
+import re
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from src.utils.llm_scheduler import estimate_tokens
+
+_IMPORT_RE = re.compile(r'^(import \S|from \S+ import )')
+
+def clean_steps(timeline: List[Dict]) -> List[Dict]:
+    """Поля шагов, нужные для генерации"""
+    return [{
+        "action": step.get("action"),
+        "selector": step.get("selector"),
+        "text": step.get("text"),
+        "url": step.get("url") or step.get("page_url"),
+        "timestamp": step.get("timestamp"),
+    } for step in timeline]
+
+def _page(step: Dict) -> str:
+    parts = urlsplit(step.get("url") or "")
+    return f"{parts.netloc}{parts.path}"
+
+def split_timeline(steps: List[Dict], max_tokens: int = 3000) -> List[List[Dict]]:
+    """Сегменты по страницам, каждый не больше ``max_tokens`` (кроме одиночного шага)"""
+    segments: List[List[Dict]] = []
+    current: List[Dict] = []
+    for step in steps:
+        if current:
+            new_page = step.get("action") == "navigate" or _page(step) != _page(current[-1])
+            too_big = estimate_tokens(json.dumps(current + [step], ensure_ascii=False)) > max_tokens
+            if new_page or too_big:
+                segments.append(current)
+                current = []
+        current.append(step)
+    if current:
+        segments.append(current)
+    return segments
+
+def selector_constants(segments: List[List[Dict]]) -> Dict[str, str]:
+    """Общий словарь ``селектор -> имя константы`` для всех сегментов"""
+    names: Dict[str, str] = {}
+    used = set()
+    for segment in segments:
+        for step in segment:
+            selector = step.get("selector")
+            if not selector or selector in names:
+                continue
+            base = "SEL_" + (re.sub(r'[^0-9A-Za-z]+', '_', selector).strip('_').upper()[:40] or "X")
+            name, n = base, 2
+            while name in used:
+                name, n = f"{base}_{n}", n + 1
+            used.add(name)
+            names[selector] = name
+    return names
+
+def segment_class_name(index: int) -> str:
+    return f"Segment{index + 1}Page"
+
+def strip_code_fences(code: str) -> str:
+    return code.replace("```python", "").replace("```", "").strip()
+
+def assemble_module(segment_codes: List[str], selectors: Dict[str, str]) -> str:
+    """Собрать один модуль теста из кода сегментов
+
+    Импорты сегментов поднимаются наверх без повторов, селекторы
+    объявляются один раз, ``main()`` проходит сегменты по порядку на
+    одной странице.
+    """
+    imports = ["import asyncio", "from playwright.async_api import async_playwright"]
+    bodies = []
+    for code in segment_codes:
+        body = []
+        for line in strip_code_fences(code).splitlines():
+            if _IMPORT_RE.match(line):
+                if line.strip() not in imports:
+                    imports.append(line.strip())
+            else:
+                body.append(line)
+        bodies.append("\n".join(body).strip())
+
+    constants = "\n".join(f"{name} = {json.dumps(selector, ensure_ascii=False)}"
+                          for selector, name in selectors.items())
+    steps = ", ".join(f"{segment_class_name(i)}()" for i in range(len(segment_codes)))
+    main = f'''async def main():
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=False)
+        page = await browser.new_page()
+        try:
+            for segment in ({steps},):
+                await segment.run(page)
+        finally:
+            await browser.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())'''
+    parts = ["\n".join(imports), "# Селекторы (общие для всех сегментов)\n" + constants,
+             *bodies, main]
+    return "\n\n\n".join(parts) + "\n"
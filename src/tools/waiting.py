@@ -0,0 +1,82 @@
+"""Ожидание условий на странице вместо фиксированных пауз
+
+Условие — словарь с любым набором полей::
+
+    {"load_state": "networkidle", "url": "**/dashboard", "selector": "#ok",
+     "state": "visible", "predicate": "() => window.appReady", "timeout_ms": 10000}
+
+Части проверяются по порядку (load_state, url/url_regex, selector, predicate)
+с одним общим дедлайном на всё условие.
+"""
+import re
+import time
+from typing import Dict, List
+
+DEFAULT_TIMEOUT_MS = 10000
+
+LOAD_STATES = ["load", "domcontentloaded", "networkidle"]
+SELECTOR_STATES = ["attached", "detached", "visible", "hidden"]
+
+# JSON-схема условия для inputSchema инструментов
+CONDITION_SCHEMA = {
+    "type": "object",
+    "description": "Условие готовности страницы (все указанные части, общий дедлайн)",
+    "properties": {
+        "load_state": {"type": "string", "enum": LOAD_STATES,
+                       "description": "Состояние загрузки (networkidle — сеть затихла)"},
+        "url": {"type": "string", "description": "Glob-шаблон URL, например **/dashboard"},
+        "url_regex": {"type": "string", "description": "Регулярное выражение для URL"},
+        "selector": {"type": "string", "description": "CSS селектор элемента"},
+        "state": {"type": "string", "enum": SELECTOR_STATES,
+                  "description": "Состояние элемента (по умолчанию visible)"},
+        "predicate": {"type": "string",
+                      "description": "JS-выражение или функция, которая должна вернуть true"},
+        "timeout_ms": {"type": "integer", "description": "Дедлайн в миллисекундах"}
+    }
+}
+
+class WaitTimeout(Exception):
+    """Условие не выполнилось до дедлайна"""
+
+async def wait_for_condition(page, condition: Dict,
+                             default_timeout_ms: int = DEFAULT_TIMEOUT_MS) -> Dict:
+    """Дождаться условия на странице
+
+    Возвращает отчёт: сколько ждали и какие части условия проверены.
+    """
+    timeout_ms = int(condition.get("timeout_ms") or default_timeout_ms)
+    started = time.monotonic()
+    deadline = started + timeout_ms / 1000
+    checked: List[str] = []
+
+    def remaining() -> float:
+        left = (deadline - time.monotonic()) * 1000
+        if left <= 0:
+            # timeout=0 в Playwright означает «без ограничения» — не передаём его
+            raise WaitTimeout(f"Timeout {timeout_ms}ms exceeded while waiting for {checked[-1]}")
+        return left
+
+    if condition.get("load_state"):
+        checked.append(f"load_state={condition['load_state']}")
+        await page.wait_for_load_state(condition["load_state"], timeout=remaining())
+
+    if condition.get("url"):
+        checked.append(f"url={condition['url']}")
+        await page.wait_for_url(condition["url"], timeout=remaining())
+    elif condition.get("url_regex"):
+        checked.append(f"url_regex={condition['url_regex']}")
+        await page.wait_for_url(re.compile(condition["url_regex"]), timeout=remaining())
+
+    if condition.get("selector"):
+        state = condition.get("state") or "visible"
+        checked.append(f"selector={condition['selector']} ({state})")
+        await page.wait_for_selector(condition["selector"], state=state, timeout=remaining())
+
+    if condition.get("predicate"):
+        checked.append("predicate")
+        await page.wait_for_function(condition["predicate"], timeout=remaining())
+
+    return {
+        "waited_ms": round((time.monotonic() - started) * 1000),
+        "checked": checked,
+    }
@@ -0,0 +1,116 @@
+"""Контроль допуска вызовов инструментов
+
+Вызовы ждут в очередях сессий. Планировщик обходит сессии по кругу (одна
+сессия не может занять сервер пачкой запросов) и запускает вызов, если
+есть свободный глобальный слот и его страница не занята другим вызовом.
+Внутри сессии порядок FIFO; на одной странице в каждый момент выполняется
+не больше одного действия. Если очередь переполнена, вызов сразу
+отклоняется исключением ``Busy``, а не копится.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict, Optional, Set
+
+class Busy(Exception):
+    """Очередь переполнена — вызов отклонён"""
+
+@dataclass
+class Ticket:
+    """Допуск к выполнению"""
+    session: str
+    key: Optional[str]
+    wait_ms: float = 0.0
+
+@dataclass(eq=False)
+class _Waiter:
+    session: str
+    key: Optional[str]
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.perf_counter)
+
+class AdmissionController:
+    """Глобальный лимит параллельных вызовов с честной очередью"""
+
+    def __init__(self, max_concurrency: int = 4, max_queue: int = 32):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._busy_keys: Set[str] = set()
+        self.running = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def admit(self, session: str, key: Optional[str] = None) -> AsyncIterator[Ticket]:
+        """Дождаться допуска; ``key`` — ресурс (страница) для эксклюзивного доступа"""
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise Busy(f"Server busy: {self.running} running, {self.waiting} queued")
+
+        waiter = _Waiter(session, key, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(session, deque()).append(waiter)
+        self.waiting += 1
+        try:
+            self._dispatch()
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Допуск уже выдан — возвращаем слот
+                self._release(key)
+            else:
+                self._remove(waiter)
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.admitted += 1
+        ticket = Ticket(session, key, (time.perf_counter() - waiter.enqueued) * 1000)
+        try:
+            yield ticket
+        finally:
+            self._release(key)
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
+
+    def _dispatch(self):
+        """Запустить ожидающих, пока есть слоты (круговой обход сессий)"""
+        while self.running < self.max_concurrency:
+            session = next((s for s, queue in self._queues.items()
+                            if queue[0].key is None or queue[0].key not in self._busy_keys),
+                           None)
+            if session is None:
+                return
+            queue = self._queues.pop(session)
+            waiter = queue.popleft()
+            if queue:
+                # Сессия уходит в конец круга
+                self._queues[session] = queue
+            self.running += 1
+            if waiter.key is not None:
+                self._busy_keys.add(waiter.key)
+            waiter.future.set_result(None)
+
+    def _release(self, key: Optional[str]):
+        self.running -= 1
+        if key is not None:
+            self._busy_keys.discard(key)
+        self._dispatch()
+
+    def _remove(self, waiter: _Waiter):
+        queue = self._queues.get(waiter.session)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[waiter.session]
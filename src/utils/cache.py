@@ -1,54 +1,220 @@
 """Менеджер кэша селекторов"""
-import json
-import aiofiles
+import asyncio
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from src.config import get_settings
+from src.utils.cache_backends import (
+    AppendLogBackend, CacheBackend, Entry, JsonFileBackend, RedisBackend
+)
 from src.utils.logger import logger
 
+def create_backend(settings) -> CacheBackend:
+    """Создать хранилище по настройкам"""
+    if settings.cache_backend == "redis" or settings.redis_enabled:
+        import redis  # опциональная зависимость
+
+        client = redis.Redis(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=settings.redis_db,
+            decode_responses=True,
+        )
+        return RedisBackend(
+            client,
+            namespace=settings.redis_namespace,
+            ttl=settings.cache_ttl,
+            max_entries=settings.cache_l1_max_entries,
+        )
+
+    cache_dir = Path(settings.cache_dir)
+    cache_dir.mkdir(exist_ok=True)
+    legacy_file = cache_dir / "selector_cache.json"
+
+    if settings.cache_backend == "json":
+        return JsonFileBackend(legacy_file)
+    if settings.cache_backend == "append_log":
+        return AppendLogBackend(
+            cache_dir / "selector_cache.log",
+            ttl=settings.cache_ttl,
+            max_entries=settings.cache_max_entries,
+            compact_ratio=settings.cache_compact_ratio,
+            legacy_file=legacy_file,
+        )
+    raise ValueError(f"Неизвестный бэкенд кэша: {settings.cache_backend}")
+
 class CacheManager:
-    """Управление кэшем селекторов"""
+    """Управление кэшем селекторов
 
-    def __init__(self):
+    Чтение и запись идут в память. Изменения копятся в буфере и сбрасываются
+    в хранилище пачками в фоне (write-behind): через ``cache_flush_interval``
+    секунд после первого изменения или сразу при ``cache_flush_batch``
+    изменениях. В памяти кэш ограничен по TTL и размеру (вытеснение LRU).
+
+    С общим хранилищем (Redis) память работает как L1: промахи дочитываются
+    через ``fetch``, а записи, изменённые другими процессами, сбрасываются
+    по уведомлениям хранилища.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
         self.settings = get_settings()
-        self.cache_file = Path(self.settings.cache_dir) / "selector_cache.json"
-        self.cache_file.parent.mkdir(exist_ok=True)
-        self.memory: Dict[str, str] = {}
+        self.backend = backend or create_backend(self.settings)
+        self.ttl = self.settings.cache_ttl
+        self.max_entries = (self.settings.cache_l1_max_entries if self.backend.shared
+                            else self.settings.cache_max_entries)
+        self.entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._pending: Dict[str, Optional[Entry]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._background: set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
-    async def load(self) -> Dict[str, str]:
-        """Загрузить кэш из файла"""
-        if not self.cache_file.exists():
-            return {}
+    @property
+    def memory(self) -> Dict[str, str]:
+        """Снимок кэша: ключ -> селектор"""
+        return {key: entry["value"] for key, entry in self.entries.items()}
 
+    async def load(self) -> Dict[str, str]:
+        """Загрузить кэш из хранилища"""
         try:
-            async with aiofiles.open(self.cache_file, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                self.memory = json.loads(content)
-                logger.info(f"Загружено {len(self.memory)} селекторов из кэша")
-                return self.memory
+            loaded = await asyncio.to_thread(self.backend.load)
         except Exception as e:
             logger.error(f"Ошибка загрузки кэша: {e}")
             return {}
 
+        ordered = sorted(loaded.items(), key=lambda kv: float(kv[1].get("ts", 0)))
+        self.entries = OrderedDict(ordered)
+        self._evict()
+
+        self._loop = asyncio.get_running_loop()
+        self.backend.subscribe(self._on_remote_change)
+        logger.info(f"Загружено {len(self.entries)} селекторов из кэша")
+        return self.memory
+
     async def save(self):
-        """Сохранить кэш в файл"""
-        try:
-            async with aiofiles.open(self.cache_file, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(self.memory, ensure_ascii=False, indent=2))
-            logger.info(f"Сохранено {len(self.memory)} селекторов в кэш")
-        except Exception as e:
-            logger.error(f"Ошибка сохранения кэша: {e}")
+        """Немедленно сбросить накопленные изменения в хранилище"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        await self._flush()
+
+    async def close(self):
+        """Сбросить изменения и закрыть хранилище"""
+        await self.save()
+        self.backend.close()
 
     def get(self, key: str) -> Optional[str]:
         """Получить селектор из кэша"""
-        return self.memory.get(key)
+        entry = self.get_entry(key)
+        return entry["value"] if entry else None
+
+    async def fetch(self, key: str) -> Optional[str]:
+        """Получить селектор, при промахе L1 — из общего хранилища"""
+        entry = await self.fetch_entry(key)
+        return entry["value"] if entry else None
 
-    def set(self, key: str, value: str):
-        """Сохранить селектор в кэш"""
-        self.memory[key] = value
+    async def fetch_entry(self, key: str) -> Optional[Entry]:
+        """Получить запись с метаданными, при промахе L1 — из общего хранилища"""
+        entry = self.get_entry(key)
+        if entry is not None or not self.backend.shared:
+            return entry
+
+        try:
+            entry = await asyncio.to_thread(self.backend.get, key)
+        except Exception as e:
+            logger.error(f"Ошибка чтения кэша: {e}")
+            return None
+        if entry is None or key in self._pending:
+            return self.get_entry(key)
+
+        self.entries[key] = entry
+        self._evict()
+        return self.get_entry(key)
+
+    def get_entry(self, key: str) -> Optional[Entry]:
+        """Получить запись кэша вместе с метаданными"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl > 0 and time.time() - float(entry.get("ts", 0)) > self.ttl:
+            self.delete(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, value: str, **meta):
+        """Сохранить селектор в кэш (запись в хранилище — в фоне)"""
+        entry = {"value": value, "ts": time.time(), **meta}
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self._pending[key] = entry
+        self._evict()
+        self._schedule_flush()
+
+    def delete(self, key: str):
+        """Удалить селектор из кэша"""
+        if self.entries.pop(key, None) is not None:
+            self._pending[key] = None
+            self._schedule_flush()
 
     def clear(self):
         """Очистить кэш"""
-        self.memory = {}
-        if self.cache_file.exists():
-            self.cache_file.unlink()
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        self.entries = OrderedDict()
+        self._pending = {}
+        self.backend.clear()
+
+    def _on_remote_change(self, keys: Optional[List[str]]):
+        # Вызывается из потока подписки хранилища
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._invalidate, keys)
+
+    def _invalidate(self, keys: Optional[List[str]]):
+        """Сбросить из памяти записи, изменённые другим процессом"""
+        if keys is None:
+            keys = list(self.entries)
+        for key in keys:
+            # Собственная ещё не записанная версия новее чужой
+            if key not in self._pending:
+                self.entries.pop(key, None)
+
+    def _evict(self):
+        # Вытесняем давно не использованные записи только из памяти:
+        # в хранилище их со временем уберёт TTL/сжатие
+        while self.max_entries > 0 and len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # вне event loop изменения сбросит save()
+
+        if len(self._pending) >= self.settings.cache_flush_batch:
+            task = loop.create_task(self._flush())
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.settings.cache_flush_interval)
+        # Отмена (из save/clear) прерывает только ожидание, но не уже начатую запись
+        await asyncio.shield(self._flush())
+
+    async def _flush(self):
+        # Блокировка сохраняет порядок пачек: более новая не обгонит старую
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self.backend.write_batch, batch)
+                logger.debug(f"Сохранено {len(batch)} изменений кэша")
+            except Exception as e:
+                logger.error(f"Ошибка сохранения кэша: {e}")
+                # Возвращаем пачку в буфер, не затирая более новые изменения
+                self._pending = {**batch, **self._pending}
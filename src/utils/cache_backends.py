@@ -0,0 +1,337 @@
+"""Хранилища для кэша селекторов
+
+Бэкенды синхронные: CacheManager вызывает их через ``asyncio.to_thread``,
+поэтому дисковый ввод-вывод не попадает на путь выполнения действия.
+
+Запись в бэкенде — словарь вида ``{"value": <селектор>, "ts": <unix time>}``
+(плюс произвольные доп. поля). ``None`` в пакете записи означает удаление.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессная блокировка недоступна
+    fcntl = None
+
+Entry = Dict[str, object]
+
+
+class CacheBackend:
+    """Базовый интерфейс хранилища кэша"""
+
+    # Общее хранилище для нескольких процессов: CacheManager держит перед ним
+    # ограниченный L1 и дочитывает промахи через get()
+    shared = False
+
+    def load(self) -> Dict[str, Entry]:
+        """Прочитать все актуальные записи"""
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[Entry]:
+        """Прочитать одну запись (для общих хранилищ)"""
+        return None
+
+    def subscribe(self, callback: Callable[[Optional[List[str]]], None]):
+        """Подписаться на изменения ключей другими процессами
+
+        ``callback`` получает список ключей (``None`` — сброшено всё) и может
+        вызываться из стороннего потока.
+        """
+
+    def write_batch(self, batch: Dict[str, Optional[Entry]]):
+        """Записать пакет изменений (None — удаление ключа)"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Удалить все записи"""
+        raise NotImplementedError
+
+    def close(self):
+        """Освободить ресурсы"""
+
+
+def _is_expired(entry: Entry, ttl: int, now: float) -> bool:
+    return ttl > 0 and now - float(entry.get("ts", 0)) > ttl
+
+
+def _apply_limits(entries: Dict[str, Entry], ttl: int,
+                  max_entries: int) -> Dict[str, Entry]:
+    """Отбрасывает устаревшие записи и самые старые сверх лимита"""
+    now = time.time()
+    alive = {k: e for k, e in entries.items() if not _is_expired(e, ttl, now)}
+    if max_entries > 0 and len(alive) > max_entries:
+        newest = sorted(alive.items(), key=lambda kv: float(kv[1].get("ts", 0)))
+        alive = dict(newest[-max_entries:])
+    return alive
+
+
+class JsonFileBackend(CacheBackend):
+    """Прежний формат: весь кэш в одном JSON-файле
+
+    Файл перезаписывается целиком, но атомарно (через временный файл).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._data: Dict[str, Entry] = {}
+
+    def load(self) -> Dict[str, Entry]:
+        if not self.path.exists():
+            return {}
+        raw = json.loads(self.path.read_text(encoding="utf-8"))
+        now = time.time()
+        self._data = {
+            k: v if isinstance(v, dict) else {"value": v, "ts": now}
+            for k, v in raw.items()
+        }
+        return dict(self._data)
+
+    def write_batch(self, batch: Dict[str, Optional[Entry]]):
+        for key, entry in batch.items():
+            if entry is None:
+                self._data.pop(key, None)
+            else:
+                self._data[key] = entry
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        self._data = {}
+        if self.path.exists():
+            self.path.unlink()
+
+
+class AppendLogBackend(CacheBackend):
+    """Журнал только на дозапись (JSON Lines) с периодическим сжатием
+
+    Каждая строка — ``{"k": ключ, "v": селектор, "ts": время, ...}`` либо
+    ``{"k": ключ, "del": true}``. При чтении побеждает последняя запись.
+    Дозапись и сжатие выполняются под файловой блокировкой, поэтому одним
+    журналом могут пользоваться несколько процессов. Оборванная последняя
+    строка (падение во время записи) при чтении пропускается.
+    """
+
+    def __init__(self, path: Path, ttl: int = 0, max_entries: int = 0,
+                 compact_ratio: float = 2.0, compact_min_lines: int = 1000,
+                 legacy_file: Optional[Path] = None):
+        self.path = Path(path)
+        self.lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.compact_ratio = compact_ratio
+        self.compact_min_lines = compact_min_lines
+        self.legacy_file = Path(legacy_file) if legacy_file else None
+        self._thread_lock = threading.Lock()
+        self._log_lines = 0
+        self._keys: Set[str] = set()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Блокировка между потоками и (где возможно) между процессами"""
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_log(self) -> Dict[str, Entry]:
+        entries: Dict[str, Entry] = {}
+        lines = 0
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        key = record.pop("k")
+                    except (ValueError, KeyError, AttributeError):
+                        continue
+                    lines += 1
+                    if record.get("del"):
+                        entries.pop(key, None)
+                    else:
+                        entries[key] = {"value": record.pop("v"), **record}
+        self._log_lines = lines
+        return entries
+
+    def _write_snapshot(self, entries: Dict[str, Entry]):
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(self._encode(k, e) for k, e in entries.items()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._log_lines = len(entries)
+        self._keys = set(entries)
+
+    @staticmethod
+    def _encode(key: str, entry: Optional[Entry]) -> str:
+        if entry is None:
+            record = {"k": key, "del": True}
+        else:
+            record = {"k": key, "v": entry["value"]}
+            record.update((f, v) for f, v in entry.items() if f != "value")
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def load(self) -> Dict[str, Entry]:
+        with self._locked():
+            if not self.path.exists() and self.legacy_file and self.legacy_file.exists():
+                legacy = JsonFileBackend(self.legacy_file).load()
+                self._write_snapshot(legacy)
+            entries = _apply_limits(self._read_log(), self.ttl, self.max_entries)
+            self._keys = set(entries)
+            if self._needs_compaction():
+                self._write_snapshot(entries)
+        return entries
+
+    def write_batch(self, batch: Dict[str, Optional[Entry]]):
+        if not batch:
+            return
+        payload = "".join(self._encode(k, e) for k, e in batch.items())
+        with self._locked():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(payload)
+            self._log_lines += len(batch)
+            for key, entry in batch.items():
+                if entry is None:
+                    self._keys.discard(key)
+                else:
+                    self._keys.add(key)
+            if self._needs_compaction():
+                self._compact_locked()
+
+    def _needs_compaction(self) -> bool:
+        return (self._log_lines >= self.compact_min_lines
+                and self._log_lines > self.compact_ratio * max(len(self._keys), 1))
+
+    def _compact_locked(self):
+        # Перечитываем журнал: в него могли писать другие процессы
+        entries = _apply_limits(self._read_log(), self.ttl, self.max_entries)
+        self._write_snapshot(entries)
+
+    def compact(self):
+        """Переписать журнал, оставив только актуальные записи"""
+        with self._locked():
+            self._compact_locked()
+
+    def clear(self):
+        with self._locked():
+            if self.path.exists():
+                self.path.unlink()
+            self._log_lines = 0
+            self._keys = set()
+
+
+class RedisBackend(CacheBackend):
+    """Общий кэш в Redis для нескольких агентов
+
+    Каждая запись — отдельный ключ ``<namespace>:sel:<ключ>`` с JSON-значением
+    и TTL на стороне Redis. При загрузке ключи читаются пачками через pipeline.
+    После записи имена изменённых ключей публикуются в канал
+    ``<namespace>:invalidate``, чтобы остальные процессы сбросили их из L1.
+
+    ``client`` — синхронный клиент ``redis.Redis(decode_responses=True)`` или
+    совместимая заглушка (нужны get/set/delete/scan_iter/pipeline/publish/pubsub).
+    """
+
+    shared = True
+
+    def __init__(self, client, namespace: str = "mcp:selectors", ttl: int = 0,
+                 max_entries: int = 0, batch_size: int = 500):
+        self.client = client
+        self.namespace = namespace
+        self.channel = f"{namespace}:invalidate"
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.instance_id = uuid.uuid4().hex
+        self._pubsub = None
+        self._listener = None
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:sel:{key}"
+
+    def load(self) -> Dict[str, Entry]:
+        prefix = self._redis_key("")
+        names: List[str] = []
+        for name in self.client.scan_iter(match=f"{prefix}*", count=self.batch_size):
+            names.append(name)
+            if self.max_entries > 0 and len(names) >= self.max_entries:
+                break
+
+        entries: Dict[str, Entry] = {}
+        for start in range(0, len(names), self.batch_size):
+            chunk = names[start:start + self.batch_size]
+            pipe = self.client.pipeline(transaction=False)
+            for name in chunk:
+                pipe.get(name)
+            for name, raw in zip(chunk, pipe.execute()):
+                if raw:
+                    entries[name[len(prefix):]] = json.loads(raw)
+        return entries
+
+    def get(self, key: str) -> Optional[Entry]:
+        raw = self.client.get(self._redis_key(key))
+        return json.loads(raw) if raw else None
+
+    def write_batch(self, batch: Dict[str, Optional[Entry]]):
+        if not batch:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for key, entry in batch.items():
+            if entry is None:
+                pipe.delete(self._redis_key(key))
+            else:
+                pipe.set(self._redis_key(key), json.dumps(entry, ensure_ascii=False),
+                         ex=self.ttl or None)
+        pipe.publish(self.channel, json.dumps(
+            {"origin": self.instance_id, "keys": list(batch)}, ensure_ascii=False
+        ))
+        pipe.execute()
+
+    def subscribe(self, callback: Callable[[Optional[List[str]]], None]):
+        if self._pubsub is not None:
+            return
+
+        def on_message(message):
+            try:
+                payload = json.loads(message["data"])
+            except (TypeError, ValueError):
+                return
+            if payload.get("origin") != self.instance_id:
+                callback(payload.get("keys"))
+
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: on_message})
+        self._listener = self._pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+    def clear(self):
+        names = list(self.client.scan_iter(match=self._redis_key("*"), count=self.batch_size))
+        for start in range(0, len(names), self.batch_size):
+            self.client.delete(*names[start:start + self.batch_size])
+        self.client.publish(self.channel, json.dumps(
+            {"origin": self.instance_id, "keys": None}
+        ))
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+        self.client.close()
@@ -0,0 +1,252 @@
+"""Общий планировщик запросов к LLM
+
+Все запросы процесса проходят через одну очередь:
+
+- token bucket по запросам и токенам в минуту (RPM/TPM провайдера);
+- лимит одновременных запросов;
+- приоритеты: интерактивные (агент) обслуживаются раньше пакетных
+  (генерация тестов);
+- одинаковые запросы, уже находящиеся в работе, не дублируются — все
+  ожидающие получают один ответ;
+- при 429 очередь целиком ставится на паузу по ``Retry-After``, а запрос
+  возвращается в очередь, вместо того чтобы каждый клиент отступал сам.
+
+Настройка — переменные окружения LLM_RPM, LLM_TPM, LLM_MAX_CONCURRENCY.
+"""
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+INTERACTIVE = 0
+BATCH = 1
+
+# Грубая оценка без токенайзера: ~3 символа на токен (с запасом для кириллицы)
+CHARS_PER_TOKEN = 3
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+class TokenBucket:
+    """Ведро с равномерным пополнением ``per_minute`` единиц в минуту"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.clock = clock
+        self.level = self.capacity
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Через сколько секунд можно списать ``amount``"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Вернуть неиспользованный резерв (фактический расход оказался меньше)"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+# Что повторял бы сам SDK: таймауты, конфликты, 5xx и обрыв соединения
+RETRYABLE_STATUS = {408, 409, 500, 502, 503, 504}
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError")
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Пауза перед повтором (0.0 — экспоненциальная; None — не повторять)
+
+    Для 429 берётся из заголовков Retry-After.
+    """
+    status = getattr(error, "status_code", None)
+    if status in RETRYABLE_STATUS or type(error).__name__ in RETRYABLE_ERRORS:
+        return 0.0
+    if status != 429:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return 0.0
+
+class LLMScheduler:
+    """Очередь запросов к LLM с лимитами, приоритетами и объединением"""
+
+    def __init__(self, rpm: float = 60, tpm: float = 100000, max_concurrency: int = 4,
+                 max_retries: int = 5, clock: Callable[[], float] = time.monotonic):
+        self.requests = TokenBucket(rpm, clock=clock)
+        self.tokens = TokenBucket(tpm, clock=clock)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.clock = clock
+        self.running = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self._paused_until = 0.0
+        self._heap: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def run(self, call: Callable[[], Awaitable[Any]], *, priority: int = INTERACTIVE,
+                  tokens: int = 1000, key: Optional[str] = None,
+                  usage: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+        """Выполнить ``call()`` в очереди
+
+        ``tokens`` — резерв токенов; ``usage(result)`` — фактический расход
+        (разница возвращается в ведро). Запросы с одинаковым ``key``,
+        пришедшие пока первый в работе, получают его результат.
+        """
+        self._bind_loop()
+        if key is not None and key in self._inflight:
+            self.coalesced += 1
+            return await asyncio.shield(self._inflight[key])
+
+        shared = None
+        if key is not None:
+            shared = self._loop.create_future()
+            self._inflight[key] = shared
+        try:
+            result = await self._run(call, priority, tokens, usage)
+        except BaseException as e:
+            if shared is not None:
+                if isinstance(e, asyncio.CancelledError):
+                    shared.cancel()
+                else:
+                    shared.set_exception(e)
+                    shared.exception()  # не ругаться, если ждущих нет
+            raise
+        else:
+            if shared is not None:
+                shared.set_result(result)
+            return result
+        finally:
+            if key is not None:
+                self._inflight.pop(key, None)
+
+    async def chat(self, client, *, priority: int = INTERACTIVE, coalesce: bool = True, **kwargs):
+        """``client.chat.completions.create(**kwargs)`` через очередь"""
+        payload = json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+        tokens = estimate_tokens(payload) + int(kwargs.get("max_tokens") or 1000)
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest() if coalesce else None
+
+        def usage(response):
+            return getattr(getattr(response, "usage", None), "total_tokens", None)
+
+        return await self.run(lambda: client.chat.completions.create(**kwargs),
+                              priority=priority, tokens=tokens, key=key, usage=usage)
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "queued": len(self._heap),
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+        }
+
+    async def _run(self, call, priority: int, tokens: int, usage) -> Any:
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, tokens)
+            try:
+                result = await call()
+            except Exception as e:
+                pause = retry_after(e)
+                if pause is None or attempt == self.max_retries:
+                    raise
+                # Пауза для всей очереди: остальные запросы тоже не пройдут
+                self.rate_limited += 1
+                pause = pause or min(60.0, 2 ** attempt) * (0.5 + random.random() / 2)
+                self._paused_until = max(self._paused_until, self.clock() + pause)
+                continue
+            finally:
+                self.running -= 1
+                self._changed.set()
+            used = usage(result) if usage else None
+            if used is not None and used < tokens:
+                self.tokens.refund(tokens - used)
+                self._changed.set()
+            return result
+
+    async def _acquire(self, priority: int, tokens: int):
+        future = self._loop.create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), tokens, future))
+        self._changed.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = self._loop.create_task(self._dispatch())
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Слот уже выдан
+                self.running -= 1
+                self._changed.set()
+            raise
+
+    async def _dispatch(self):
+        """Выдача слотов по приоритету с учётом лимитов"""
+        while self._heap:
+            self._changed.clear()
+            priority, _, tokens, future = self._heap[0]
+            if future.done():
+                heapq.heappop(self._heap)
+                continue
+            if self.running >= self.max_concurrency:
+                await self._changed.wait()
+                continue
+            delay = max(self._paused_until - self.clock(),
+                        self.requests.delay_for(1), self.tokens.delay_for(tokens))
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.running += 1
+            future.set_result(None)
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Новый event loop (например, новый asyncio.run) — состояние очереди с нуля
+            self._loop = loop
+            self._changed = asyncio.Event()
+            self._heap.clear()
+            self._inflight.clear()
+            self._dispatcher = None
+            self.running = 0
+
+_scheduler: Optional[LLMScheduler] = None
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Планировщик процесса (лимиты из окружения)"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(
+            rpm=float(os.getenv("LLM_RPM", 60)),
+            tpm=float(os.getenv("LLM_TPM", 100000)),
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 4)),
+        )
+    return _scheduler
@@ -0,0 +1,168 @@
+"""Неблокирующий конвейер логирования
+
+Обработчик на стороне вызывающего кода только кладёт запись в очередь;
+запись в файл и консоль выполняет фоновый поток ``QueueListener``, поэтому
+логирование не блокирует event loop. Файл пишется в JSON Lines с ротацией.
+
+Модуль не зависит от ``Settings`` и используется как из ``src``, так и из
+самостоятельных скриптов (``server.py``, ``client_recorder.py``).
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_log_context: ContextVar[Dict[str, object]] = ContextVar('log_context', default={})
+_listeners: List[QueueListener] = []
+_exc_formatter = logging.Formatter()
+
+@contextmanager
+def log_context(**fields) -> Iterator[None]:
+    """Добавить поля (session, tool, ...) ко всем записям внутри блока"""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+class ContextFilter(logging.Filter):
+    """Копирует поля контекста в запись (выполняется в вызывающей задаче)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = _log_context.get()
+        return True
+
+class HotPathFilter(logging.Filter):
+    """Сэмплирование и ограничение частоты для «горячих» сообщений
+
+    Касается только записей с ``extra={'hot': True}``. Для каждого места
+    вызова (логгер + строка) пропускается не больше ``rate`` записей в секунду;
+    число подавленных записей добавляется к следующей пропущенной
+    (поле ``suppressed``).
+    """
+
+    def __init__(self, rate: float = 20.0, sample: float = 1.0):
+        super().__init__()
+        self.rate = rate
+        self.sample = sample
+        self._windows: Dict[Tuple[str, int], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'hot', False):
+            return True
+        if self.sample < 1.0 and random.random() >= self.sample:
+            return False
+        if self.rate <= 0:
+            return True
+
+        key = (record.name, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(key, [now, 0, 0])  # начало, пропущено, подавлено
+            if now - window[0] >= 1.0:
+                window[0], window[1] = now, 0
+            if window[1] >= self.rate:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                record.suppressed, window[2] = window[2], 0
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        payload.update(getattr(record, 'context', {}))
+        if getattr(record, 'suppressed', 0):
+            payload['suppressed'] = record.suppressed
+        if record.exc_text:
+            payload['exc'] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler, который при переполнении очереди теряет запись, а не ждёт"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # В отличие от базового prepare, трассировка остаётся отдельным полем
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def configure_logging(name: Optional[str] = None, level: str = 'INFO',
+                      log_file: Optional[Path] = None, json_format: bool = True,
+                      console: bool = True, console_format: str = TEXT_FORMAT,
+                      max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                      queue_size: int = 10000, hot_rate: float = 20.0,
+                      hot_sample: float = 1.0) -> logging.Logger:
+    """Настраивает логгер (``None`` — корневой) на запись через очередь"""
+    logger = logging.getLogger(name)
+    logger.setLevel(getattr(logging, level))
+    if any(isinstance(h, _DroppingQueueHandler) for h in logger.handlers):
+        return logger
+
+    handlers: List[logging.Handler] = []
+    if log_file:
+        log_file = Path(log_file)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        fh = RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                 backupCount=backup_count, encoding='utf-8')
+        fh.setLevel(logging.DEBUG)
+        fh.setFormatter(JsonFormatter() if json_format
+                        else logging.Formatter(TEXT_FORMAT, datefmt='%Y-%m-%d %H:%M:%S'))
+        handlers.append(fh)
+    if console:
+        ch = logging.StreamHandler()
+        ch.setLevel(getattr(logging, level))
+        ch.setFormatter(logging.Formatter(console_format, datefmt='%Y-%m-%d %H:%M:%S'))
+        handlers.append(ch)
+
+    qh = _DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    qh.addFilter(ContextFilter())
+    qh.addFilter(HotPathFilter(rate=hot_rate, sample=hot_sample))
+    logger.addHandler(qh)
+
+    listener = QueueListener(qh.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return logger
+
+def shutdown_logging():
+    """Дописать очереди и остановить фоновые потоки"""
+    while _listeners:
+        _listeners.pop().stop()
+
+atexit.register(shutdown_logging)
@@ -1,41 +1,44 @@
 """Настройка логирования"""
 import logging
 from pathlib import Path
-from datetime import datetime
-from src.config import get_settings
 
 def setup_logger(name: str = "mcp_agent") -> logging.Logger:
-    """Настраивает логгер с файловым и консольным выводом"""
-    settings = get_settings()
+    """Настраивает логгер с файловым (JSON, ротация) и консольным выводом
 
-    # Создаем директорию для логов
-    log_dir = Path(settings.logs_dir)
-    log_dir.mkdir(exist_ok=True)
+    Записи передаются фоновому потоку через очередь и не блокируют event loop.
+    """
+    from src.config import get_settings
+    from src.utils.log_pipeline import configure_logging
 
-    logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, settings.log_level))
+    settings = get_settings()
 
-    # Файловый handler
-    log_file = log_dir / f"{name}_{datetime.now():%Y%m%d}.log"
-    fh = logging.FileHandler(log_file, encoding='utf-8')
-    fh.setLevel(logging.DEBUG)
+    return configure_logging(
+        name,
+        level=settings.log_level,
+        log_file=Path(settings.logs_dir) / f"{name}.log",
+        json_format=settings.log_json,
+        max_bytes=settings.log_max_bytes,
+        backup_count=settings.log_backup_count,
+        queue_size=settings.log_queue_size,
+        hot_rate=settings.log_hot_rate,
+        hot_sample=settings.log_hot_sample,
+    )
 
-    # Консольный handler
-    ch = logging.StreamHandler()
-    ch.setLevel(getattr(logging, settings.log_level))
+class _LazyLogger:
+    """Глобальный логгер, настраиваемый при первом использовании
 
-    # Форматтер
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    fh.setFormatter(formatter)
-    ch.setFormatter(formatter)
+    Импорт модуля не читает настройки и не открывает файлы логов — это
+    делает только первая запись.
+    """
 
-    logger.addHandler(fh)
-    logger.addHandler(ch)
+    def __init__(self, name: str):
+        self._name = name
+        self._logger = None
 
-    return logger
+    def __getattr__(self, attr):
+        if self._logger is None:
+            self._logger = setup_logger(self._name)
+        return getattr(self._logger, attr)
 
 # Глобальный логгер
-logger = setup_logger()
+logger = _LazyLogger("mcp_agent")
@@ -0,0 +1,127 @@
+"""Монитор задержек event loop
+
+Корутина-пульс просыпается каждые ``interval`` секунд и меряет, насколько
+позже срока её разбудили, — это задержка loop. Сторожевой поток следит за
+пульсом: если loop не отвечает дольше ``threshold``, он снимает стек потока
+loop, то есть именно тот синхронный код, который его держит. Включается
+переменной ``LOOP_MONITOR=true`` (порог — ``LOOP_STALL_MS``).
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class LoopMonitor:
+    """Задержки event loop и стеки блокирующих вызовов"""
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1,
+                 samples: int = 4096, stalls: int = 20, stack_depth: int = 12):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self.lags: Deque[float] = deque(maxlen=samples)
+        self.stalls: Deque[Dict] = deque(maxlen=stalls)
+        self.stall_count = 0
+        self._beat = time.monotonic()
+        self._stall: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["LoopMonitor"]:
+        """Монитор, если он включён в окружении"""
+        if os.getenv("LOOP_MONITOR", "false").lower() != "true":
+            return None
+        return cls(threshold=float(os.getenv("LOOP_STALL_MS", 100)) / 1000)
+
+    def start(self):
+        """Запустить из работающего event loop"""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.record_lag(max(0.0, now - expected), now)
+
+    def record_lag(self, lag: float, now: Optional[float] = None):
+        """Учесть замер задержки; закрывает зависание, если оно было"""
+        self.lags.append(lag)
+        metrics.LOOP_LAG.observe(lag)
+        with self._lock:
+            self._beat = now if now is not None else time.monotonic()
+            stall, self._stall = self._stall, None
+        if stall is not None:
+            stall["duration_ms"] = round(lag * 1000, 1)
+            logger.warning(f"Event loop blocked for {stall['duration_ms']} ms at:\n"
+                           + "".join(stall["stack"]))
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            with self._lock:
+                blocked = time.monotonic() - self._beat - self.interval
+                if blocked < self.threshold or self._stall is not None:
+                    continue
+                self._stall = self.capture()
+                self.stall_count += 1
+                self.stalls.append(self._stall)
+
+    def capture(self) -> Dict:
+        """Стек потока event loop в момент зависания"""
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.format_stack(frame)[-self.stack_depth:] if frame else []
+        return {"ts": time.time(), "duration_ms": None, "stack": stack}
+
+    def stats(self) -> Dict:
+        lags = sorted(self.lags)
+        with self._lock:
+            stalls = list(self.stalls)
+        return {
+            "samples": len(lags),
+            "lag_ms": {f"p{q}": round(percentile(lags, q) * 1000, 2) for q in (50, 90, 99)},
+            "max_lag_ms": round(lags[-1] * 1000, 2) if lags else 0.0,
+            "threshold_ms": self.threshold * 1000,
+            "stalls": self.stall_count,
+            "recent_stalls": stalls,
+        }
+
+    def report(self) -> str:
+        """Текстовая сводка для вывода при завершении клиента"""
+        stats = self.stats()
+        lines = [f"Event loop lag: p50={stats['lag_ms']['p50']} ms, "
+                 f"p90={stats['lag_ms']['p90']} ms, p99={stats['lag_ms']['p99']} ms, "
+                 f"max={stats['max_lag_ms']} ms, stalls={stats['stalls']}"]
+        for stall in stats["recent_stalls"]:
+            lines.append(f"--- blocked {stall['duration_ms']} ms")
+            lines.extend(line.rstrip() for line in stall["stack"][-4:])
+        return "\n".join(lines)
@@ -0,0 +1,84 @@
+"""Метрики Prometheus для MCP сервера
+
+``prometheus-client`` — опциональная зависимость: без неё метрики
+превращаются в заглушки, а ``/metrics`` отвечает 503.
+"""
+from typing import Tuple
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+        generate_latest,
+    )
+except ImportError:
+    CollectorRegistry = None
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class _NoopMetric:
+    """Заглушка метрики, когда prometheus-client не установлен"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def dec(self, amount: float = 1):
+        pass
+
+    def set(self, value: float):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+def metrics_available() -> bool:
+    """Установлен ли prometheus-client"""
+    return CollectorRegistry is not None
+
+if metrics_available():
+    REGISTRY = CollectorRegistry()
+
+    TOOL_CALLS = Counter('mcp_tool_calls_total', 'Вызовы инструментов',
+                         ['tool'], registry=REGISTRY)
+    TOOL_ERRORS = Counter('mcp_tool_errors_total', 'Ошибки инструментов',
+                          ['tool'], registry=REGISTRY)
+    TOOL_LATENCY = Histogram('mcp_tool_latency_seconds', 'Длительность вызова инструмента',
+                             ['tool'], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+    IN_FLIGHT = Gauge('mcp_in_flight_requests', 'Вызовы инструментов в работе',
+                      registry=REGISTRY)
+    ACTIVE_SESSIONS = Gauge('mcp_active_sse_sessions', 'Открытые SSE-сессии',
+                            registry=REGISTRY)
+    OPEN_CONTEXTS = Gauge('mcp_browser_contexts', 'Открытые контексты браузера',
+                          registry=REGISTRY)
+    OPEN_PAGES = Gauge('mcp_browser_pages', 'Открытые страницы браузера',
+                       registry=REGISTRY)
+    BROWSER_RSS = Gauge('mcp_browser_rss_bytes', 'Суммарный RSS процессов Chromium',
+                        registry=REGISTRY)
+    TIMELINE_STEPS = Gauge('mcp_timeline_steps', 'Шагов в записанном timeline',
+                           registry=REGISTRY)
+    REQUESTS_BLOCKED = Counter('mcp_requests_blocked_total', 'Заблокированные запросы браузера',
+                               registry=REGISTRY)
+    ASSET_CACHE = Counter('mcp_asset_cache_requests_total', 'Запросы к кэшу статики',
+                          ['result'], registry=REGISTRY)
+    QUEUE_WAIT = Histogram('mcp_queue_wait_seconds', 'Ожидание допуска к выполнению',
+                           buckets=LATENCY_BUCKETS, registry=REGISTRY)
+    CALLS_REJECTED = Counter('mcp_calls_rejected_total', 'Вызовы, отклонённые из-за очереди',
+                             registry=REGISTRY)
+    LOOP_LAG = Histogram('mcp_event_loop_lag_seconds', 'Задержка пробуждения event loop',
+                         buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+                         registry=REGISTRY)
+    BROWSER_RECYCLES = Counter('mcp_browser_recycles_total', 'Закрытия и перезапуски браузера',
+                               ['reason'], registry=REGISTRY)
+else:
+    REGISTRY = None
+    TOOL_CALLS = TOOL_ERRORS = TOOL_LATENCY = _NoopMetric()
+    IN_FLIGHT = ACTIVE_SESSIONS = _NoopMetric()
+    OPEN_CONTEXTS = OPEN_PAGES = BROWSER_RSS = TIMELINE_STEPS = _NoopMetric()
+    REQUESTS_BLOCKED = ASSET_CACHE = _NoopMetric()
+    QUEUE_WAIT = CALLS_REJECTED = BROWSER_RECYCLES = LOOP_LAG = _NoopMetric()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Текущие значения в текстовом формате Prometheus"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,66 @@
+"""Статистика процессов ОС (через /proc, только Linux)"""
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+PROC = Path("/proc")
+BROWSER_MARKERS = ("chrome", "chromium", "headless_shell")
+
+def _parent_map() -> Dict[int, int]:
+    parents = {}
+    for entry in PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # Имя процесса в скобках может содержать пробелы: берём поля после ')'
+        fields = stat.rsplit(")", 1)[1].split()
+        parents[int(entry.name)] = int(fields[1])
+    return parents
+
+def descendant_pids(root_pid: int) -> List[int]:
+    """PID всех потомков процесса"""
+    if not PROC.exists():
+        return []
+    children: Dict[int, List[int]] = {}
+    for pid, ppid in _parent_map().items():
+        children.setdefault(ppid, []).append(pid)
+
+    result, stack = [], [root_pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            result.append(child)
+            stack.append(child)
+    return result
+
+def process_rss_bytes(pid: int) -> int:
+    """Резидентная память процесса (0, если процесс недоступен)"""
+    try:
+        for line in (PROC / str(pid) / "status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+def _process_name(pid: int) -> str:
+    try:
+        return (PROC / str(pid) / "comm").read_text().strip().lower()
+    except OSError:
+        return ""
+
+def browser_pids(root_pid: Optional[int] = None,
+                 markers: Iterable[str] = BROWSER_MARKERS) -> List[int]:
+    """PID процессов браузера, запущенных текущим процессом"""
+    markers = tuple(markers)
+    return [
+        pid for pid in descendant_pids(root_pid or os.getpid())
+        if any(m in _process_name(pid) for m in markers)
+    ]
+
+def browser_rss_bytes(root_pid: Optional[int] = None,
+                      markers: Iterable[str] = BROWSER_MARKERS) -> int:
+    """Суммарный RSS процессов браузера, запущенных текущим процессом"""
+    return sum(process_rss_bytes(pid) for pid in browser_pids(root_pid, markers))
@@ -0,0 +1,98 @@
+"""Профилирование работающего сервера по запросу
+
+Профиль снимается cProfile в потоке event loop на заданное число секунд
+или до завершения следующих N вызовов инструментов. Результат — топ
+функций и файл ``.prof`` (открывается ``python -m pstats``, snakeviz,
+tuna). Пока профиль не запущен, сервер платит только проверкой флага
+``armed``.
+"""
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SORT_KEYS = ("cumulative", "tottime", "calls")
+
+class OnDemandProfiler:
+    """Профиль по запросу; одновременно — не больше одного"""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.armed = False
+        self._profile: Optional[cProfile.Profile] = None
+        self._calls_left = 0
+        self._calls_seen = 0
+        self._done: Optional[asyncio.Future] = None
+
+    async def run(self, seconds: Optional[float] = None, calls: Optional[int] = None,
+                  timeout: float = 300.0, top: int = 25, sort: str = "cumulative") -> Dict:
+        """Снять профиль и вернуть отчёт
+
+        ``seconds`` — фиксированное окно; ``calls`` — до завершения N вызовов
+        (но не дольше ``timeout``).
+        """
+        if self.armed:
+            raise RuntimeError("Profiler is already running")
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {SORT_KEYS}")
+        if not seconds and not calls:
+            seconds = 10.0
+
+        self._done = asyncio.get_running_loop().create_future()
+        self._calls_left = calls or 0
+        self._calls_seen = 0
+        self._profile = cProfile.Profile()
+        started = time.perf_counter()
+        self.armed = True
+        self._profile.enable()
+        try:
+            if calls:
+                try:
+                    await asyncio.wait_for(asyncio.shield(self._done), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(seconds)
+        finally:
+            self._profile.disable()
+            self.armed = False
+        duration = time.perf_counter() - started
+        return await asyncio.to_thread(self._report, self._profile, duration, top, sort)
+
+    def call_finished(self):
+        """Отметить завершённый вызов инструмента (только когда armed)"""
+        self._calls_seen += 1
+        if self._calls_left and self._calls_seen >= self._calls_left and not self._done.done():
+            self._done.set_result(None)
+
+    def _report(self, profile: cProfile.Profile, duration: float, top: int, sort: str) -> Dict:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"profile-{datetime.now():%Y%m%d_%H%M%S}.prof"
+        stats = pstats.Stats(profile)
+        stats.dump_stats(path)
+
+        stats.sort_stats(sort)
+        functions: List[Dict] = []
+        for func in stats.fcn_list[:top]:
+            _, ncalls, tottime, cumtime, _ = stats.stats[func]
+            filename, line, name = func
+            functions.append({
+                "function": f"{filename}:{line}({name})",
+                "calls": ncalls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            })
+
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats(sort).print_stats(top)
+        return {
+            "duration_s": round(duration, 3),
+            "tool_calls": self._calls_seen,
+            "file": str(path),
+            "top": functions,
+            "text": text.getvalue(),
+        }
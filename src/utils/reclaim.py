@@ -0,0 +1,82 @@
+"""Освобождение простаивающих ресурсов браузера
+
+``Reclaimer`` только решает, что пора освободить: неактивные вкладки, к
+которым давно не обращались, весь браузер после долгого простоя сессии и
+браузер, чей RSS превысил порог. Закрывает и перезапускает сам сервер.
+"""
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+@dataclass
+class ReclaimPolicy:
+    """Пороги освобождения; 0 выключает соответствующую проверку"""
+    idle_tab_s: float = 600.0
+    idle_browser_s: float = 1800.0
+    rss_limit_bytes: int = 0
+    interval_s: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "ReclaimPolicy":
+        return cls(
+            idle_tab_s=float(os.getenv("IDLE_TAB_TIMEOUT", 600)),
+            idle_browser_s=float(os.getenv("IDLE_BROWSER_TIMEOUT", 1800)),
+            rss_limit_bytes=int(float(os.getenv("BROWSER_RSS_LIMIT_MB", 0)) * 1024 * 1024),
+            interval_s=float(os.getenv("RECLAIM_INTERVAL", 30)),
+        )
+
+class Reclaimer:
+    """Учёт последнего использования и журнал освобождений"""
+
+    def __init__(self, policy: Optional[ReclaimPolicy] = None,
+                 clock: Callable[[], float] = time.monotonic, history: int = 20):
+        self.policy = policy or ReclaimPolicy()
+        self.clock = clock
+        self.browser_used = clock()
+        self.tab_used: Dict[str, float] = {}
+        self.events = deque(maxlen=history)
+        self.counters = {"tabs_closed": 0, "browser_closed": 0, "recycled": 0}
+        self.last_rss_bytes = 0
+
+    def touch(self, tab_id: Optional[str] = None):
+        """Отметить обращение к браузеру (и к вкладке)"""
+        now = self.clock()
+        self.browser_used = now
+        if tab_id:
+            self.tab_used[tab_id] = now
+
+    def forget(self, tab_id: str):
+        self.tab_used.pop(tab_id, None)
+
+    def idle_tabs(self, tab_ids: Iterable[str], active: Optional[str]) -> List[str]:
+        """Неактивные вкладки, не использовавшиеся дольше idle_tab_s"""
+        if not self.policy.idle_tab_s:
+            return []
+        now = self.clock()
+        return [tab_id for tab_id in tab_ids
+                if tab_id != active
+                and now - self.tab_used.setdefault(tab_id, now) >= self.policy.idle_tab_s]
+
+    def browser_idle(self) -> bool:
+        return bool(self.policy.idle_browser_s) and \
+            self.clock() - self.browser_used >= self.policy.idle_browser_s
+
+    def over_limit(self, rss_bytes: int) -> bool:
+        self.last_rss_bytes = rss_bytes
+        return bool(self.policy.rss_limit_bytes) and rss_bytes > self.policy.rss_limit_bytes
+
+    def record(self, kind: str, **details):
+        """Записать событие: tabs_closed, browser_closed или recycled"""
+        self.counters[kind] += 1
+        self.events.append({"event": kind, "ts": time.time(), **details})
+
+    def stats(self) -> Dict:
+        return {
+            **self.counters,
+            "idle_s": round(self.clock() - self.browser_used, 1),
+            "rss_bytes": self.last_rss_bytes,
+            "rss_limit_bytes": self.policy.rss_limit_bytes,
+            "events": list(self.events),
+        }
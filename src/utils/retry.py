@@ -1,33 +1,161 @@
-"""Утилиты для повторных попыток"""
+"""Утилиты для повторных попыток
+
+``retry_call`` повторяет вызов с экспоненциальной задержкой и джиттером в
+пределах общего дедлайна; фатальные ошибки пробрасываются сразу.
+``CircuitBreaker`` считает подряд идущие сбои по цели (селектор, инструмент,
+хост) и на время размыкает цепь, чтобы не тратить бюджет на заведомо
+сломанную цель.
+"""
 import asyncio
-from typing import Callable, Any
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, Union
 from functools import wraps
 from src.utils.logger import logger
 
-def async_retry(max_attempts: int = 3, delay: float = 1.0, backoff: float = 2.0):
+class RetryableError(Exception):
+    """Временная ошибка — вызов имеет смысл повторить"""
+
+class FatalError(Exception):
+    """Ошибка, которую повтор не исправит"""
+
+class CircuitOpen(FatalError):
+    """Цепь для цели разомкнута — вызов не выполняется"""
+
+class DeadlineExceeded(Exception):
+    """Бюджет времени на действие исчерпан"""
+
+class Deadline:
+    """Общий дедлайн для нескольких вызовов"""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.expires = clock() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - self.clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+class CircuitBreaker:
+    """Размыкатель цепи по ключу цели
+
+    После ``failure_threshold`` сбоев подряд цель блокируется на
+    ``reset_timeout`` секунд; затем пропускается одна пробная попытка —
+    успех замыкает цепь, сбой снова размыкает.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._failures: Dict[str, int] = {}
+        self._opened: Dict[str, float] = {}
+        self._trial: Dict[str, bool] = {}
+
+    def state(self, key: str) -> str:
+        opened = self._opened.get(key)
+        if opened is None:
+            return "closed"
+        return "half_open" if self.clock() - opened >= self.reset_timeout else "open"
+
+    def allow(self, key: str) -> bool:
+        state = self.state(key)
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial.get(key):
+            self._trial[key] = True
+            return True
+        return False
+
+    def record_success(self, key: str):
+        self._failures.pop(key, None)
+        self._opened.pop(key, None)
+        self._trial.pop(key, None)
+
+    def record_failure(self, key: str):
+        failures = self._failures.get(key, 0) + 1
+        self._failures[key] = failures
+        if failures >= self.failure_threshold or key in self._opened:
+            self._opened[key] = self.clock()
+            self._trial.pop(key, None)
+
+def backoff_delay(attempt: int, base: float, factor: float = 2.0,
+                  max_delay: float = 10.0, jitter: bool = True) -> float:
+    """Задержка перед повтором (equal jitter: от половины до полной)"""
+    delay = min(max_delay, base * factor ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2) if jitter else delay
+
+async def retry_call(func: Callable[[], Awaitable[Any]], *, attempts: int = 3,
+                     delay: float = 0.5, backoff: float = 2.0, max_delay: float = 10.0,
+                     jitter: bool = True, deadline: Union[None, float, Deadline] = None,
+                     breaker: Optional[CircuitBreaker] = None, key: str = "",
+                     retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+                     fatal: Tuple[Type[BaseException], ...] = (FatalError,)) -> Any:
+    """Вызвать ``func()`` с повторами
+
+    Повторяются только исключения из ``retry_on`` (кроме ``fatal``). Вызов
+    и паузы укладываются в ``deadline`` (секунды или общий ``Deadline``):
+    если его не хватает на следующую попытку, выбрасывается
+    ``DeadlineExceeded``.
+    """
+    if attempts < 1:
+        raise ValueError(f"attempts must be >= 1, got {attempts}")
+    if isinstance(deadline, (int, float)):
+        deadline = Deadline(deadline)
+    last_exception: Optional[BaseException] = None
+
+    for attempt in range(attempts):
+        if breaker and not breaker.allow(key):
+            raise CircuitOpen(f"Circuit open for {key}") from last_exception
+        if deadline and deadline.expired:
+            raise DeadlineExceeded(f"Deadline exceeded for {key or 'call'}") from last_exception
+
+        try:
+            if deadline:
+                result = await asyncio.wait_for(func(), deadline.remaining())
+            else:
+                result = await func()
+        except fatal:
+            if breaker:
+                breaker.record_failure(key)
+            raise
+        except retry_on as e:
+            if breaker:
+                breaker.record_failure(key)
+            if deadline and deadline.expired:
+                raise DeadlineExceeded(f"Deadline exceeded for {key or 'call'}") from e
+            last_exception = e
+            logger.warning(f"Попытка {attempt + 1}/{attempts} не удалась: {e}")
+            if attempt == attempts - 1:
+                break
+            pause = backoff_delay(attempt, delay, backoff, max_delay, jitter)
+            if deadline and pause >= deadline.remaining():
+                raise DeadlineExceeded(f"Deadline exceeded for {key or 'call'}") from e
+            logger.info(f"Повтор через {pause:.2f}с...")
+            await asyncio.sleep(pause)
+        else:
+            if breaker:
+                breaker.record_success(key)
+            return result
+
+    logger.error(f"Все {attempts} попытки исчерпаны")
+    raise last_exception
+
+def async_retry(max_attempts: int = 3, delay: float = 1.0, backoff: float = 2.0,
+                deadline: Optional[float] = None, jitter: bool = False,
+                retry_on: Tuple[Type[BaseException], ...] = (Exception,)):
     """Декоратор для повторных попыток async функций"""
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs) -> Any:
-            last_exception = None
-            current_delay = delay
-
-            for attempt in range(max_attempts):
-                try:
-                    return await func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    logger.warning(
-                        f"Попытка {attempt + 1}/{max_attempts} не удалась: {e}"
-                    )
-
-                    if attempt < max_attempts - 1:
-                        logger.info(f"Повтор через {current_delay}с...")
-                        await asyncio.sleep(current_delay)
-                        current_delay *= backoff
-
-            logger.error(f"Все {max_attempts} попытки исчерпаны")
-            raise last_exception
+            return await retry_call(lambda: func(*args, **kwargs), attempts=max_attempts,
+                                    delay=delay, backoff=backoff, jitter=jitter,
+                                    deadline=deadline, retry_on=retry_on,
+                                    key=func.__name__)
 
         return wrapper
     return decorator
@@ -0,0 +1,88 @@
+"""Профиль времени запуска точек входа (``--profile-startup``)
+
+Считает время импортов по модулям (собственное и вместе с вложенными) и
+этапы инициализации, отмеченные вызовами ``mark()``. Без флага профиль
+выключен: перехватчик импортов не ставится, ``mark()`` ничего не делает.
+Для детального дерева импортов есть штатное ``python -X importtime``.
+"""
+import builtins
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+FLAG = "--profile-startup"
+
+class StartupProfile:
+    """Время импортов и этапов запуска"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: List[Tuple[str, float]] = []
+        # модуль -> [время вместе с вложенными, собственное время]
+        self.imports: Dict[str, List[float]] = {}
+        self._stack: List[List[float]] = []
+        self._original_import = None
+        if enabled:
+            self._install()
+
+    @classmethod
+    def from_argv(cls, argv: Optional[List[str]] = None) -> "StartupProfile":
+        """Профиль, включённый флагом ``--profile-startup`` в аргументах"""
+        return cls(FLAG in (sys.argv if argv is None else argv))
+
+    def _install(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Уже загруженные модули и относительные импорты не считаем
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        frame = [0.0]  # время вложенных импортов
+        self._stack.append(frame)
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            total = self.imports.setdefault(name, [0.0, 0.0])
+            total[0] += elapsed
+            total[1] += elapsed - frame[0]
+
+    def mark(self, phase: str):
+        """Завершить этап запуска"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def stop(self):
+        """Снять перехватчик импортов"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def report(self, top: int = 15) -> str:
+        """Текстовый отчёт: этапы и самые дорогие импорты"""
+        total = self._last - self.started
+        lines = [f"⏱️  Startup: {total * 1000:.1f} ms"]
+        for phase, elapsed in self.phases:
+            lines.append(f"   {phase:<40}{elapsed * 1000:>10.1f} ms")
+        lines.append(f"\n   {'import':<40}{'cumulative':>12}{'self':>10}")
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (cumulative, own) in ranked[:top]:
+            lines.append(f"   {name:<40}{cumulative * 1000:>9.1f} ms{own * 1000:>7.1f} ms")
+        return "\n".join(lines)
+
+    def finish(self, top: int = 15):
+        """Вывести отчёт и снять перехватчик"""
+        if not self.enabled:
+            return
+        self.stop()
+        print(self.report(top))
@@ -0,0 +1,214 @@
+"""Сквозная трассировка шагов агента
+
+Спаны пишутся в формате Chrome Trace Event (JSON), который открывается в
+chrome://tracing и https://ui.perfetto.dev без внешних сервисов. Каждый
+процесс пишет свой файл ``<TRACE_DIR>/<service>-<pid>.json``; файлы клиента
+и сервера объединяются командой::
+
+    python -m src.utils.tracing merge traces/*.json -o trace.json
+
+Контекст передаётся между процессами заголовком W3C ``traceparent`` в
+метаданных (``_meta``) MCP-запроса. Если ``TRACE_DIR`` не задан, трассировка
+выключена и ``span()`` ничего не делает.
+"""
+import argparse
+import atexit
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Идентификаторы текущего спана"""
+    trace_id: str
+    span_id: str
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+_current_span: ContextVar[Optional[SpanContext]] = ContextVar('current_span', default=None)
+_tracers: Dict[str, "Tracer"] = {}
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    """Разобрать заголовок ``traceparent`` (None, если формат неверный)"""
+    parts = (value or '').split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return SpanContext(parts[1], parts[2])
+
+class _EventWriter:
+    """Буферизованная запись событий в файл фоновым потоком"""
+
+    def __init__(self, path: Path, flush_interval: float = 0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='trace-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, event: Dict):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+
+    def _run(self):
+        while not self._wakeup.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        new_file = not self.path.exists()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            # Формат JSON Array без закрывающей скобки допускается просмотрщиками
+            f.write(('[\n' if new_file else '') + ''.join(l + ',\n' for l in lines))
+
+    def close(self):
+        self._wakeup.set()
+        self._thread.join(timeout=2)
+        self.flush()
+
+class Tracer:
+    """Источник спанов для одного сервиса (процесса)"""
+
+    def __init__(self, service: str, trace_dir: Optional[Path] = None):
+        self.service = service
+        self.enabled = trace_dir is not None
+        self.pid = os.getpid()
+        self._writer: Optional[_EventWriter] = None
+        self._named_tracks = set()
+        if self.enabled:
+            self._writer = _EventWriter(Path(trace_dir) / f"{service}-{self.pid}.json")
+            self._writer.write({'ph': 'M', 'name': 'process_name', 'pid': self.pid,
+                                'args': {'name': service}})
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Optional[SpanContext]]:
+        """Спан внутри текущей трассы (или новая трасса, если её нет)"""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        ctx = SpanContext(parent.trace_id if parent else secrets.token_hex(16),
+                          secrets.token_hex(8))
+        token = _current_span.set(ctx)
+        started = time.time()
+        error = None
+        try:
+            yield ctx
+        except BaseException as e:
+            error = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._emit(name, ctx, parent, started, time.time() - started, attrs, error)
+
+    @contextmanager
+    def trace(self, name: str, **attrs) -> Iterator[Optional[SpanContext]]:
+        """Новая трасса (например, одна задача агента)"""
+        token = _current_span.set(None)
+        try:
+            with self.span(name, **attrs) as ctx:
+                yield ctx
+        finally:
+            _current_span.reset(token)
+
+    @contextmanager
+    def remote_parent(self, traceparent: Optional[str]) -> Iterator[None]:
+        """Продолжить трассу, начатую в другом процессе"""
+        remote = parse_traceparent(traceparent) if self.enabled else None
+        if remote is None:
+            yield
+            return
+        token = _current_span.set(remote)
+        try:
+            yield
+        finally:
+            _current_span.reset(token)
+
+    def inject(self) -> Dict[str, str]:
+        """Метаданные для передачи контекста в MCP-запросе"""
+        ctx = _current_span.get()
+        if not self.enabled or ctx is None:
+            return {}
+        return {'traceparent': ctx.traceparent}
+
+    def _emit(self, name: str, ctx: SpanContext, parent: Optional[SpanContext],
+              started: float, duration: float, attrs: Dict, error: Optional[str]):
+        # Отдельная дорожка на трассу: параллельные задачи не смешиваются
+        tid = int(ctx.trace_id[:7], 16)
+        if tid not in self._named_tracks:
+            self._named_tracks.add(tid)
+            self._writer.write({'ph': 'M', 'name': 'thread_name', 'pid': self.pid,
+                                'tid': tid, 'args': {'name': f"trace {ctx.trace_id[:8]}"}})
+        args = {'trace_id': ctx.trace_id, 'span_id': ctx.span_id, **attrs}
+        if parent:
+            args['parent_id'] = parent.span_id
+        if error:
+            args['error'] = error
+        self._writer.write({
+            'name': name, 'cat': self.service, 'ph': 'X',
+            'ts': int(started * 1_000_000), 'dur': int(duration * 1_000_000),
+            'pid': self.pid, 'tid': tid, 'args': args,
+        })
+
+    def close(self):
+        """Дописать буфер в файл"""
+        if self._writer:
+            self._writer.close()
+
+def get_tracer(service: str) -> Tracer:
+    """Трассировщик сервиса; включается переменной окружения TRACE_DIR"""
+    if service not in _tracers:
+        trace_dir = os.getenv('TRACE_DIR')
+        _tracers[service] = Tracer(service, Path(trace_dir) if trace_dir else None)
+    return _tracers[service]
+
+@atexit.register
+def _close_tracers():
+    for tracer in _tracers.values():
+        tracer.close()
+
+def load_events(path: Path) -> List[Dict]:
+    """Прочитать файл трассы (в том числе незакрытый массив)"""
+    text = Path(path).read_text(encoding='utf-8').strip()
+    if not text:
+        return []
+    data = json.loads(text if text.endswith(']') or text.endswith('}')
+                      else text.rstrip(',') + ']')
+    return data['traceEvents'] if isinstance(data, dict) else data
+
+def merge_traces(paths: List[Path], output: Path) -> int:
+    """Объединить файлы трасс нескольких процессов в один"""
+    events = [event for path in paths for event in load_events(path)]
+    Path(output).write_text(json.dumps({'traceEvents': events}, ensure_ascii=False),
+                            encoding='utf-8')
+    return len(events)
+
+def main():
+    parser = argparse.ArgumentParser(description="Утилиты трассировки")
+    sub = parser.add_subparsers(dest='command', required=True)
+    merge = sub.add_parser('merge', help="объединить файлы трасс")
+    merge.add_argument('files', nargs='+', type=Path)
+    merge.add_argument('-o', '--output', type=Path, default=Path('trace.json'))
+    args = parser.parse_args()
+
+    count = merge_traces(args.files, args.output)
+    print(f"✅ {count} событий -> {args.output}")
+
+if __name__ == '__main__':
+    main()
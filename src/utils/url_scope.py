@@ -0,0 +1,42 @@
+"""Область действия записей кэша: origin и шаблон маршрута"""
+import re
+from urllib.parse import urlsplit
+
+_UUID_RE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
+_HEX_RE = re.compile(r'^[0-9a-f]{16,}$', re.I)
+_NUM_RE = re.compile(r'^\d+$')
+
+def _normalize_segment(segment: str) -> str:
+    if _NUM_RE.match(segment):
+        return ':id'
+    if _UUID_RE.match(segment):
+        return ':uuid'
+    if _HEX_RE.match(segment):
+        return ':hash'
+    return segment
+
+def route_pattern(path: str) -> str:
+    """Шаблон маршрута: идентификаторы в пути заменяются плейсхолдерами
+
+    ``/users/42/orders/`` -> ``/users/:id/orders``
+    """
+    segments = [_normalize_segment(s) for s in path.split('/') if s]
+    return '/' + '/'.join(segments)
+
+def url_scope(url: str) -> str:
+    """Область кэша для URL: origin + шаблон маршрута
+
+    Query-параметры отбрасываются; hash-маршруты SPA (``#/path``) учитываются.
+    Для пустого или относительного URL возвращает пустую строку.
+    """
+    if not url:
+        return ''
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return ''
+
+    scope = f"{parts.scheme}://{parts.netloc.lower()}{route_pattern(parts.path)}"
+    fragment = parts.fragment.lstrip('!')
+    if fragment.startswith('/'):
+        scope += '#' + route_pattern(fragment.split('?', 1)[0])
+    return scope
@@ -0,0 +1,64 @@
+"""Тесты контроля допуска вызовов"""
+import asyncio
+
+import pytest
+
+from src.utils.admission import AdmissionController, Busy
+
+async def _call(controller, session, key, log, hold=0.01):
+    async with controller.admit(session, key) as ticket:
+        log.append(session)
+        await asyncio.sleep(hold)
+        return ticket
+
+@pytest.mark.asyncio
+async def test_same_page_serialized_and_fair_across_sessions():
+    """Тест: вызовы одной страницы идут по одному, сессии чередуются"""
+    controller = AdmissionController(max_concurrency=4, max_queue=100)
+    log = []
+    # Сессия "a" шлёт пачку раньше "b" — "b" не должна ждать всю пачку
+    tasks = [asyncio.create_task(_call(controller, "a", "page", log)) for _ in range(4)]
+    tasks += [asyncio.create_task(_call(controller, "b", "page", log)) for _ in range(2)]
+    tickets = await asyncio.gather(*tasks)
+
+    # После первого вызова "a" сессии чередуются
+    assert log == ["a", "a", "b", "a", "b", "a"]
+    assert tickets[-1].wait_ms > 0
+    assert controller.running == 0 and controller.admitted == 6
+
+@pytest.mark.asyncio
+async def test_global_cap_and_busy_rejection():
+    """Тест: не больше max_concurrency одновременно, сверх очереди — Busy"""
+    controller = AdmissionController(max_concurrency=2, max_queue=2)
+    peak = 0
+
+    async def job(i):
+        nonlocal peak
+        async with controller.admit(f"s{i}"):
+            peak = max(peak, controller.running)
+            await asyncio.sleep(0.02)
+
+    tasks = [asyncio.create_task(job(i)) for i in range(4)]
+    await asyncio.sleep(0)
+    with pytest.raises(Busy):
+        async with controller.admit("late"):
+            pass
+    await asyncio.gather(*tasks)
+
+    assert peak == 2
+    assert controller.rejected == 1 and controller.stats()["running"] == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    """Тест: отменённый вызов уходит из очереди и не занимает слот"""
+    controller = AdmissionController(max_concurrency=1, max_queue=10)
+    log = []
+    first = asyncio.create_task(_call(controller, "a", None, log, hold=0.05))
+    waiting = asyncio.create_task(_call(controller, "b", None, log))
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    await asyncio.gather(first, waiting, return_exceptions=True)
+    await _call(controller, "c", None, log)
+
+    assert log == ["a", "c"]
+    assert controller.waiting == 0 and controller.running == 0
@@ -0,0 +1,47 @@
+"""Тесты хранилища снимков авторизованных сессий"""
+import time
+
+import pytest
+
+from src.tools.auth_state import AuthStateStore
+
+STATE = {
+    "cookies": [{"name": "sid", "value": "abc", "domain": "example.com", "path": "/"}],
+    "origins": [{"origin": "https://example.com", "localStorage": [{"name": "t", "value": "1"}]}],
+}
+
+def test_save_load_and_list(tmp_path):
+    """Тест: сохранённый снимок загружается и виден в списке"""
+    store = AuthStateStore(tmp_path)
+    meta = store.save("admin", STATE, ttl=60, check={"url": "https://example.com/me"})
+
+    assert meta["cookies"] == 1
+    assert meta["origins"] == ["https://example.com"]
+    snapshot = store.load("admin")
+    assert snapshot["state"] == STATE
+    assert snapshot["meta"]["check"]["url"] == "https://example.com/me"
+    assert [m["name"] for m in store.list()] == ["admin"]
+
+def test_expired_snapshot_is_removed(tmp_path):
+    """Тест: просроченный снимок не загружается и удаляется с диска"""
+    store = AuthStateStore(tmp_path)
+    store.save("old", STATE, ttl=1)
+    store.save("fresh", STATE, ttl=60)
+
+    future = time.time() + 5
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(time, "time", lambda: future)
+        assert store.load("old") is None
+    assert not (tmp_path / "old.json").exists()
+    assert [m["name"] for m in store.list()] == ["fresh"]
+
+def test_invalidate_and_name_validation(tmp_path):
+    """Тест: удаление снимка и отказ для имени вне каталога"""
+    store = AuthStateStore(tmp_path)
+    store.save("user", STATE)
+
+    assert store.invalidate("user") is True
+    assert store.invalidate("user") is False
+    assert store.load("user") is None
+    with pytest.raises(ValueError):
+        store.save("../escape", STATE)
@@ -0,0 +1,34 @@
+"""Тесты для сводки сквозного бенчмарка"""
+import urllib.request
+
+import pytest
+
+from benchmarks.e2e import compare, parse_args, percentile, summarize
+from benchmarks.fixtures import FixtureServer, build_fixtures
+
+def test_percentiles_and_regression_check():
+    """Тест перцентилей и сравнения с прошлым прогоном"""
+    assert percentile([], 95) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50) == 3.0
+    assert percentile([1.0, 2.0], 50) == 1.5
+
+    baseline = summarize({"click": [0.1] * 10, "navigate": [0.5] * 10}, {}, 2.0)
+    current = summarize({"click": [0.2] * 10, "navigate": [0.5] * 10}, {"click": 1}, 2.0)
+
+    assert current["operations"]["click"]["p95_ms"] == 200.0
+    assert current["total"] == {"calls": 20, "errors": 1, "duration_s": 2.0, "throughput_ops": 10.0}
+    assert compare(current, baseline, threshold=0.2) == ["click"]
+
+def test_fixture_server_serves_pages():
+    """Тест раздачи фикстур локальным HTTP-сервером"""
+    with FixtureServer(build_fixtures(table_rows=10)) as base_url:
+        with urllib.request.urlopen(f"{base_url}/table.html") as response:
+            html = response.read().decode("utf-8")
+
+    assert html.count("<tr>") == 10
+
+def test_concurrency_above_one_is_rejected():
+    """Тест: клиенты делят активную вкладку, поэтому конкурентность > 1 отклоняется"""
+    assert parse_args([]).concurrency == 1
+    with pytest.raises(SystemExit):
+        parse_args(["--concurrency", "4"])
@@ -0,0 +1,64 @@
+"""Тесты для кэша селекторов"""
+import asyncio
+import json
+import time
+import pytest
+from src.utils.cache import CacheManager
+from src.utils.cache_backends import AppendLogBackend
+
+def test_append_log_last_write_wins(tmp_path):
+    """Тест чтения журнала: последняя запись побеждает, удаление учитывается"""
+    backend = AppendLogBackend(tmp_path / "cache.log")
+    now = time.time()
+    backend.write_batch({"click:Войти": {"value": "#old", "ts": now}})
+    backend.write_batch({
+        "click:Войти": {"value": "#login", "ts": now},
+        "fill:email": {"value": "[name=\"email\"]", "ts": now},
+    })
+    backend.write_batch({"fill:email": None})
+
+    # Оборванная строка от упавшего писателя не ломает чтение
+    with open(tmp_path / "cache.log", "a", encoding="utf-8") as f:
+        f.write('{"k": "click:Дале')
+
+    entries = AppendLogBackend(tmp_path / "cache.log").load()
+
+    assert list(entries) == ["click:Войти"]
+    assert entries["click:Войти"]["value"] == "#login"
+
+def test_append_log_compaction_and_ttl(tmp_path):
+    """Тест сжатия журнала с отбрасыванием устаревших записей"""
+    path = tmp_path / "cache.log"
+    backend = AppendLogBackend(path, ttl=60, compact_ratio=2.0, compact_min_lines=10)
+    now = time.time()
+    backend.write_batch({"stale": {"value": "#stale", "ts": now - 3600}})
+    for i in range(20):
+        backend.write_batch({"click:btn": {"value": f"#btn{i}", "ts": now}})
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) < 10
+    assert backend.load() == {"click:btn": {"value": "#btn19", "ts": now}}
+
+def test_append_log_imports_legacy_json(tmp_path):
+    """Тест миграции прежнего selector_cache.json"""
+    legacy = tmp_path / "selector_cache.json"
+    legacy.write_text(json.dumps({"click:Войти": "#login"}), encoding="utf-8")
+
+    backend = AppendLogBackend(tmp_path / "cache.log", legacy_file=legacy)
+
+    assert backend.load()["click:Войти"]["value"] == "#login"
+    assert (tmp_path / "cache.log").exists()
+
+@pytest.mark.asyncio
+async def test_cache_manager_write_behind(tmp_path):
+    """Тест отложенной записи: set не пишет на диск, save сбрасывает пачку"""
+    backend = AppendLogBackend(tmp_path / "cache.log")
+    cache = CacheManager(backend=backend)
+
+    cache.set("click:Войти", "#login")
+    await asyncio.sleep(0)
+    assert not (tmp_path / "cache.log").exists()
+    assert cache.get("click:Войти") == "#login"
+
+    await cache.save()
+    assert AppendLogBackend(tmp_path / "cache.log").load()["click:Войти"]["value"] == "#login"
@@ -0,0 +1,88 @@
+"""Тесты планировщика запросов к LLM"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.llm_scheduler import BATCH, INTERACTIVE, LLMScheduler, TokenBucket, retry_after
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry):
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after": str(retry)})
+
+def test_token_bucket_delay_and_refund():
+    """Тест: ведро токенов считает задержку и принимает возврат резерва"""
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])  # 1 в секунду
+    bucket.consume(60)
+    assert bucket.delay_for(2) == pytest.approx(2.0)
+    now[0] = 1.0
+    assert bucket.delay_for(1) == 0
+    bucket.refund(10)
+    assert bucket.delay_for(11) == 0
+
+@pytest.mark.asyncio
+async def test_priority_and_concurrency_cap():
+    """Тест: интерактивные запросы обгоняют пакетные, лимит параллельности соблюдён"""
+    scheduler = LLMScheduler(rpm=6000, tpm=10**6, max_concurrency=1)
+    order, active, peak = [], 0, 0
+
+    async def call(name):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        order.append(name)
+        return name
+
+    tasks = [asyncio.create_task(scheduler.run(lambda: call("first"), priority=BATCH))]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(scheduler.run(lambda n=n: call(n), priority=p))
+              for n, p in (("batch", BATCH), ("interactive", INTERACTIVE))]
+    await asyncio.gather(*tasks)
+
+    assert order == ["first", "interactive", "batch"]
+    assert peak == 1
+
+@pytest.mark.asyncio
+async def test_identical_inflight_requests_are_coalesced():
+    """Тест: одинаковые одновременные запросы уходят к LLM один раз"""
+    calls = 0
+
+    async def create(**kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(text=kwargs["messages"][0]["content"], usage=None)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    scheduler = LLMScheduler(rpm=6000, tpm=10**6)
+    request = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+    results = await asyncio.gather(*(scheduler.chat(client, **request) for _ in range(3)))
+
+    assert calls == 1 and scheduler.coalesced == 2
+    assert {r.text for r in results} == {"hi"}
+
+@pytest.mark.asyncio
+async def test_rate_limit_pauses_queue_and_retries():
+    """Тест: 429 ставит очередь на паузу по Retry-After и повторяет запрос"""
+    attempts = []
+
+    async def call():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise RateLimitError(0.05)
+        return "ok"
+
+    scheduler = LLMScheduler(rpm=6000, tpm=10**6)
+    result = await scheduler.run(call)
+
+    assert result == "ok" and scheduler.rate_limited == 1
+    assert attempts[1] - attempts[0] >= 0.05
+    assert retry_after(ValueError()) is None
+    assert retry_after(SimpleNamespace(status_code=503)) == 0.0
+    assert retry_after(SimpleNamespace(status_code=400)) is None
@@ -0,0 +1,28 @@
+"""Тесты для неблокирующего логирования"""
+import json
+import logging
+from src.utils.log_pipeline import configure_logging, log_context, shutdown_logging
+
+def test_json_records_with_context_and_rate_limit(tmp_path):
+    """Тест: JSON в файл, поля контекста, ограничение горячих сообщений"""
+    log_file = tmp_path / "test.log"
+    logger = configure_logging("test_pipeline", log_file=log_file,
+                               console=False, hot_rate=3)
+
+    with log_context(session="s1", tool="click"):
+        for i in range(10):
+            logger.info(f"Tool called: click #{i}", extra={"hot": True})
+        logger.error("boom", exc_info=ValueError("bad selector"))
+    logger.info("after")
+    shutdown_logging()
+    logging.getLogger("test_pipeline").handlers.clear()
+
+    records = [json.loads(line) for line in log_file.read_text(encoding="utf-8").splitlines()]
+
+    assert [r["msg"] for r in records] == [
+        "Tool called: click #0", "Tool called: click #1", "Tool called: click #2",
+        "boom", "after"
+    ]
+    assert records[0]["session"] == "s1" and records[0]["tool"] == "click"
+    assert "ValueError" in records[3]["exc"]
+    assert "tool" not in records[4]
@@ -0,0 +1,43 @@
+"""Тесты монитора задержек event loop"""
+import asyncio
+import time
+import pytest
+from src.utils.loop_monitor import LoopMonitor, percentile
+
+def blocking_parse():
+    time.sleep(0.3)
+
+@pytest.mark.asyncio
+async def test_stall_is_captured_with_blocking_stack():
+    """Тест: синхронный вызов в корутине попадает в отчёт со своим стеком"""
+    monitor = LoopMonitor(interval=0.01, threshold=0.1)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        blocking_parse()
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["stalls"] == 1
+    stall = stats["recent_stalls"][0]
+    assert any("blocking_parse" in line for line in stall["stack"])
+    assert stall["duration_ms"] >= 250
+    assert stats["max_lag_ms"] >= 250
+    assert "stalls=1" in monitor.report()
+
+def test_percentile_nearest_rank():
+    """Тест: перцентиль по ближайшему рангу"""
+    values = sorted(float(v) for v in range(1, 101))
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+def test_disabled_by_default(monkeypatch):
+    """Тест: монитор включается только переменной окружения"""
+    monkeypatch.delenv("LOOP_MONITOR", raising=False)
+    assert LoopMonitor.from_env() is None
+    monkeypatch.setenv("LOOP_MONITOR", "true")
+    monkeypatch.setenv("LOOP_STALL_MS", "250")
+    assert LoopMonitor.from_env().threshold == 0.25
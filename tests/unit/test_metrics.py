@@ -0,0 +1,34 @@
+"""Тесты экспорта метрик Prometheus"""
+import pytest
+
+pytest.importorskip("prometheus_client")
+from prometheus_client.parser import text_string_to_metric_families
+from starlette.testclient import TestClient
+
+import server
+from src.core.transports import open_session
+
+def scrape(client):
+    """Снимок /metrics: {(имя сэмпла, метки): значение}"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return {(sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(response.text)
+            for sample in family.samples}
+
+@pytest.mark.asyncio
+async def test_tool_call_is_counted_and_timed():
+    """Тест: вызов инструмента увеличивает счётчик и гистограмму задержки в /metrics"""
+    client = TestClient(server.starlette_app)
+    labels = (("tool", "stop_recording"),)
+    before = scrape(client)
+
+    async with open_session("inprocess") as session:
+        result = await session.call_tool("stop_recording", {})
+    assert not result.isError
+
+    after = scrape(client)
+    for name in ("mcp_tool_calls_total", "mcp_tool_latency_seconds_count"):
+        assert after[(name, labels)] == before.get((name, labels), 0) + 1
+    assert after[("mcp_tool_latency_seconds_sum", labels)] > before.get(
+        ("mcp_tool_latency_seconds_sum", labels), 0)
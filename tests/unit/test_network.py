@@ -0,0 +1,123 @@
+"""Тесты для фильтрации запросов и кэша статики"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.tools.network import AssetCache, ResourcePolicy
+
+class FakeRequest:
+    def __init__(self, url, resource_type, method="GET"):
+        self.url = url
+        self.resource_type = resource_type
+        self.method = method
+
+class FakeResponse:
+    status = 200
+    headers = {"content-type": "text/javascript", "content-encoding": "gzip",
+               "cache-control": "public, max-age=600"}
+
+    async def body(self):
+        return b"console.log(1)"
+
+class FakeRoute:
+    def __init__(self):
+        self.outcome = None
+        self.fetches = 0
+
+    async def abort(self, error_code=None):
+        self.outcome = ("abort", error_code)
+
+    async def continue_(self):
+        self.outcome = ("continue",)
+
+    async def fetch(self):
+        self.fetches += 1
+        return FakeResponse()
+
+    async def fulfill(self, **kwargs):
+        self.outcome = ("fulfill", kwargs)
+
+@pytest.mark.asyncio
+async def test_policy_blocks_types_and_patterns():
+    """Тест блокировки по типу ресурса и шаблону URL"""
+    policy = ResourcePolicy(block_types=["image"], block_patterns=[r"mc\.yandex\.ru"])
+
+    for url, resource_type, expected in [
+        ("https://site.test/logo.png", "image", "abort"),
+        ("https://mc.yandex.ru/watch.js", "script", "abort"),
+        ("https://site.test/app.js", "script", "continue"),
+    ]:
+        route = FakeRoute()
+        await policy.handle(route, FakeRequest(url, resource_type))
+        assert route.outcome[0] == expected
+
+    assert policy.stats.blocked == 2
+    assert policy.stats.blocked_by_type == {"image": 1, "script": 1}
+
+@pytest.mark.asyncio
+async def test_asset_cache_shared_between_policies(tmp_path):
+    """Тест: статика, скачанная одним контекстом, отдаётся другому с диска"""
+    request = FakeRequest("https://site.test/app.js", "script")
+    first = ResourcePolicy(cache=AssetCache(tmp_path))
+    second = ResourcePolicy(cache=AssetCache(tmp_path))
+
+    miss = FakeRoute()
+    await first.handle(miss, request)
+    hit = FakeRoute()
+    await second.handle(hit, request)
+
+    assert miss.fetches == 1 and first.stats.cache_stores == 1
+    assert hit.fetches == 0 and second.stats.cache_hits == 1
+    kind, kwargs = hit.outcome
+    assert kwargs["body"] == b"console.log(1)"
+    assert "content-encoding" not in kwargs["headers"]
+
+def test_asset_cache_respects_no_store(tmp_path):
+    """Тест: ответы с no-store не кэшируются"""
+    cache = AssetCache(tmp_path)
+    assert not cache.put("https://site.test/a.js", 200, {"cache-control": "no-store"}, b"x")
+    assert cache.get("https://site.test/a.js") is None
+
+def test_asset_cache_concurrent_puts_of_same_url(tmp_path):
+    """Тест: одновременная запись одного URL из нескольких потоков не падает"""
+    cache = AssetCache(tmp_path)
+    headers = {"cache-control": "max-age=600"}
+
+    def put_many(_):
+        for _ in range(50):
+            assert cache.put("https://site.test/app.js", 200, headers, b"x" * 1000)
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(put_many, range(4)))
+    assert cache.get("https://site.test/app.js")[2] == b"x" * 1000
+
+def test_asset_cache_prunes_expired_and_oldest(tmp_path):
+    """Тест: чистка удаляет истёкшие записи и самые старые сверх предела"""
+    cache = AssetCache(tmp_path, max_bytes=2500, prune_every=0)
+    cache.put("https://site.test/old.js", 200, {"cache-control": "max-age=1"}, b"o" * 1000)
+    for i, name in enumerate(("a", "b", "c")):
+        url = f"https://site.test/{name}.js"
+        cache.put(url, 200, {}, b"x" * 1000)
+        _, body_path = cache._paths(url)
+        os.utime(body_path, (time.time() + i, time.time() + i))
+    meta_path, _ = cache._paths("https://site.test/old.js")
+    meta_path.write_text(meta_path.read_text().replace('"expires": ', '"expires": -'))
+
+    assert cache.prune() == 2
+    assert [cache.get(f"https://site.test/{n}.js") is not None for n in "abc"] == \
+        [False, True, True]
+    assert not list(tmp_path.glob("*/*.tmp"))
+
+@pytest.mark.asyncio
+async def test_cache_write_error_still_fulfills(tmp_path, monkeypatch):
+    """Тест: ошибка записи в кэш не оставляет запрос браузера без ответа"""
+    cache = AssetCache(tmp_path)
+
+    def broken_put(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cache, "put", broken_put)
+    route = FakeRoute()
+    await ResourcePolicy(cache=cache).handle(route, FakeRequest("https://site.test/app.js", "script"))
+    assert route.outcome[0] == "fulfill"
@@ -0,0 +1,20 @@
+"""Тесты для статистики процессов"""
+import os
+import subprocess
+import sys
+import pytest
+from src.utils.process_stats import browser_rss_bytes, descendant_pids, process_rss_bytes
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="нужен /proc")
+
+def test_child_process_rss():
+    """Тест поиска дочерних процессов и подсчёта их RSS"""
+    child = subprocess.Popen(["sleep", "5"])
+    try:
+        assert child.pid in descendant_pids(os.getpid())
+        assert process_rss_bytes(child.pid) > 0
+        assert browser_rss_bytes(markers=("sleep",)) >= process_rss_bytes(child.pid)
+        assert browser_rss_bytes(markers=("no-such-browser",)) == 0
+    finally:
+        child.kill()
+        child.wait()
@@ -0,0 +1,44 @@
+"""Тесты профилирования по запросу"""
+import asyncio
+import pstats
+
+import pytest
+
+from src.utils.profiling import OnDemandProfiler
+
+def _busy_work():
+    return sum(i * i for i in range(20000))
+
+@pytest.mark.asyncio
+async def test_profile_next_calls_writes_prof_file(tmp_path):
+    """Тест: профиль до N вызовов попадает в отчёт и в файл .prof"""
+    profiler = OnDemandProfiler(tmp_path)
+
+    async def calls():
+        await asyncio.sleep(0.01)
+        for _ in range(2):
+            _busy_work()
+            profiler.call_finished()
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(calls())
+    report = await profiler.run(calls=2, timeout=5, top=50, sort="tottime")
+    await task
+
+    assert report["tool_calls"] == 2
+    assert not profiler.armed
+    assert any("_busy_work" in f["function"] for f in report["top"])
+    assert pstats.Stats(report["file"]).total_calls > 0
+
+@pytest.mark.asyncio
+async def test_profile_rejects_concurrent_runs(tmp_path):
+    """Тест: второй профиль, пока идёт первый, отклоняется"""
+    profiler = OnDemandProfiler(tmp_path)
+
+    first = asyncio.create_task(profiler.run(seconds=0.05))
+    await asyncio.sleep(0.01)
+    with pytest.raises(RuntimeError):
+        await profiler.run(seconds=0.01)
+    report = await first
+
+    assert report["tool_calls"] == 0 and report["duration_s"] >= 0.05
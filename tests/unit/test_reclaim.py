@@ -0,0 +1,48 @@
+"""Тесты решений об освобождении ресурсов браузера"""
+from src.utils.reclaim import ReclaimPolicy, Reclaimer
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_idle_tabs_skip_active_and_recent():
+    """Тест: закрываются только неактивные вкладки, простаивающие дольше порога"""
+    clock = FakeClock()
+    reclaimer = Reclaimer(ReclaimPolicy(idle_tab_s=60), clock=clock)
+    reclaimer.touch("tab1")
+    reclaimer.touch("tab2")
+    clock.now += 50
+    reclaimer.touch("tab3")
+    clock.now += 20
+
+    assert reclaimer.idle_tabs(["tab1", "tab2", "tab3"], active="tab1") == ["tab2"]
+
+def test_browser_idle_and_rss_limit():
+    """Тест: простой браузера и превышение RSS; 0 выключает проверку"""
+    clock = FakeClock()
+    reclaimer = Reclaimer(ReclaimPolicy(idle_browser_s=300, rss_limit_bytes=100), clock=clock)
+    clock.now += 299
+    assert not reclaimer.browser_idle()
+    clock.now += 1
+    assert reclaimer.browser_idle()
+    assert reclaimer.over_limit(101) and not reclaimer.over_limit(100)
+
+    disabled = Reclaimer(ReclaimPolicy(idle_tab_s=0, idle_browser_s=0), clock=clock)
+    clock.now += 10 ** 6
+    assert not disabled.browser_idle()
+    assert not disabled.over_limit(10 ** 12)
+    assert disabled.idle_tabs(["tab1"], active=None) == []
+
+def test_events_are_counted_and_bounded():
+    """Тест: события считаются по видам, журнал ограничен по длине"""
+    reclaimer = Reclaimer(history=2)
+    reclaimer.record("recycled", reason="rss", rss_bytes=500)
+    reclaimer.record("tabs_closed", tab_id="tab2")
+    reclaimer.record("tabs_closed", tab_id="tab3")
+
+    stats = reclaimer.stats()
+    assert stats["recycled"] == 1 and stats["tabs_closed"] == 2
+    assert [e.get("tab_id") for e in stats["events"]] == ["tab2", "tab3"]
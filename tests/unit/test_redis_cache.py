@@ -0,0 +1,103 @@
+"""Тесты для общего кэша селекторов в Redis"""
+import asyncio
+import fnmatch
+import pytest
+from src.utils.cache import CacheManager
+from src.utils.cache_backends import RedisBackend
+
+class FakeRedis:
+    """Заглушка Redis в памяти: общий словарь и синхронная доставка pub/sub"""
+
+    def __init__(self, data=None, channels=None):
+        self.data = {} if data is None else data
+        self.channels = {} if channels is None else channels
+
+    def connect(self):
+        """Новое «подключение» к тому же серверу"""
+        return FakeRedis(self.data, self.channels)
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def set(self, name, value, ex=None):
+        self.data[name] = value
+
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+
+    def scan_iter(self, match="*", count=None):
+        return [n for n in list(self.data) if fnmatch.fnmatchcase(n, match)]
+
+    def publish(self, channel, message):
+        for handler in self.channels.get(channel, []):
+            handler({"type": "message", "channel": channel, "data": message})
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+    def close(self):
+        pass
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args, **kwargs)
+                for name, args, kwargs in self.calls]
+
+class FakePubSub:
+    def __init__(self, client):
+        self.client = client
+
+    def subscribe(self, **handlers):
+        for channel, handler in handlers.items():
+            self.client.channels.setdefault(channel, []).append(handler)
+
+    def run_in_thread(self, sleep_time=0, daemon=False):
+        return self
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_redis_backend_pipelined_load():
+    """Тест пакетной загрузки записей через pipeline"""
+    backend = RedisBackend(FakeRedis(), batch_size=2)
+    backend.write_batch({f"click:btn{i}": {"value": f"#btn{i}", "ts": 1.0} for i in range(5)})
+    backend.write_batch({"click:btn0": None})
+
+    entries = backend.load()
+
+    assert len(entries) == 4
+    assert entries["click:btn4"]["value"] == "#btn4"
+
+@pytest.mark.asyncio
+async def test_shared_cache_between_agents():
+    """Тест: селектор, выученный одним агентом, виден другому, L1 инвалидируется"""
+    server = FakeRedis()
+    first = CacheManager(backend=RedisBackend(server.connect()))
+    second = CacheManager(backend=RedisBackend(server.connect()))
+    await first.load()
+    await second.load()
+
+    first.set("click:Войти", "#login")
+    await first.save()
+    assert await second.fetch("click:Войти") == "#login"
+
+    first.set("click:Войти", "#sign-in")
+    await first.save()
+    await asyncio.sleep(0)  # доставка инвалидации в event loop
+
+    assert "click:Войти" not in second.entries
+    assert await second.fetch("click:Войти") == "#sign-in"
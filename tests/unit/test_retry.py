@@ -0,0 +1,111 @@
+"""Тесты повторов с дедлайном, размыкателя цепи и классификации ошибок"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.tools.errors import classify_error, tool_error
+from src.tools.waiting import WaitTimeout
+from src.utils.retry import (CircuitBreaker, CircuitOpen, DeadlineExceeded, FatalError,
+                             RetryableError, retry_call)
+
+def _flaky(failures, error=RetryableError):
+    calls = []
+
+    async def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error("boom")
+        return "ok"
+    return func, calls
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_and_fails_fast_on_fatal():
+    """Тест: временные ошибки повторяются, фатальные и чужие — пробрасываются сразу"""
+    func, calls = _flaky(2)
+    assert await retry_call(func, attempts=3, delay=0.001) == "ok"
+    assert len(calls) == 3
+
+    func, calls = _flaky(5, FatalError)
+    with pytest.raises(FatalError):
+        await retry_call(func, attempts=3, delay=0.001)
+    assert len(calls) == 1
+
+    func, calls = _flaky(5, KeyError)
+    with pytest.raises(KeyError):
+        await retry_call(func, attempts=3, delay=0.001, retry_on=(RetryableError,))
+    assert len(calls) == 1
+
+    func, calls = _flaky(0)
+    with pytest.raises(ValueError):
+        await retry_call(func, attempts=0)
+    assert not calls
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_total_time():
+    """Тест: вызовы и паузы укладываются в общий дедлайн"""
+    async def slow():
+        await asyncio.sleep(1)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(DeadlineExceeded):
+        await retry_call(slow, attempts=5, delay=0.01, deadline=0.05)
+    assert loop.time() - started < 0.5
+
+    # Пауза перед повтором не влезает в остаток бюджета — сдаёмся сразу
+    func, calls = _flaky(5)
+    with pytest.raises(DeadlineExceeded):
+        await retry_call(func, attempts=5, delay=1.0, jitter=False, deadline=0.2)
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_and_half_opens():
+    """Тест: цепь размыкается после серии сбоев и пропускает одну пробную попытку"""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    func, calls = _flaky(10)
+
+    with pytest.raises(RetryableError):
+        await retry_call(func, attempts=2, delay=0.001, breaker=breaker, key="#btn")
+    assert breaker.state("#btn") == "open"
+    with pytest.raises(CircuitOpen):
+        await retry_call(func, attempts=2, breaker=breaker, key="#btn")
+    assert len(calls) == 2
+    assert breaker.allow("#other")
+
+    now[0] = 11
+    assert breaker.allow("#btn") and not breaker.allow("#btn")  # одна пробная попытка
+    breaker.record_success("#btn")
+    assert breaker.state("#btn") == "closed"
+
+def test_error_classification_and_result_parsing():
+    """Тест: классификация ошибок и разбор результата вызова, включая старый формат"""
+    assert classify_error(WaitTimeout("late")) == {"type": "WaitTimeout", "retryable": True}
+    assert classify_error(WaitTimeout(
+        "Timeout 5000ms exceeded while waiting for selector=#ok (visible)"))["retryable"] is False
+    assert classify_error(Exception("Target closed"))["retryable"] is True
+    assert classify_error(Exception("page.goto: net::ERR_NAME_NOT_RESOLVED"))["retryable"] is False
+    assert classify_error(KeyError("url"))["retryable"] is False
+
+    ok = SimpleNamespace(isError=False, meta=None, content=[SimpleNamespace(text="Clicked")])
+    failed = SimpleNamespace(isError=True, meta={"error": {"type": "TimeoutError", "retryable": True}},
+                             content=[SimpleNamespace(text="Error: Timeout")])
+    legacy = SimpleNamespace(content=[SimpleNamespace(text="Error: boom")])
+    assert tool_error(ok) is None
+    assert tool_error(failed)["retryable"] is True
+    assert tool_error(legacy) == {"type": "Error", "retryable": False}
+
+def test_selector_timeout_fails_fast():
+    """Тест: таймаут поиска элемента не повторяется, таймаут навигации — повторяется"""
+    TimeoutError = type("TimeoutError", (Exception,), {})  # как playwright._impl._errors
+    missing = TimeoutError(
+        "Page.click: Timeout 5000ms exceeded.\nCall log:\n"
+        "  - waiting for locator(\"#no-such-button\")\n")
+    navigation = TimeoutError(
+        "Page.goto: Timeout 30000ms exceeded.\nCall log:\n"
+        "  - navigating to \"https://example.com/\", waiting until \"load\"\n")
+
+    assert classify_error(missing) == {"type": "TimeoutError", "retryable": False}
+    assert classify_error(navigation) == {"type": "TimeoutError", "retryable": True}
+    assert classify_error(Exception("Timeout while talking to upstream"))["retryable"] is False
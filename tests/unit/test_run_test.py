@@ -0,0 +1,50 @@
+"""Тесты параллельного раннера записанных тестов"""
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from run_test import (TestResult, failed_tests, order_by_duration, run_tests, shard,
+                      update_history, write_json, write_junit)
+
+def test_order_and_shard_balance_by_history():
+    """Тест: долгие тесты идут первыми, шарды сбалансированы по истории"""
+    tests = [Path(f"t{i}.py") for i in range(6)]
+    history = {"t0.py": 10.0, "t1.py": 1.0, "t2.py": 9.0, "t3.py": 2.0}
+
+    ordered = order_by_duration(tests, history)
+    assert [t.name for t in ordered[:2]] == ["t0.py", "t2.py"]
+
+    shards = [shard(tests, history, i, 2) for i in (1, 2)]
+    assert sorted(t.name for s in shards for t in s) == sorted(t.name for t in tests)
+    loads = [sum(history.get(t.name, 5.5) for t in s) for s in shards]
+    assert abs(loads[0] - loads[1]) <= 2
+
+def test_update_history_skips_timeouts():
+    """Тест: таймауты не портят историю длительностей"""
+    results = [TestResult("a.py", "a.py", "passed", 4.0),
+               TestResult("b.py", "b.py", "timeout", 300.0)]
+    history = update_history({"a.py": 2.0}, results)
+    assert history == {"a.py": 3.0}
+
+@pytest.mark.asyncio
+async def test_run_tests_reports_and_rerun(tmp_path):
+    """Тест: статусы прогона, отчёты JUnit и JSON, список упавших для перезапуска"""
+    (tmp_path / "ok.py").write_text("print('ok')\n")
+    (tmp_path / "bad.py").write_text("raise SystemExit(3)\n")
+    (tmp_path / "slow.py").write_text("import time; time.sleep(5)\n")
+    tests = sorted(tmp_path.glob("*.py"))
+
+    results = await run_tests(tests, workers=3, timeout=1.0)
+    statuses = {r.name: r.status for r in results}
+    assert statuses == {"bad.py": "failed", "ok.py": "passed", "slow.py": "timeout"}
+
+    write_junit(results, tmp_path / "junit.xml")
+    suite = ET.parse(tmp_path / "junit.xml").getroot()
+    assert suite.get("tests") == "3" and suite.get("failures") == "1" and suite.get("errors") == "1"
+
+    write_json(results, tmp_path / "results.json", duration=1.5)
+    report = json.loads((tmp_path / "results.json").read_text())
+    assert report["summary"] == {"passed": 1, "failed": 1, "timeout": 1}
+    assert [p.name for p in failed_tests(tmp_path / "results.json", tmp_path)] == ["bad.py", "slow.py"]
@@ -32,3 +32,22 @@ async def test_find_email_selectors():
 
     assert len(selectors) > 0
     assert any('email' in s for s in selectors)
+
+@pytest.mark.asyncio
+async def test_page_fingerprint_ignores_links():
+    """Тест: отпечаток зависит от формы, но не от списка ссылок"""
+    form = '<input name="q"><button>Найти</button>'
+    first = await AdaptiveSelectorAnalyzer.analyze_page_structure(
+        form + '<a href="/1">Новость 1</a>', 'https://example.com/'
+    )
+    second = await AdaptiveSelectorAnalyzer.analyze_page_structure(
+        form + '<a href="/2">Новость 2</a>', 'https://example.com/'
+    )
+    other = await AdaptiveSelectorAnalyzer.analyze_page_structure(
+        '<input name="login"><button>Войти</button>'
+    )
+
+    assert first['fingerprint'] == second['fingerprint']
+    assert first['fingerprint'] != other['fingerprint']
+    assert AdaptiveSelectorAnalyzer.selector_present('[name="q"]', first)
+    assert not AdaptiveSelectorAnalyzer.selector_present('text="Войти"', first)
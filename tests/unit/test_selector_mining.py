@@ -0,0 +1,45 @@
+"""Тесты офлайн-сбора селекторов по снимкам"""
+import json
+
+from src.tools.selector_mining import aggregate, candidates_from_analysis, mine_directory
+
+LOGIN = """<!-- saved from url=(0030)https://app.test/login?next=1 -->
+<html><body>
+<input id="{id}" name="email" placeholder="Email">
+<input data-testid="password" type="password">
+<button>Войти</button>
+</body></html>"""
+
+def test_mine_directory_aggregates_stable_selectors(tmp_path):
+    """Тест: устойчивые селекторы собираются по области URL"""
+    # Два снимка одной страницы: id поля генерируется, name — стабилен
+    (tmp_path / "a.html").write_text(LOGIN.format(id="input-17"), encoding="utf-8")
+    (tmp_path / "b.html").write_text(LOGIN.format(id="input-42"), encoding="utf-8")
+    (tmp_path / "c.html").write_text("<html><button>Ok</button></html>", encoding="utf-8")
+    (tmp_path / "orders.html").write_text("<button>Оплатить</button>", encoding="utf-8")
+    (tmp_path / "orders.json").write_text(json.dumps({"url": "https://app.test/orders/123"}))
+
+    entries, stats = mine_directory(tmp_path, workers=2, min_support=2)
+
+    assert stats == {"files": 4, "skipped": 1, "scopes": 2, "entries": len(entries)}
+    assert entries["https://app.test/login|fill:email"]["value"] == '[name="email"]'
+    assert entries["https://app.test/login|fill:password"]["value"] == '[data-testid="password"]'
+    assert entries["https://app.test/login|click:Войти"]["support"] == 2
+    # Встретился на одной странице — ниже порога
+    assert "https://app.test/orders/:id|click:Оплатить" not in entries
+
+def test_aggregate_rejects_unstable_selectors():
+    """Тест: редкие и спорные селекторы отбрасываются"""
+    scope = "https://app.test/form"
+    results = [(scope, [(scope, "fill", "q", f"#q{i % 3}")]) for i in range(6)]
+    assert aggregate(results, min_support=2, min_ratio=0.6) == {}
+    entries = aggregate(results, min_support=2, min_ratio=0.3)
+    assert entries[f"{scope}|fill:q"]["pages"] == 6
+
+def test_buttons_without_text_are_skipped():
+    """Тест: кнопки без текста не дают общий ключ click: на всю область"""
+    scope = "https://app.test/form"
+    analysis = {"buttons": [{"text": "", "selector": "button.icon"},
+                            {"text": "  ", "selector": "button.close"},
+                            {"text": " Ok ", "selector": "button.ok"}]}
+    assert candidates_from_analysis(analysis, scope) == [(scope, "click", "Ok", "button.ok")]
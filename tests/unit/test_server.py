@@ -0,0 +1,221 @@
+"""Тесты инструментов сервера на поддельной странице"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from src.utils.reclaim import ReclaimPolicy, Reclaimer
+
+class FakePage:
+    """Страница, запоминающая вызовы Playwright"""
+
+    def __init__(self, context=None, url="about:blank"):
+        self.context = context
+        self.url = url
+        self.calls = []
+        self.handlers = {}
+        self.closed = False
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def emit(self, event, *args):
+        for handler in self.handlers.get(event, []):
+            handler(*args)
+
+    async def goto(self, url, wait_until, timeout=30000):
+        self.calls.append(("goto", wait_until, timeout))
+        self.url = url
+
+    async def wait_for_url(self, url, timeout):
+        if url != self.url:
+            raise TimeoutError(f"waiting for url {url}")
+
+    async def evaluate(self, script):
+        return {"url": self.url}
+
+    async def open_popup(self, url):
+        """Как target=_blank: событие page у контекста, затем popup у страницы"""
+        popup = await self.context.new_page()
+        popup.url = url
+        self.emit("popup", popup)
+        return popup
+
+    async def wait_for_load_state(self, state, timeout):
+        self.calls.append(("load_state", state, timeout))
+
+    async def bring_to_front(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+        self.emit("close", self)
+
+class FakeContext:
+    """Контекст браузера: вкладки и cookies без Playwright"""
+
+    def __init__(self, storage_state=None):
+        self.storage = storage_state
+        self.pages = []
+        self.handlers = {}
+        self.closed = False
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        # Playwright сообщает о вкладке до того, как new_page() вернёт её
+        for handler in self.handlers.get("page", []):
+            handler(page)
+        return page
+
+    async def storage_state(self):
+        return self.storage
+
+    async def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.closed = False
+
+    async def new_context(self, viewport, storage_state=None):
+        context = FakeContext(storage_state)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        await asyncio.sleep(0.02)  # вызовы в это время должны ждать перезапуска
+        self.closed = True
+        for page in self.contexts[-1].pages:
+            page.closed = True
+
+@pytest.fixture
+def page(monkeypatch):
+    """Активная вкладка без настоящего браузера"""
+    state = server.AppState()
+    monkeypatch.setattr(server, "app_state", state)
+    page = FakePage()
+    state.browser = object()
+    state.context = FakeContext()
+    server._activate_tab(server._register_tab(page))
+    return page
+
+@pytest.mark.asyncio
+async def test_navigate_uses_condition_timeout_as_deadline(page):
+    """Тест: timeout_ms из wait_until ограничивает и goto, а не только ожидание после"""
+    result = await server._dispatch_tool("navigate", {
+        "url": "https://example.com/",
+        "wait_until": {"load_state": "load", "timeout_ms": 15000}
+    })
+
+    assert not getattr(result, "isError", False)
+    assert page.calls == [("goto", "load", 15000)]
+
+@pytest.mark.asyncio
+async def test_rss_recycle_restores_session_and_blocks_calls(monkeypatch):
+    """Тест: перезапуск по RSS сохраняет cookies, вкладки и активную вкладку"""
+    state = server.AppState()
+    monkeypatch.setattr(server, "app_state", state)
+    monkeypatch.setattr(server, "reclaimer", Reclaimer(ReclaimPolicy(rss_limit_bytes=100)))
+    monkeypatch.setattr(server, "browser_rss_bytes", lambda: 1000)
+    browsers = []
+
+    async def launch(**kwargs):
+        browsers.append(FakeBrowser())
+        return browsers[-1]
+
+    state.playwright = SimpleNamespace(chromium=SimpleNamespace(launch=launch))
+    await server.init_browser()
+    cookies = {"cookies": [{"name": "sid", "value": "1"}], "origins": []}
+    state.context.storage = cookies
+    for name, arguments in (("navigate", {"url": "https://a.example.com/"}),
+                            ("open_tab", {"url": "https://b.example.com/"}),
+                            ("switch_tab", {"tab_id": "tab1"})):
+        result = await server._dispatch_tool(name, arguments)
+        assert not getattr(result, "isError", False), result
+    old_page = state.page
+
+    recycle = asyncio.create_task(server._reclaim_once())
+    await asyncio.sleep(0.01)
+    # Вызов во время перезапуска ждёт его и выполняется уже в новом браузере
+    result = await server._dispatch_tool("navigate", {"url": "https://a.example.com/next"})
+    await recycle
+
+    assert not getattr(result, "isError", False)
+    assert len(browsers) == 2 and browsers[0].closed
+    assert state.context.storage == cookies
+    assert state.preserved is None
+    assert {tab_id: page.url for tab_id, page in state.tabs.items()} == {
+        "tab1": "https://a.example.com/next", "tab2": "https://b.example.com/"}
+    assert state.active_tab == "tab1" and state.page is not old_page
+    assert state.tab_seq == 2 and len(browsers[1].contexts[0].pages) == 2
+    assert old_page.calls == [("goto", "domcontentloaded", 30000)]
+    assert server.reclaimer.stats()["recycled"] == 1
+
+@pytest.mark.asyncio
+async def test_only_popups_are_registered_implicitly(page):
+    """Тест: вкладки navigate_many не попадают в список, всплывающие окна попадают"""
+    server.app_state.browser = FakeBrowser()
+    server.app_state.context = page.context = await server._new_context()
+    result = await server._dispatch_tool("navigate_many", {"urls": ["https://a.example.com/"]})
+    assert not getattr(result, "isError", False)
+    assert list(server.app_state.tabs) == ["tab1"]
+    assert server.app_state.tab_seq == 1
+
+    popup = await page.open_popup("https://b.example.com/")
+    assert server.app_state.tabs == {"tab1": page, "tab2": popup}
+    assert server.app_state.active_tab == "tab1"
+
+def test_explicit_tab_id_renames_known_page(page, monkeypatch):
+    """Тест: явный идентификатор заменяет уже выданный той же вкладке"""
+    monkeypatch.setattr(server, "reclaimer", Reclaimer())
+    server.reclaimer.touch("tab1")
+    assert server._register_tab(page, "tab7") == "tab7"
+    assert server.app_state.tabs == {"tab7": page}
+    assert server.app_state.active_tab == "tab7"
+    assert "tab1" not in server.reclaimer.tab_used
+
+class FakeAuthStates:
+    """Хранилище с одним снимком входа; logged_in — условие проверки"""
+
+    def __init__(self):
+        self.logged_in = None
+        self.invalidated = []
+
+    def load(self, name):
+        check = {"url": "https://app.example.com/account", "logged_in": self.logged_in}
+        return {"state": {"cookies": []}, "meta": {"check": check}}
+
+    def invalidate(self, name):
+        self.invalidated.append(name)
+        return True
+
+@pytest.mark.asyncio
+async def test_auth_state_check_runs_before_context_swap(page, monkeypatch):
+    """Тест: при выходе из аккаунта прежний контекст остаётся, при входе — заменяется"""
+    auth_states = FakeAuthStates()
+    monkeypatch.setattr(server, "auth_states", auth_states)
+    monkeypatch.setattr(server, "reclaimer", Reclaimer())
+    server.reclaimer.touch("tab1")
+    server.app_state.browser = browser = FakeBrowser()
+    old_context = server.app_state.context
+
+    # Снимок устарел: ожидаемый после входа адрес не открылся
+    auth_states.logged_in = {"url": "https://app.example.com/home"}
+    result = await server._dispatch_tool("load_auth_state", {"name": "app"})
+    assert getattr(result, "isError", False)
+    assert auth_states.invalidated == ["app"] and browser.contexts[-1].closed
+    assert server.app_state.context is old_context and server.app_state.page is page
+
+    # Снимок рабочий: старые вкладки забыты, новая активна
+    auth_states.logged_in = None
+    result = await server._dispatch_tool("load_auth_state", {"name": "app"})
+    assert not getattr(result, "isError", False), result
+    assert old_context.closed and server.app_state.context is browser.contexts[-1]
+    assert list(server.app_state.tabs) == ["tab2"] and server.app_state.active_tab == "tab2"
+    assert list(server.reclaimer.tab_used) == ["tab2"]
@@ -0,0 +1,39 @@
+"""Тесты архива снимков страниц"""
+import pytest
+
+from src.tools.snapshot_archive import SnapshotArchive
+
+PAGE = "<html><body>" + "<div class='row'>строка</div>" * 500 + "</body></html>"
+
+def test_dedup_compression_and_index(tmp_path):
+    """Тест: одинаковые снимки хранятся один раз, индекс находит их по прогону"""
+    archive = SnapshotArchive(tmp_path, codec="zlib")
+    first = archive.put(PAGE, run_id="r1", step=0, url="https://a.test/", kind="pre_action")
+    second = archive.put(PAGE, run_id="r2", step=3, url="https://a.test/", kind="read_page")
+    other = archive.put("<html>other</html>", run_id="r2", step=4, url="https://a.test/x")
+
+    assert first == second != other
+    assert archive.get(first) == PAGE
+    assert [r["step"] for r in archive.find(run_id="r2")] == [3, 4]
+    assert [r["run_id"] for r in archive.find(url="https://a.test/")] == ["r1", "r2"]
+    assert archive.find(run_id="r2", kind="read_page")[0]["digest"] == first
+
+    stats = archive.stats()
+    assert stats["snapshots"] == 3 and stats["unique_documents"] == 2
+    assert stats["ratio"] > 10
+    archive.close()
+
+def test_reads_objects_written_with_another_codec(tmp_path):
+    """Тест: снимок читается при смене кодека архива"""
+    archive = SnapshotArchive(tmp_path, codec="lzma")
+    digest = archive.put(PAGE, run_id="r1")
+    archive.close()
+
+    reopened = SnapshotArchive(tmp_path, codec="gzip")
+    assert reopened.get(digest) == PAGE
+    reopened.put(PAGE, run_id="r2")  # уже есть — второй копии нет
+    assert len(list((tmp_path / "objects").rglob("*.*"))) == 1
+    assert reopened.get("0" * 64) is None
+    with pytest.raises(ValueError):
+        SnapshotArchive(tmp_path, codec="zstd")
+    reopened.close()
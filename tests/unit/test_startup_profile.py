@@ -0,0 +1,37 @@
+"""Тесты профиля времени запуска"""
+import builtins
+import sys
+
+from src.utils.startup_profile import StartupProfile
+
+def test_disabled_profile_does_not_hook_imports():
+    """Тест: без флага импорт не перехватывается"""
+    original = builtins.__import__
+    profile = StartupProfile.from_argv(["server.py"])
+    profile.mark("imports")
+    assert builtins.__import__ is original
+    assert profile.phases == []
+
+def test_profile_records_imports_and_phases(tmp_path, monkeypatch):
+    """Тест: профиль учитывает импорты и этапы запуска"""
+    (tmp_path / "slow_child_mod.py").write_text("import time\ntime.sleep(0.02)\n")
+    (tmp_path / "slow_parent_mod.py").write_text("import slow_child_mod\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    original = builtins.__import__
+    profile = StartupProfile.from_argv(["server.py", "--profile-startup"])
+    try:
+        import slow_parent_mod  # noqa: F401
+        profile.mark("imports")
+    finally:
+        profile.stop()
+        sys.modules.pop("slow_parent_mod", None)
+        sys.modules.pop("slow_child_mod", None)
+
+    assert builtins.__import__ is original
+    parent_total, parent_self = profile.imports["slow_parent_mod"]
+    child_total, _ = profile.imports["slow_child_mod"]
+    assert child_total >= 0.02 and parent_total >= child_total
+    assert parent_self < child_total
+    assert profile.phases[0][0] == "imports"
+    assert "slow_child_mod" in profile.report()
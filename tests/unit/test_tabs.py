@@ -0,0 +1,69 @@
+"""Тесты параллельной навигации по вкладкам"""
+import asyncio
+import pytest
+from src.tools.tabs import navigate_many
+
+class FakeResponse:
+    status = 200
+
+class FakeContext:
+    """Контекст, считающий одновременно открытые вкладки"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.open = 0
+        self.max_open = 0
+
+    async def new_page(self):
+        self.open += 1
+        self.max_open = max(self.max_open, self.open)
+        return FakePage(self)
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.url = "about:blank"
+        self.closed = False
+
+    async def goto(self, url, wait_until, timeout):
+        await asyncio.sleep(self.context.delay)
+        if "broken" in url:
+            raise RuntimeError("net::ERR_CONNECTION_REFUSED")
+        self.url = url
+        return FakeResponse()
+
+    async def evaluate(self, script):
+        return {"title": self.url.rsplit("/", 1)[-1], "url": self.url}
+
+    async def close(self):
+        self.closed = True
+        self.context.open -= 1
+
+@pytest.mark.asyncio
+async def test_parallelism_is_bounded_and_order_kept():
+    """Тест: не больше parallelism вкладок сразу, дайджесты в порядке URL"""
+    context = FakeContext()
+    urls = [f"https://example.com/{i}" for i in range(10)]
+
+    digests, pages = await navigate_many(context, urls, parallelism=3)
+
+    assert context.max_open == 3
+    assert context.open == 0
+    assert [d["url"] for d in digests] == urls
+    assert all(d["status"] == 200 and "load_ms" in d for d in digests)
+    assert pages == [None] * 10
+
+@pytest.mark.asyncio
+async def test_failed_url_does_not_stop_batch():
+    """Тест: ошибка одного URL попадает в его дайджест, остальные грузятся"""
+    context = FakeContext(delay=0)
+
+    digests, pages = await navigate_many(
+        context, ["https://a.test/ok", "https://a.test/broken", "https://a.test/next"],
+        keep_open=True)
+
+    assert "ERR_CONNECTION_REFUSED" in digests[1]["error"]
+    assert digests[2]["title"] == "next"
+    assert pages[1] is None
+    assert [p.url for p in pages if p] == ["https://a.test/ok", "https://a.test/next"]
+    assert context.open == 2
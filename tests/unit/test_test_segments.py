@@ -0,0 +1,47 @@
+"""Тесты разбиения записи на сегменты и сборки модуля"""
+import ast
+import json
+
+from src.tools.test_segments import assemble_module, selector_constants, split_timeline
+from src.utils.llm_scheduler import estimate_tokens
+
+def _step(action, url, selector=None, text=None):
+    return {"action": action, "url": url, "selector": selector, "text": text}
+
+def test_split_at_page_boundaries_and_budget():
+    """Тест: запись режется на переходах страниц и по бюджету токенов"""
+    steps = [
+        _step("navigate", "https://shop.test/login"),
+        _step("fill", "https://shop.test/login", "#email", "a@b.c"),
+        _step("click", "https://shop.test/login", "#submit"),
+        _step("click", "https://shop.test/catalog?page=1", "#item"),
+        _step("navigate", "https://shop.test/cart"),
+    ] + [_step("fill", "https://shop.test/cart", f"#qty{i}", "x" * 300) for i in range(10)]
+
+    segments = split_timeline(steps, max_tokens=400)
+
+    assert [s["action"] for s in segments[0]] == ["navigate", "fill", "click"]
+    assert segments[1][0]["selector"] == "#item"
+    assert sum(len(s) for s in segments) == len(steps)  # ничего не потеряно
+    assert all(estimate_tokens(json.dumps(s)) <= 400 for s in segments if len(s) > 1)
+
+def test_selectors_deduplicated_and_module_assembled():
+    """Тест: общие константы селекторов и сборка модуля из сегментов"""
+    segments = [[_step("click", "u", "#submit"), _step("fill", "u", "input[name=q]")],
+                [_step("click", "v", "#submit"), _step("click", "v", "#Submit")]]
+    selectors = selector_constants(segments)
+    assert list(selectors) == ["#submit", "input[name=q]", "#Submit"]
+    assert selectors["#submit"] == "SEL_SUBMIT" and selectors["#Submit"] == "SEL_SUBMIT_2"
+
+    codes = [
+        "```python\nimport logging\n\nclass Segment1Page:\n    async def run(self, page):\n"
+        "        await page.click(SEL_SUBMIT)\n```",
+        "import logging\nimport re\n\nclass Segment2Page:\n    async def run(self, page):\n"
+        "        await page.click(SEL_SUBMIT_2)\n",
+    ]
+    module = assemble_module(codes, selectors)
+
+    ast.parse(module)
+    assert module.count("import logging") == 1
+    assert module.count("SEL_SUBMIT = ") == 1
+    assert "for segment in (Segment1Page(), Segment2Page(),):" in module
@@ -0,0 +1,32 @@
+"""Тесты для трассировки"""
+from src.utils.tracing import Tracer, load_events, merge_traces
+
+def test_trace_propagates_between_processes(tmp_path):
+    """Тест: спаны клиента и сервера попадают в одну трассу"""
+    client = Tracer("client", tmp_path)
+    server = Tracer("server", tmp_path / "server")
+
+    with client.trace("agent_task") as task:
+        with client.span("tool_call:click"):
+            meta = client.inject()
+            with server.remote_parent(meta["traceparent"]):
+                with server.span("playwright.click", selector="#login"):
+                    pass
+    client.close()
+    server.close()
+
+    merged = tmp_path / "trace.json"
+    merge_traces([client._writer.path, server._writer.path], merged)
+    spans = {e["name"]: e for e in load_events(merged) if e["ph"] == "X"}
+
+    assert {s["args"]["trace_id"] for s in spans.values()} == {task.trace_id}
+    assert spans["playwright.click"]["args"]["parent_id"] == spans["tool_call:click"]["args"]["span_id"]
+    assert spans["tool_call:click"]["args"]["parent_id"] == task.span_id
+    assert spans["agent_task"]["dur"] >= spans["tool_call:click"]["dur"]
+
+def test_disabled_tracer_is_noop(tmp_path):
+    """Тест: без TRACE_DIR спаны ничего не пишут"""
+    tracer = Tracer("off")
+    with tracer.span("step") as ctx:
+        assert ctx is None
+        assert tracer.inject() == {}
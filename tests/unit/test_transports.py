@@ -0,0 +1,25 @@
+"""Тесты выбора MCP-транспорта"""
+import pytest
+from src.core.transports import open_session, transport_of
+
+def test_transport_by_target():
+    """Тест: транспорт определяется по цели подключения"""
+    assert transport_of("http://localhost:8000/sse") == "sse"
+    assert transport_of("http://localhost:8000/sse/") == "sse"
+    assert transport_of("https://mcp.example.com/mcp") == "http"
+    assert transport_of("stdio") == "stdio"
+    assert transport_of("inprocess") == "inprocess"
+    with pytest.raises(ValueError):
+        transport_of("localhost:8000")
+
+@pytest.mark.asyncio
+async def test_in_process_session_calls_tools():
+    """Тест: сервер в том же процессе отвечает тем же набором инструментов"""
+    async with open_session("inprocess") as session:
+        tools = {tool.name for tool in (await session.list_tools()).tools}
+        result = await session.call_tool("stop_recording", {})
+
+    assert {"navigate", "navigate_many", "read_page"} <= tools
+    assert not result.isError
+    assert result.content[0].text.startswith("Recording stopped")
+    assert "queue_wait_ms" in result.meta
@@ -0,0 +1,39 @@
+"""Тесты для областей кэша селекторов"""
+from types import SimpleNamespace
+import pytest
+from src.agents.adaptive_agent import AdaptiveAgent
+from src.utils.url_scope import route_pattern, url_scope
+
+def test_route_pattern_replaces_ids():
+    """Тест нормализации идентификаторов в пути"""
+    assert route_pattern('/users/42/orders/') == '/users/:id/orders'
+    assert route_pattern('/doc/3f2b8c1e-9a7d-4e2b-8f1a-0c9d8e7f6a5b') == '/doc/:uuid'
+    assert route_pattern('') == '/'
+
+def test_memory_key_is_scoped_by_origin():
+    """Тест: одинаковое действие на разных сайтах даёт разные ключи"""
+    first = AdaptiveAgent.memory_key('click', 'Войти', 'https://a.example.com/login?next=/')
+    second = AdaptiveAgent.memory_key('click', 'Войти', 'https://b.example.com/login')
+
+    assert first == 'https://a.example.com/login|click:Войти'
+    assert first != second
+    assert url_scope('https://app.example.com/#/items/7') == 'https://app.example.com/#/items/:id'
+    assert AdaptiveAgent.memory_key('click', 'Войти') == 'click:Войти'
+
+@pytest.mark.asyncio
+async def test_breaker_is_scoped_by_page():
+    """Тест: селектор, сломанный на одной странице, не блокируется на других"""
+    class FlakySession:
+        async def call_tool(self, name, arguments):
+            return SimpleNamespace(isError=True, meta={"error": {"retryable": True}},
+                                   content=[SimpleNamespace(text="Error: Target closed")])
+
+    agent = AdaptiveAgent()
+    login, cart = 'https://a.example.com/login', 'https://a.example.com/cart'
+    for _ in range(2):
+        result = await agent._try_selector(FlakySession(), 'click', 'button[type=submit]',
+                                           scope=url_scope(login))
+        assert not result['success']
+
+    assert agent.breaker.state(f"{login}|button[type=submit]") == "open"
+    assert agent.breaker.allow(f"{cart}|button[type=submit]")
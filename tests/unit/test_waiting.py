@@ -0,0 +1,52 @@
+"""Тесты для ожидания условий на странице"""
+import asyncio
+import pytest
+from src.tools.waiting import WaitTimeout, wait_for_condition
+
+class FakePage:
+    """Страница, у которой каждое ожидание занимает ``delay`` секунд"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def _wait(self, name, timeout):
+        self.calls.append((name, timeout))
+        await asyncio.sleep(self.delay)
+
+    async def wait_for_load_state(self, state, timeout):
+        await self._wait(f"load:{state}", timeout)
+
+    async def wait_for_url(self, url, timeout):
+        await self._wait("url", timeout)
+
+    async def wait_for_selector(self, selector, state, timeout):
+        await self._wait(f"selector:{state}", timeout)
+
+    async def wait_for_function(self, expression, timeout):
+        await self._wait("predicate", timeout)
+
+@pytest.mark.asyncio
+async def test_condition_parts_share_one_deadline():
+    """Тест: части условия проверяются по порядку с общим дедлайном"""
+    page = FakePage(delay=0.05)
+
+    report = await wait_for_condition(page, {
+        "selector": "#ok", "load_state": "networkidle",
+        "predicate": "() => window.ready", "timeout_ms": 1000
+    })
+
+    assert [name for name, _ in page.calls] == ["load:networkidle", "selector:visible", "predicate"]
+    timeouts = [timeout for _, timeout in page.calls]
+    assert timeouts == sorted(timeouts, reverse=True) and timeouts[0] <= 1000
+    assert report["waited_ms"] >= 150
+
+@pytest.mark.asyncio
+async def test_condition_fails_when_deadline_passed():
+    """Тест: после истечения дедлайна следующая часть не ждёт бесконечно"""
+    page = FakePage(delay=0.1)
+
+    with pytest.raises(WaitTimeout):
+        await wait_for_condition(page, {"url": "**/done", "selector": "#ok", "timeout_ms": 50})
+
+    assert [name for name, _ in page.calls] == ["url"]
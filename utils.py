@@ -31,6 +31,30 @@ PROMPT_GENERATE_TEST = """
 Верни ТОЛЬКО Python код без пояснений.
 """
 
+# Промпт для одного сегмента длинной записи (см. src/tools/test_segments.py)
+PROMPT_GENERATE_SEGMENT = """
+Ты — Senior SDET эксперт по Playwright.
+Это сегмент {index} из {total} длинной записи действий пользователя.
+Создай для него page-object класс на Python + Playwright (async).
+
+Записанные действия сегмента (JSON):
+{json_str}
+
+Константы селекторов уже объявлены в модуле, используй их имена вместо строк:
+{selectors}
+
+Требования к коду:
+1. Только класс `{class_name}` с методом `async def run(self, page)`
+2. Не запускай браузер и не создавай страницу — `page` уже открыта
+3. Не объявляй константы селекторов и не пиши `if __name__ == "__main__"`
+4. Добавь явные ожидания элементов и логирование действий
+
+Верни ТОЛЬКО Python код без пояснений.
+"""
+
 def get_llm_client():
-    """Получить клиент OpenAI"""
-    return AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL)
+    """Получить клиент OpenAI
+
+    Повторы на 429 выполняет планировщик LLM-вызовов, а не SDK.
+    """
+    return AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL, max_retries=0)